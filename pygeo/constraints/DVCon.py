@@ -1,8 +1,10 @@
 # Standard Python modules
 from collections import OrderedDict
+import time
 
 # External modules
 from baseclasses.utils import Error
+from mpi4py import MPI
 import numpy as np
 from pyspline import Curve
 
@@ -11,7 +13,7 @@ from .. import geo_utils, pyGeo
 from ..geo_utils.file_io import readPlot3DSurfFile
 from ..geo_utils.misc import convertTo2D
 from .areaConstraint import ProjectedAreaConstraint, SurfaceAreaConstraint, TriangulatedSurfaceConstraint
-from .baseConstraint import GlobalLinearConstraint, LinearConstraint
+from .baseConstraint import GlobalLinearConstraint, LinearConstraint, PointSetPool
 from .circularityConstraint import CircularityConstraint
 from .colinearityConstraint import ColinearityConstraint
 from .curvatureConstraint import CurvatureConstraint, CurvatureConstraint1D
@@ -65,15 +67,52 @@ class DVConstraints:
         A name for this object. Used to distinguish between DVCon objects
         if multiple DVConstraint objects are used in an optimization.
 
+    poolPointSets : bool
+        Flag to merge the point sets of the constraints into a few point
+        sets of each DVGeo object. This way DVGeo does not need to update
+        and differentiate every constraint separately.
+        Only FFD-based DVGeometry objects are pooled.
+
+    comm : MPI.IntraComm, optional
+        Communicator over which the evaluation of the constraints is
+        distributed. Each constraint group is then evaluated on a single
+        rank, chosen from the measured cost of the first evaluation, and
+        the funcs and funcsSens dictionaries are gathered on all ranks.
+        Constraints that communicate internally, such as triangulated
+        surface constraints, and constraints on a DVGeo that is not
+        FFD-based, such as ESP, VSP, CST or DVGeometryMulti, are still
+        evaluated on every rank. The coordinates stored in a constraint,
+        e.g. for :func:`writeTecplot`, are then only current on the rank
+        evaluating it. If None, every rank evaluates every constraint.
+
+    sparseJacobian : bool
+        Flag to give the constraint jacobians to pyOptSparse as sparse
+        ``{"coo": ...}`` blocks. The sparsity of the thickness, location
+        and volume constraints is found from the FFD embedding of their
+        points when :func:`addConstraintsPyOpt` is called, and their
+        sensitivities are then returned in the same format by
+        :func:`evalFunctionsSens`. DVs a constraint does not depend on
+        are left out of its ``wrt`` list. The other constraints stay
+        dense. The linear constraint jacobians are also passed as sparse
+        blocks. Only FFD-based DVGeometry objects without composite DVs
+        are supported, the constraints on other DVGeo objects stay dense.
+
     """
 
-    def __init__(self, name="DVCon1"):
+    def __init__(self, name="DVCon1", poolPointSets=True, comm=None, sparseJacobian=False):
         """
         Create a (empty) DVconstrains object. Specific types of
         constraints will added individually
         """
 
         self.name = name
+        self.poolPointSets = poolPointSets
+        self.comm = comm
+        self.sparseJacobian = sparseJacobian
+
+        # The names of the constraints and the rank evaluating each of them
+        # when the evaluation is distributed, -1 meaning every rank
+        self.conOwners = None
 
         self.constraints = OrderedDict()
         self.linearCon = OrderedDict()
@@ -82,6 +121,7 @@ class DVConstraints:
 
         self.surfaces = {}
         self.DVGeometries = {}
+        self.pointSetPools = {}
 
     def setSurface(self, surf, name="default", addToDVGeo=False, DVGeoName="default", surfFormat="point-vector"):
         """
@@ -204,6 +244,7 @@ class DVConstraints:
                         )
                         raise ValueError(msg)
         self.DVGeometries[name] = DVGeo
+        self.pointSetPools[name] = PointSetPool(f"{self.name}_{name}_pool", DVGeo, pool=self.poolPointSets)
 
     def addConstraintsPyOpt(self, optProb, exclude_wrt=None):
         """
@@ -225,11 +266,13 @@ class DVConstraints:
         for conTypeKey in self.constraints:
             constraint = self.constraints[conTypeKey]
             for key in constraint:
+                if self.sparseJacobian:
+                    constraint[key].setJacobianSparsity()
                 constraint[key].addConstraintsPyOpt(optProb, exclude_wrt=exclude_wrt)
 
         # add the linear constraints separately, since they are treated a bit differently
         for key in self.linearCon:
-            self.linearCon[key].addConstraintsPyOpt(optProb)
+            self.linearCon[key].addConstraintsPyOpt(optProb, sparseJacobian=self.sparseJacobian)
 
     def addVariablesPyOpt(self, optProb):
         """
@@ -296,10 +339,7 @@ class DVConstraints:
         """
 
         # loop over the generated constraints and evaluate their function values
-        for conTypeKey in self.constraints:
-            constraint = self.constraints[conTypeKey]
-            for key in constraint:
-                constraint[key].evalFunctions(funcs, config)
+        self._evalConstraints("evalFunctions", funcs, config)
 
         if includeLinear:
             for key in self.linearCon:
@@ -321,11 +361,22 @@ class DVConstraints:
             does not need linear constraints to be returned.
         """
 
-        # loop over the generated constraints and evaluate their function values
-        for conTypeKey in self.constraints:
-            constraint = self.constraints[conTypeKey]
-            for key in constraint:
-                constraint[key].evalFunctionsSens(funcsSens, config)
+        # The constraints register their seeds on the pooled point sets, which are multiplied
+        # with the jacobian of each merged point set at once when the pools are flushed
+        for pool in self.pointSetPools.values():
+            pool.startSensitivityBatch()
+        try:
+            # loop over the generated constraints and evaluate their function values
+            self._evalConstraints("evalFunctionsSens", funcsSens, config)
+        finally:
+            for pool in self.pointSetPools.values():
+                pool.endSensitivityBatch()
+
+        # Take the entries of the constraints with a sparse jacobian out of the dense blocks
+        for constraint in self.constraints.values():
+            for con in constraint.values():
+                if con.jacSparsity is not None and con.name in funcsSens:
+                    funcsSens[con.name] = con.getSparseSens(funcsSens[con.name])
 
         if includeLinear:
             for key in self.linearCon:
@@ -612,7 +663,7 @@ class DVConstraints:
         else:
             conName = name
         self.constraints[typeName][conName] = ThicknessConstraint(
-            conName, coords, lower, upper, scaled, scale, self.DVGeometries[DVGeoName], addToPyOpt, compNames
+            conName, coords, lower, upper, scaled, scale, self.pointSetPools[DVGeoName], addToPyOpt, compNames
         )
 
     def addThicknessConstraints1D(
@@ -761,7 +812,7 @@ class DVConstraints:
         else:
             conName = name
         self.constraints[typeName][conName] = ThicknessConstraint(
-            conName, coords, lower, upper, scaled, scale, self.DVGeometries[DVGeoName], addToPyOpt, compNames
+            conName, coords, lower, upper, scaled, scale, self.pointSetPools[DVGeoName], addToPyOpt, compNames
         )
 
     def addLERadiusConstraints(
@@ -954,7 +1005,7 @@ class DVConstraints:
         else:
             conName = name
         self.constraints[typeName][conName] = RadiusConstraint(
-            conName, coords, lower, upper, scaled, scale, self.DVGeometries[DVGeoName], addToPyOpt, compNames
+            conName, coords, lower, upper, scaled, scale, self.pointSetPools[DVGeoName], addToPyOpt, compNames
         )
 
     def addLocationConstraints1D(
@@ -1065,7 +1116,7 @@ class DVConstraints:
         else:
             conName = name
         self.constraints[typeName][conName] = LocationConstraint(
-            conName, X, lower, upper, scaled, scale, self.DVGeometries[DVGeoName], addToPyOpt, compNames
+            conName, X, lower, upper, scaled, scale, self.pointSetPools[DVGeoName], addToPyOpt, compNames
         )
 
     def addProjectedLocationConstraints1D(
@@ -1208,7 +1259,7 @@ class DVConstraints:
         else:
             conName = name
         self.constraints[typeName][conName] = LocationConstraint(
-            conName, X, lower, upper, scaled, scale, self.DVGeometries[DVGeoName], addToPyOpt, compNames
+            conName, X, lower, upper, scaled, scale, self.pointSetPools[DVGeoName], addToPyOpt, compNames
         )
 
     def addThicknessToChordConstraints1D(
@@ -1354,7 +1405,7 @@ class DVConstraints:
         else:
             conName = name
         self.constraints[typeName][conName] = ThicknessToChordConstraint(
-            conName, coords, lower, upper, scale, self.DVGeometries[DVGeoName], addToPyOpt, compNames
+            conName, coords, lower, upper, scale, self.pointSetPools[DVGeoName], addToPyOpt, compNames
         )
 
     def addTriangulatedSurfaceConstraint(
@@ -1400,6 +1451,10 @@ class DVConstraints:
 
         rho : float
             The rho factor of the KS function of min distance.
+            Only the facets that can be within (log(n1 * n2) + 37) / rho of the
+            minimum distance are passed to geograd, where n1 and n2 are the
+            numbers of facets. This assumes that the KS function of geograd
+            aggregates exp(-rho * (d - mindist)) of the unscaled distances d.
 
         heuristic_dist : float
             The triangulated surface constraint uses a procedure to skip
@@ -1407,6 +1462,7 @@ class DVConstraints:
             in order to save computation time. By default, this is set
             to the maximum linear dimension of the second object's bounding box.
             You can set this to a large number to compute an "exact" KS.
+            It only skips pairs and is assumed not to scale the distances in the KS function.
 
         perim_scale : float
             Apply a scaling factor to the intersection perimeter length.
@@ -1440,12 +1496,12 @@ class DVConstraints:
         """
         if DVGeo_1_name is not None:
             self._checkDVGeo(DVGeo_1_name)
-            DVGeo1 = self.DVGeometries[DVGeo_1_name]
+            DVGeo1 = self.pointSetPools[DVGeo_1_name]
         else:
             DVGeo1 = None
         if DVGeo_2_name is not None:
             self._checkDVGeo(DVGeo_2_name)
-            DVGeo2 = self.DVGeometries[DVGeo_2_name]
+            DVGeo2 = self.pointSetPools[DVGeo_2_name]
         else:
             DVGeo2 = None
         if DVGeo1 is None and DVGeo2 is None:
@@ -1559,7 +1615,7 @@ class DVConstraints:
         """
 
         self._checkDVGeo(DVGeoName)
-        DVGeo = self.DVGeometries[DVGeoName]
+        DVGeo = self.pointSetPools[DVGeoName]
 
         typeName = "triVolCon"
         if typeName not in self.constraints:
@@ -1736,7 +1792,7 @@ class DVConstraints:
             upper,
             scaled,
             scale,
-            self.DVGeometries[DVGeoName],
+            self.pointSetPools[DVGeoName],
             addToPyOpt,
             compNames,
         )
@@ -2281,7 +2337,7 @@ class DVConstraints:
             thickScaled,
             MACFracLower,
             MACFracUpper,
-            self.DVGeometries[DVGeoName],
+            self.pointSetPools[DVGeoName],
             addToPyOpt,
             compNames,
         )
@@ -2395,7 +2451,7 @@ class DVConstraints:
         else:
             conName = name
         self.constraints[typeName][conName] = CircularityConstraint(
-            conName, origin, coords, lower, upper, scale, self.DVGeometries[DVGeoName], addToPyOpt, compNames
+            conName, origin, coords, lower, upper, scale, self.pointSetPools[DVGeoName], addToPyOpt, compNames
         )
 
     def addSurfaceAreaConstraint(
@@ -2490,7 +2546,7 @@ class DVConstraints:
             upper,
             scale,
             scaled,
-            self.DVGeometries[DVGeoName],
+            self.pointSetPools[DVGeoName],
             addToPyOpt,
             compNames,
         )
@@ -2599,7 +2655,7 @@ class DVConstraints:
             upper,
             scale,
             scaled,
-            self.DVGeometries[DVGeoName],
+            self.pointSetPools[DVGeoName],
             addToPyOpt,
             compNames,
         )
@@ -2698,7 +2754,7 @@ class DVConstraints:
             lower,
             upper,
             scale,
-            self.DVGeometries[DVGeoName],
+            self.pointSetPools[DVGeoName],
             addToPyOpt,
             compNames,
         )
@@ -2795,7 +2851,7 @@ class DVConstraints:
         else:
             conName = name
         self.constraints[typeName][conName] = ColinearityConstraint(
-            conName, lineAxis, origin, coords, lower, upper, scale, self.DVGeometries[DVGeoName], addToPyOpt, compNames
+            conName, lineAxis, origin, coords, lower, upper, scale, self.pointSetPools[DVGeoName], addToPyOpt, compNames
         )
 
     def addCurvatureConstraint(
@@ -2932,7 +2988,7 @@ class DVConstraints:
             scaled,
             scale,
             KSCoeff,
-            self.DVGeometries[DVGeoName],
+            self.pointSetPools[DVGeoName],
             addToPyOpt,
             compNames,
         )
@@ -3132,7 +3188,7 @@ class DVConstraints:
             upper,
             scaled,
             scale,
-            self.DVGeometries[DVGeoName],
+            self.pointSetPools[DVGeoName],
             addToPyOpt,
             compNames,
         )
@@ -3205,6 +3261,87 @@ class DVConstraints:
             config=config,
         )
 
+    def _evalConstraints(self, method, output, config):
+        """
+        Call evalFunctions or evalFunctionsSens of every constraint. If
+        a communicator was given, each constraint is only evaluated on
+        the rank it is assigned to and the outputs are gathered on all
+        ranks, in the same order as in the serial evaluation. The seeds
+        registered on the point set pools are evaluated before the
+        outputs are read.
+        """
+        cons = [constraint[key] for constraint in self.constraints.values() for key in constraint]
+
+        if self.comm is None or self.comm.size == 1:
+            for con in cons:
+                getattr(con, method)(output, config)
+            self._flushSensitivities()
+            return
+
+        names = [con.name for con in cons]
+        if self.conOwners is None or self.conOwners[0] != names:
+            # The first evaluation is done in full on every rank, which also sets any
+            # reference values the constraints store
+            for con in cons:
+                getattr(con, method)(output, config)
+            self._flushSensitivities()
+
+            # Then time a second evaluation to assign the constraints. By now the work
+            # shared between constraints, such as updating pooled point sets, is done
+            costs = np.zeros(len(cons))
+            for i, con in enumerate(cons):
+                t0 = time.time()
+                getattr(con, method)({}, config)
+                self._flushSensitivities()
+                costs[i] = time.time() - t0
+            self.conOwners = (names, self._assignConstraints(cons, costs))
+            return
+
+        owners = self.conOwners[1]
+        results = {}
+        for i, con in enumerate(cons):
+            if owners[i] in [-1, self.comm.rank]:
+                results[i] = {}
+                getattr(con, method)(results[i], config)
+        self._flushSensitivities()
+
+        # Collect the outputs of the constraints evaluated on a single rank
+        for rankResults in self.comm.allgather({i: results[i] for i in results if owners[i] != -1}):
+            results.update(rankResults)
+
+        for i in range(len(cons)):
+            output.update(results[i])
+
+    def _flushSensitivities(self):
+        """
+        Evaluate the seeds the constraints registered on the point set
+        pools, so that their sensitivities can be read
+        """
+        for pool in self.pointSetPools.values():
+            pool.flushSensitivities()
+
+    def _assignConstraints(self, cons, costs):
+        """
+        Assign the constraints to ranks, largest cost first, each to the
+        rank with the least work so far. The costs are reduced over the
+        ranks first so that all of them arrive at the same assignment.
+        """
+        self.comm.Allreduce(MPI.IN_PLACE, costs, op=MPI.MAX)
+        owners = -np.ones(len(cons), dtype=int)
+        load = np.zeros(self.comm.size)
+        for i in np.argsort(-costs, kind="stable"):
+            con = cons[i]
+            # Constraints with their own communicator have to be evaluated on every rank.
+            # So do the ones on a DVGeo that is not FFD-based, because the updates and
+            # sensitivities of ESP, VSP, CST and DVGeometryMulti are collective operations
+            DVGeo = getattr(con.DVGeo, "DVGeo", con.DVGeo)
+            if hasattr(con, "comm") or not hasattr(DVGeo, "JT"):
+                continue
+            owners[i] = np.argmin(load)
+            load[owners[i]] += costs[i]
+
+        return owners
+
     def _checkDVGeo(self, name="default"):
         """check if DVGeo exists"""
         if name not in self.DVGeometries.keys():
@@ -1,5 +1,6 @@
 # External modules
 import numpy as np
+from scipy.spatial import cKDTree
 
 # Local modules
 from .. import geo_utils
@@ -83,6 +84,10 @@ class TriangulatedSurfaceConstraint(GeometricConstraint):
         self.perim_length = None
         self.minimum_distance = None
 
+        # Indices of the triangles of each surface passed to geograd in the last evaluation
+        self.active1 = None
+        self.active2 = None
+
     def getVarNames(self):
         """
         return the var names relevant to this constraint. By default, this is the DVGeo
@@ -146,8 +151,8 @@ class TriangulatedSurfaceConstraint(GeometricConstraint):
             which will apply to *ALL* the local DV groups or a single string specifying
             a particular configuration.
         """
-        tmpTotalKS = {}
-        tmpTotalPerim = {}
+        funcsSens[self.name + "_KS"] = {}
+        funcsSens[self.name + "_perim"] = {}
 
         deriv_outputs = self.evalTriangulatedSurfConstraintSens()
         # deriv outputs contains:
@@ -155,100 +160,39 @@ class TriangulatedSurfaceConstraint(GeometricConstraint):
         # dKSdA1, dKSdB1, dKSdC1, dKSdA2, dKSdB2, dKSdC2 (index 5 through 10)
         # dPdA1, dPdB1, dPdC1, dPdA2, dPdB2, dPdC2 (index 11 through 16)
 
-        if self.DVGeo1 is not None:
-            nDV1 = self.DVGeo1.getNDV()
-        else:
-            nDV1 = 0
-
-        if nDV1 > 0:
-            # compute sensitivity with respect to the first mesh
-            # grad indices 0-2 are for mesh 1 p0, 1, 2 / 3-5 are for mesh 2 p0, 1, 2
-            tmp_KS_p0 = self.DVGeo1.totalSensitivity(
-                np.transpose(deriv_outputs[5]), self.surface_1_name + "_p0", config=config
-            )
-            tmp_KS_p1 = self.DVGeo1.totalSensitivity(
-                np.transpose(deriv_outputs[6]), self.surface_1_name + "_p1", config=config
-            )
-            tmp_KS_p2 = self.DVGeo1.totalSensitivity(
-                np.transpose(deriv_outputs[7]), self.surface_1_name + "_p2", config=config
-            )
-            tmp_perim_p0 = self.DVGeo1.totalSensitivity(
-                np.transpose(deriv_outputs[11]), self.surface_1_name + "_p0", config=config
-            )
-            tmp_perim_p1 = self.DVGeo1.totalSensitivity(
-                np.transpose(deriv_outputs[12]), self.surface_1_name + "_p1", config=config
-            )
-            tmp_perim_p2 = self.DVGeo1.totalSensitivity(
-                np.transpose(deriv_outputs[13]), self.surface_1_name + "_p2", config=config
-            )
-            for key in tmp_KS_p0:
-                tmpTotalKS[key] = tmp_KS_p0[key] + tmp_KS_p1[key] + tmp_KS_p2[key]
-                tmpTotalPerim[key] = tmp_perim_p0[key] + tmp_perim_p1[key] + tmp_perim_p2[key]
-
-        if self.DVGeo2 is not None:
-            nDV2 = self.DVGeo2.getNDV()
-        else:
-            nDV2 = 0
-
-        if nDV2 > 0:
-            # compute sensitivity with respect to the first mesh
-            # grad indices 0-2 are for mesh 1 p0, 1, 2 / 3-5 are for mesh 2 p0, 1, 2
-            tmp_KS_p0 = self.DVGeo2.totalSensitivity(
-                np.transpose(deriv_outputs[8]), self.surface_2_name + "_p0", config=config
-            )
-            tmp_KS_p1 = self.DVGeo2.totalSensitivity(
-                np.transpose(deriv_outputs[9]), self.surface_2_name + "_p1", config=config
-            )
-            tmp_KS_p2 = self.DVGeo2.totalSensitivity(
-                np.transpose(deriv_outputs[10]), self.surface_2_name + "_p2", config=config
-            )
-            tmp_perim_p0 = self.DVGeo2.totalSensitivity(
-                np.transpose(deriv_outputs[14]), self.surface_2_name + "_p0", config=config
-            )
-            tmp_perim_p1 = self.DVGeo2.totalSensitivity(
-                np.transpose(deriv_outputs[15]), self.surface_2_name + "_p1", config=config
-            )
-            tmp_perim_p2 = self.DVGeo2.totalSensitivity(
-                np.transpose(deriv_outputs[16]), self.surface_2_name + "_p2", config=config
-            )
-            for key in tmp_KS_p0:
-                tmpTotalKS[key] = tmp_KS_p0[key] + tmp_KS_p1[key] + tmp_KS_p2[key]
-                tmpTotalPerim[key] = tmp_perim_p0[key] + tmp_perim_p1[key] + tmp_perim_p2[key]
-        funcsSens[self.name + "_KS"] = tmpTotalKS
-        funcsSens[self.name + "_perim"] = tmpTotalPerim
+        # the sensitivities with respect to the vertices of both meshes are summed
+        for DVGeo, surfaceName, iKS, iPerim in [
+            (self.DVGeo1, self.surface_1_name, 5, 11),
+            (self.DVGeo2, self.surface_2_name, 8, 14),
+        ]:
+            if DVGeo is None or DVGeo.getNDV() == 0:
+                continue
+            for i in range(3):
+                ptSetName = surfaceName + "_p%d" % i
+                DVGeo.addSensitivitySeed(
+                    np.transpose(deriv_outputs[iKS + i]), ptSetName, funcsSens[self.name + "_KS"], config=config
+                )
+                DVGeo.addSensitivitySeed(
+                    np.transpose(deriv_outputs[iPerim + i]), ptSetName, funcsSens[self.name + "_perim"], config=config
+                )
 
     def evalTriangulatedSurfConstraint(self):
         """
-        Call geograd to compute the KS function and intersection length
+        Call geograd to compute the KS function and intersection length.
+        Only the triangles that can be close enough to the other surface
+        to contribute are passed to geograd, see getActiveTriangles.
         """
-        # first compute the length of the intersection surface between the object and surf mesh
-        mindist_tmp = 0.0
+        self.active1, self.active2 = self.getActiveTriangles()
+        surf1, surf2 = self._getActiveSurfaces()
 
         # first run to get the minimum distance
+        mindist_tmp = 0.0
         _, perim_length, mindist, _, _ = geograd_parallel.compute(
-            self.surf1_p0,
-            self.surf1_p1,
-            self.surf1_p2,
-            self.surf2_p0,
-            self.surf2_p1,
-            self.surf2_p2,
-            mindist_tmp,
-            self.rho,
-            self.maxdim,
-            self.comm.py2f(),
+            *surf1, *surf2, mindist_tmp, self.rho, self.maxdim, self.comm.py2f()
         )
         # second run gets the well-conditioned KS
         KS, perim_length, mindist, _, _ = geograd_parallel.compute(
-            self.surf1_p0,
-            self.surf1_p1,
-            self.surf1_p2,
-            self.surf2_p0,
-            self.surf2_p1,
-            self.surf2_p2,
-            mindist,
-            self.rho,
-            self.maxdim,
-            self.comm.py2f(),
+            *surf1, *surf2, mindist, self.rho, self.maxdim, self.comm.py2f()
         )
 
         self.perim_length = perim_length
@@ -266,21 +210,80 @@ class TriangulatedSurfaceConstraint(GeometricConstraint):
         """
         Call geograd to compute the derivatives of the KS function and intersection length
         """
-        # first compute the length of the intersection surface between the object and surf mesh
+        # the derivatives are computed for the triangles active in the last evaluation
+        surf1, surf2 = self._getActiveSurfaces()
         deriv_output = geograd_parallel.compute_derivs(
-            self.surf1_p0,
-            self.surf1_p1,
-            self.surf1_p2,
-            self.surf2_p0,
-            self.surf2_p1,
-            self.surf2_p2,
-            self.minimum_distance,
-            self.rho,
-            self.maxdim,
-            self.comm.py2f(),
+            *surf1, *surf2, self.minimum_distance, self.rho, self.maxdim, self.comm.py2f()
         )
+
+        # scatter them back to all the triangles, the others have zero derivatives
+        deriv_output = list(deriv_output)
+        for i in range(5, 17):
+            active, size = (self.active1, self.surf1_size) if i % 6 in [5, 0, 1] else (self.active2, self.surf2_size)
+            grad = np.zeros((3, size), dtype=deriv_output[i].dtype)
+            grad[:, active] = deriv_output[i]
+            deriv_output[i] = grad
         return deriv_output
 
+    def getActiveTriangles(self):
+        """
+        Find the triangles of each surface that may be within the cutoff
+        distance of the other surface. The cutoff is the minimum distance
+        plus the distance beyond which the terms exp(-rho*(d - mindist))
+        of all pairs together add less than machine precision to the KS
+        sum, so leaving the other triangles out does not change the
+        result. This assumes that geograd uses the unscaled distances
+        in its KS function, as the cutoff would be too small otherwise.
+
+        The triangles are bounded by spheres around their centroids and
+        a KD tree of the centroids of each surface gives the closest
+        centroid of the other. The triangles active in the previous
+        evaluation are used as a warm start to bound the current
+        minimum distance from above.
+
+        Returns
+        -------
+        active1, active2 : arrays
+            Indices of the active triangles of surface 1 and 2
+        """
+        surf1 = [self.surf1_p0, self.surf1_p1, self.surf1_p2]
+        surf2 = [self.surf2_p0, self.surf2_p1, self.surf2_p2]
+
+        # An upper bound of the minimum distance is the distance between the closest
+        # pair of vertices. Only the triangles active in the previous evaluation are
+        # searched if there are any, as the closest pair is usually still among them.
+        if self.active1 is None:
+            self.active1 = np.arange(self.surf1_size)
+            self.active2 = np.arange(self.surf2_size)
+        activeSurf1, activeSurf2 = self._getActiveSurfaces()
+        upperDist, _ = cKDTree(np.hstack(activeSurf2).T).query(np.hstack(activeSurf1).T)
+        upperDist = upperDist.min()
+
+        cutoff = upperDist + (np.log(self.surf1_size * self.surf2_size) + 37.0) / self.rho
+
+        # Centroids and radii of the bounding spheres
+        c1 = sum(surf1).T / 3
+        c2 = sum(surf2).T / 3
+        r1 = np.max([np.linalg.norm(p.T - c1, axis=1) for p in surf1], axis=0)
+        r2 = np.max([np.linalg.norm(p.T - c2, axis=1) for p in surf2], axis=0)
+
+        # A triangle is active if the sphere of one triangle of the other surface
+        # can be within the cutoff of its own sphere
+        d1, _ = cKDTree(c2).query(c1)
+        d2, _ = cKDTree(c1).query(c2)
+        active1 = np.nonzero(d1 - r1 - r2.max() <= cutoff)[0]
+        active2 = np.nonzero(d2 - r2 - r1.max() <= cutoff)[0]
+
+        return active1, active2
+
+    def _getActiveSurfaces(self):
+        """
+        Return the vertices of the active triangles of the two surfaces
+        """
+        surf1 = [p[:, self.active1] for p in [self.surf1_p0, self.surf1_p1, self.surf1_p2]]
+        surf2 = [p[:, self.active2] for p in [self.surf2_p0, self.surf2_p1, self.surf2_p2]]
+        return surf1, surf2
+
     def addConstraintsPyOpt(self, optProb, exclude_wrt=None):
         """
         Add the constraints to pyOpt, if the flag is set
@@ -416,14 +419,10 @@ class SurfaceAreaConstraint(GeometricConstraint):
                     p0b[i, :] = -v1b[i, :] - v2b[i, :]
                     p1b[i, :] = p1b[i, :] + v1b[i, :]
 
-            tmpp0 = self.DVGeo.totalSensitivity(dAdp0, self.name + "p0", config=config)
-            tmpp1 = self.DVGeo.totalSensitivity(dAdp1, self.name + "p1", config=config)
-            tmpp2 = self.DVGeo.totalSensitivity(dAdp2, self.name + "p2", config=config)
-            tmpTotal = {}
-            for key in tmpp0:
-                tmpTotal[key] = tmpp0[key] + tmpp1[key] + tmpp2[key]
-
-            funcsSens[self.name] = tmpTotal
+            funcsSens[self.name] = {}
+            self.DVGeo.addSensitivitySeed(dAdp0, self.name + "p0", funcsSens[self.name], config=config)
+            self.DVGeo.addSensitivitySeed(dAdp1, self.name + "p1", funcsSens[self.name], config=config)
+            self.DVGeo.addSensitivitySeed(dAdp2, self.name + "p2", funcsSens[self.name], config=config)
 
     def writeTecplot(self, handle):
         """
@@ -542,14 +541,10 @@ class ProjectedAreaConstraint(GeometricConstraint):
                 p1b[i, :] = p1b[i, :] + v1b
                 p0b[i, :] = p0b[i, :] - v1b - v2b
 
-        tmpp0 = self.DVGeo.totalSensitivity(dAdp0, self.name + "p0", config=config)
-        tmpp1 = self.DVGeo.totalSensitivity(dAdp1, self.name + "p1", config=config)
-        tmpp2 = self.DVGeo.totalSensitivity(dAdp2, self.name + "p2", config=config)
-        tmpTotal = {}
-        for key in tmpp0:
-            tmpTotal[key] = tmpp0[key] + tmpp1[key] + tmpp2[key]
-
-        funcsSens[self.name] = tmpTotal
+        funcsSens[self.name] = {}
+        self.DVGeo.addSensitivitySeed(dAdp0, self.name + "p0", funcsSens[self.name], config=config)
+        self.DVGeo.addSensitivitySeed(dAdp1, self.name + "p1", funcsSens[self.name], config=config)
+        self.DVGeo.addSensitivitySeed(dAdp2, self.name + "p2", funcsSens[self.name], config=config)
 
     def _computeProjectedAreaTri(self, p0, p1, p2, axis, plot=False):
         """
@@ -5,6 +5,7 @@ from collections import OrderedDict
 # External modules
 from baseclasses.utils import Error
 import numpy as np
+from scipy import sparse
 
 
 class GeometricConstraint(ABC):
@@ -25,6 +26,9 @@ class GeometricConstraint(ABC):
         self.DVGeo = DVGeo
         self.addToPyOpt = addToPyOpt
 
+        # the rows and columns of the nonzero jacobian entries for each DV, None if dense
+        self.jacSparsity = None
+
     @abstractmethod
     def evalFunctions(self, funcs, config):
         """
@@ -59,6 +63,60 @@ class GeometricConstraint(ABC):
         """
         return self.DVGeo.getVarNames(pyOptSparse=True)
 
+    def getPointDependence(self):
+        """
+        Return the name of the point set of the constraints and a sparse
+        matrix, size (nCon x nPts), with the points each constraint
+        depends on. By default, this is None and the constraint jacobian
+        is taken as dense.
+        """
+        return None
+
+    def setJacobianSparsity(self, config=None):
+        """
+        Find the nonzero entries of the constraint jacobian for each DV
+        from the points each constraint depends on and the DVs each of
+        these points depends on. The sparsity stays None if either one
+        is not known.
+        """
+        self.jacSparsity = None
+        pointDependence = self.getPointDependence()
+        if pointDependence is None or not hasattr(self.DVGeo, "getJacobianSparsity"):
+            return
+
+        ptSetName, dCondPt = pointDependence
+        dPtdDV = self.DVGeo.getJacobianSparsity(ptSetName, config=config)
+        if dPtdDV is None:
+            return
+
+        self.jacSparsity = {}
+        for dvName, pattern in dPtdDV.items():
+            # all entries are positive so there is no cancellation in the product
+            J = (dCondPt @ pattern).tocoo()
+            if J.nnz > 0:
+                self.jacSparsity[dvName] = (J.row, J.col, list(J.shape))
+
+    def getSparseSens(self, sens):
+        """
+        Convert the dict of dense sensitivities of the constraints to
+        pyOptSparse ``{"coo": ...}`` blocks with the entries given by
+        :meth:`setJacobianSparsity`.
+
+        Parameters
+        ----------
+        sens : dict
+            Dictionary of the dense sensitivities for each DV
+
+        Returns
+        -------
+        sparseSens : dict
+            Dictionary of the sparse sensitivities for each DV
+        """
+        sparseSens = {}
+        for dvName, (rows, cols, shape) in self.jacSparsity.items():
+            sparseSens[dvName] = {"coo": [rows, cols, np.asarray(sens[dvName][rows, cols]).flatten()], "shape": shape}
+        return sparseSens
+
     def addConstraintsPyOpt(self, optProb, exclude_wrt=None):
         """
         Add the constraints to pyOpt, if the flag is set
@@ -83,8 +141,17 @@ class GeometricConstraint(ABC):
                 for name in exclude_wrt:
                     wrt_names.remove(name)
 
+            # with a sparse jacobian, only the DVs the constraints depend on are added
+            jac = None
+            if self.jacSparsity is not None:
+                wrt_names = [name for name in wrt_names if name in self.jacSparsity]
+                jac = {}
+                for name in wrt_names:
+                    rows, cols, shape = self.jacSparsity[name]
+                    jac[name] = {"coo": [rows, cols, np.ones(len(rows))], "shape": shape}
+
             optProb.addConGroup(
-                self.name, self.nCon, lower=self.lower, upper=self.upper, scale=self.scale, wrt=wrt_names
+                self.name, self.nCon, lower=self.lower, upper=self.upper, scale=self.scale, wrt=wrt_names, jac=jac
             )
 
     @abstractmethod
@@ -155,13 +222,18 @@ class LinearConstraint:
         """
         funcsSens[self.name] = self.jac
 
-    def addConstraintsPyOpt(self, optProb):
+    def addConstraintsPyOpt(self, optProb, sparseJacobian=False):
         """
         Add the constraints to pyOpt. These constraints are added as
-        linear constraints.
+        linear constraints. If sparseJacobian is True, the jacobians
+        are passed as ``{"coo": ...}`` blocks.
         """
         if self.ncon > 0:
             for key in self.jac:
+                jac = self.jac[key]
+                if sparseJacobian:
+                    jac = sparse.coo_matrix(jac)
+                    jac = {"coo": [jac.row, jac.col, jac.data], "shape": list(jac.shape)}
                 optProb.addConGroup(
                     self.name + "_" + key,
                     self.jac[key].shape[0],
@@ -170,7 +242,7 @@ class LinearConstraint:
                     scale=1.0,
                     linear=True,
                     wrt=key,
-                    jac={key: self.jac[key]},
+                    jac={key: jac},
                 )
 
     def _finalize(self):
@@ -346,13 +418,18 @@ class GlobalLinearConstraint:
         """
         funcsSens[self.name] = self.jac
 
-    def addConstraintsPyOpt(self, optProb):
+    def addConstraintsPyOpt(self, optProb, sparseJacobian=False):
         """
         Add the constraints to pyOpt. These constraints are added as
-        linear constraints.
+        linear constraints. If sparseJacobian is True, the jacobians
+        are passed as ``{"coo": ...}`` blocks.
         """
         if self.ncon > 0:
             for key in self.jac:
+                jac = self.jac[key]
+                if sparseJacobian:
+                    jac = sparse.coo_matrix(jac)
+                    jac = {"coo": [jac.row, jac.col, jac.data], "shape": list(jac.shape)}
                 optProb.addConGroup(
                     self.name + "_" + key,
                     self.jac[key].shape[0],
@@ -361,7 +438,7 @@ class GlobalLinearConstraint:
                     scale=1.0,
                     linear=True,
                     wrt=key,
-                    jac={key: self.jac[key]},
+                    jac={key: jac},
                 )
 
     def setMonotonic(self, options):
@@ -389,3 +466,336 @@ class GlobalLinearConstraint:
                 jacobian[i, start + i + 1] = -1.0 * slope
             self.jac[self.key] = jacobian
             self.ncon += ncon
+
+
+class PointSetPool:
+    """
+    This class merges the point sets of the geometric constraints that
+    use the same DVGeometry object. The constraints use this object in
+    place of the DVGeometry object. Instead of one point set per
+    constraint, DVGeo only embeds, updates and differentiates the merged
+    point sets. Points that are shared between constraints, such as the
+    vertices of a triangulated surface, are only embedded once. All the
+    other attributes are taken from the DVGeometry object.
+
+    The constraints add their sensitivities with :meth:`addSensitivitySeed`.
+    Between :meth:`startSensitivityBatch` and :meth:`endSensitivityBatch`,
+    the seeds for the pooled point sets are only registered. They are
+    multiplied with the jacobian of each merged point set in a single
+    product by :meth:`flushSensitivities`, which has to be called before
+    the sensitivities are read.
+
+    The points are collected until one of the pooled point sets is
+    first used. Points added after that go to a new merged point set.
+    Only FFD-based DVGeometry objects are pooled, because they embed
+    the points in the original configuration and the jacobian of the
+    points of a single constraint can be taken from the merged one. The
+    point sets are added to the other DVGeo objects directly.
+
+    Parameters
+    ----------
+    name : str
+        The prefix for the names of the merged point sets
+    DVGeo : DVGeometry object
+        The DVGeo object the constraint points are added to
+    pool : bool
+        Flag to merge the point sets
+    """
+
+    def __init__(self, name, DVGeo, pool=True):
+        self.DVGeo = DVGeo
+        self.poolName = name
+        self.pool = pool and hasattr(DVGeo, "JT")
+        self.nPools = 0
+
+        # the points that have not been added to DVGeo yet
+        self.pendingPtSets = OrderedDict()
+
+        # the merged point set name and the indices of the points in it for each pooled point set
+        self.pooledPtSets = {}
+
+        # the config and the coordinates of the last update of each merged point set
+        self.poolCoords = {}
+
+        # the DVGeo.JT that the jacobian of each merged point set was computed from, and the jacobian
+        self.poolJacs = {}
+
+        # the seeds registered in a batch, None if the seeds are evaluated right away
+        self.pendingSeeds = None
+
+    def __getattr__(self, name):
+        # this is only called for the attributes that are not set on this object
+        if name.startswith("__") or "DVGeo" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.DVGeo, name)
+
+    def addPointSet(self, points, ptName, compNames=None, **kwargs):
+        """
+        Add a point set of a constraint. Pooled point sets are only added
+        to DVGeo when they are first used.
+
+        Parameters
+        ----------
+        points : array, size (N,3)
+            The coordinates of the point set
+        ptName : str
+            The name of the point set
+        compNames : list
+            The DVGeometryMulti components of the point set
+        """
+        if not self.pool or len(kwargs) > 0:
+            self.DVGeo.addPointSet(points, ptName, compNames=compNames, **kwargs)
+        else:
+            self.pendingPtSets[ptName] = np.array(points).real.astype("d").reshape(-1, 3)
+
+    def update(self, ptSetName, config=None, **kwargs):
+        """
+        Return the updated coordinates of a point set. The merged point
+        set is only updated once after the design variables are set.
+        See :meth:`DVGeometry.update` for the parameters.
+        """
+        self._addPendingPointSets(ptSetName)
+        if ptSetName not in self.pooledPtSets:
+            return self.DVGeo.update(ptSetName, config=config, **kwargs)
+
+        poolName, indices = self.pooledPtSets[ptSetName]
+        upToDate = all(geo.pointSetUpToDate(poolName) for geo in self.DVGeo.getFlattenedChildren())
+        if not upToDate or poolName not in self.poolCoords or self.poolCoords[poolName][0] != config:
+            self.poolCoords[poolName] = (config, self.DVGeo.update(poolName, config=config))
+
+        return self.poolCoords[poolName][1][indices]
+
+    def totalSensitivity(self, dIdpt, ptSetName, config=None, **kwargs):
+        """
+        Compute the sensitivity of a function with respect to the design
+        variables from its derivatives with respect to a point set. The
+        jacobian of the merged point set is only computed once after the
+        design variables are set and the rows of this point set are taken
+        from it. The seed is always evaluated right away, see
+        :meth:`addSensitivitySeed` for the batched evaluation.
+        See :meth:`DVGeometry.totalSensitivity` for the parameters.
+        """
+        self._addPendingPointSets(ptSetName)
+        if ptSetName not in self.pooledPtSets:
+            # only the FFD-based DVGeometry objects take sparse seeds
+            if sparse.issparse(dIdpt) and not hasattr(self.DVGeo, "JT"):
+                dIdpt = dIdpt.toarray().reshape(dIdpt.shape[0], -1, 3)
+            return self.DVGeo.totalSensitivity(dIdpt, ptSetName, config=config, **kwargs)
+
+        poolName, indices = self.pooledPtSets[ptSetName]
+
+        # Make dIdpt at least 3D
+        if not sparse.issparse(dIdpt) and len(dIdpt.shape) == 2:
+            dIdpt = np.array([dIdpt])
+        N = dIdpt.shape[0]
+        cols = (3 * indices[:, None] + np.arange(3)).flatten()
+
+        J = self._getPoolJacobian(poolName, config)
+        if J is None:
+            dIdx = np.zeros((N, self.DVGeo._getNDV()))
+        elif sparse.issparse(dIdpt):
+            dIdx = (sparse.csr_matrix(dIdpt) @ J[cols]).toarray()
+        else:
+            dIdx = J[cols].T.dot(dIdpt.reshape(N, -1).T).T
+
+        if self.DVGeo.useComposite:
+            dIdx = self.DVGeo.mapSensToComp(dIdx)
+
+        return self.DVGeo.convertSensitivityToDict(dIdx, useCompositeNames=True)
+
+    def addSensitivitySeed(self, dIdpt, ptSetName, sens, config=None):
+        """
+        Add the sensitivity of a function with respect to the design
+        variables to the dict sens, from its derivatives with respect to
+        a point set. The sensitivities of several seeds added to the same
+        dict are summed. In a batch, the seeds for the pooled point sets
+        are only registered and sens is filled by :meth:`flushSensitivities`.
+
+        Parameters
+        ----------
+        dIdpt : array or sparse matrix
+            The derivatives of the function with respect to the points,
+            see :meth:`DVGeometry.totalSensitivity`
+        ptSetName : str
+            The name of the point set
+        sens : dict
+            Dictionary of the sensitivity for each DV to add to
+        config : str or list
+            The configuration to use
+        """
+        self._addPendingPointSets(ptSetName)
+        if self.pendingSeeds is None or ptSetName not in self.pooledPtSets:
+            self._addSensitivity(sens, self.totalSensitivity(dIdpt, ptSetName, config=config))
+            return
+
+        poolName, indices = self.pooledPtSets[ptSetName]
+        if not sparse.issparse(dIdpt) and len(dIdpt.shape) == 2:
+            dIdpt = np.array([dIdpt])
+        N = dIdpt.shape[0]
+        cols = (3 * indices[:, None] + np.arange(3)).flatten()
+
+        # Store the seed as the entries of its block of rows in the stacked seed matrix
+        if sparse.issparse(dIdpt):
+            seed = sparse.coo_matrix(dIdpt)
+            seed = (seed.row, cols[seed.col], seed.data)
+        else:
+            seed = dIdpt.reshape(N, -1)
+            rows, iCols = np.nonzero(seed)
+            seed = (rows, cols[iCols], seed[rows, iCols])
+        self.pendingSeeds.append((poolName, config, N, seed, sens))
+
+    def getJacobianSparsity(self, ptSetName, config=None):
+        """
+        Return the DVs each point of a point set depends on, as a dict of
+        sparse (nPts x nVal) matrices with ones at the nonzero entries.
+        The local DVs are taken from the nonzero entries of the jacobian,
+        which only change with the FFD embedding. A point depends on a DV
+        if any of its coordinates does, so that the sparsity does not
+        depend on the values at this design. The global DVs are dense.
+        None is returned if the DVGeo object is not FFD-based or uses
+        composite DVs.
+
+        Parameters
+        ----------
+        ptSetName : str
+            The name of the point set
+        config : str or list
+            The configuration to use
+
+        Returns
+        -------
+        sparsity : dict
+            Dictionary of the sparsity for each DV
+        """
+        self._addPendingPointSets(ptSetName)
+        if not hasattr(self.DVGeo, "JT") or self.DVGeo.useComposite:
+            return None
+
+        if ptSetName in self.pooledPtSets:
+            poolName, indices = self.pooledPtSets[ptSetName]
+            J = self._getPoolJacobian(poolName, config)
+            nPts = len(indices)
+            if J is not None:
+                J = J[(3 * indices[:, None] + np.arange(3)).flatten()]
+        else:
+            self.DVGeo.computeTotalJacobian(ptSetName, config=config)
+            JT = self.DVGeo.JT[ptSetName]
+            nPts = len(self.DVGeo.points[ptSetName])
+            J = None if JT is None else JT.T.tocsr()
+
+        nDV = self.DVGeo.getNDV()
+        if J is None:
+            pattern = sparse.csc_matrix((nPts, nDV))
+        else:
+            J = J.tocoo()
+            pattern = sparse.csc_matrix((np.ones(J.nnz), (J.row // 3, J.col)), shape=(nPts, nDV))
+            pattern.data[:] = 1.0
+        sparsity = {dvName: sparse.csr_matrix(P) for dvName, P in self.DVGeo.convertSensitivityToDict(pattern).items()}
+
+        for geo in self.DVGeo.getFlattenedChildren():
+            for dvName in geo.DV_listGlobal:
+                if dvName in sparsity:
+                    sparsity[dvName] = sparse.csr_matrix(np.ones(sparsity[dvName].shape))
+
+        return sparsity
+
+    def startSensitivityBatch(self):
+        """
+        Start registering the seeds of the pooled point sets in
+        :meth:`addSensitivitySeed` instead of evaluating them.
+        """
+        if self.pendingSeeds is None:
+            self.pendingSeeds = []
+
+    def endSensitivityBatch(self):
+        """
+        Evaluate the registered seeds and go back to evaluating the seeds
+        right away.
+        """
+        self.flushSensitivities()
+        self.pendingSeeds = None
+
+    def flushSensitivities(self):
+        """
+        Evaluate the seeds registered so far. The seeds of each merged
+        point set are stacked into one sparse matrix, which is multiplied
+        with the jacobian of the merged point set at once. The rows of
+        the product are then added to the dicts given to
+        :meth:`addSensitivitySeed`.
+        """
+        if not self.pendingSeeds:
+            return
+
+        # Group the seeds by merged point set and config
+        groups = []
+        for poolName, config, N, seed, sens in self.pendingSeeds:
+            for group in groups:
+                if group[0] == poolName and group[1] == config:
+                    group[2].append((N, seed, sens))
+                    break
+            else:
+                groups.append((poolName, config, [(N, seed, sens)]))
+        self.pendingSeeds = []
+
+        for poolName, config, seeds in groups:
+            offsets = np.cumsum([0] + [N for N, _, _ in seeds])
+            J = self._getPoolJacobian(poolName, config)
+            if J is None:
+                dIdx = np.zeros((offsets[-1], self.DVGeo._getNDV()))
+            else:
+                rows = np.concatenate([seed[0] + offset for (_, seed, _), offset in zip(seeds, offsets)])
+                cols = np.concatenate([seed[1] for _, seed, _ in seeds])
+                data = np.concatenate([seed[2] for _, seed, _ in seeds])
+                # duplicate entries, from points shared within a point set, are summed
+                S = sparse.csr_matrix((data, (rows, cols)), shape=(offsets[-1], J.shape[0]))
+                dIdx = (S @ J).toarray()
+
+            if self.DVGeo.useComposite:
+                dIdx = self.DVGeo.mapSensToComp(dIdx)
+
+            dIdxDict = self.DVGeo.convertSensitivityToDict(dIdx, useCompositeNames=True)
+            for (N, _, sens), offset in zip(seeds, offsets):
+                self._addSensitivity(sens, {key: value[offset : offset + N] for key, value in dIdxDict.items()})
+
+    @staticmethod
+    def _addSensitivity(sens, dIdx):
+        """
+        Add the sensitivity dict dIdx to sens
+        """
+        for key, value in dIdx.items():
+            sens[key] = sens[key] + value if key in sens else value
+
+    def _getPoolJacobian(self, poolName, config):
+        """
+        Return the jacobian of a merged point set, with the rows of the
+        point coordinates. It is only transposed again if DVGeo has
+        recomputed it.
+        """
+        self.DVGeo.computeTotalJacobian(poolName, config=config)
+        JT = self.DVGeo.JT[poolName]
+        if poolName not in self.poolJacs or self.poolJacs[poolName][0] is not JT:
+            self.poolJacs[poolName] = (JT, None if JT is None else JT.T.tocsr())
+        return self.poolJacs[poolName][1]
+
+    def _addPendingPointSets(self, ptSetName):
+        """
+        Add the pending points to DVGeo as one merged point set, if the
+        given point set is one of them.
+        """
+        if ptSetName not in self.pendingPtSets:
+            return
+
+        poolName = f"{self.poolName}_{self.nPools}"
+        self.nPools += 1
+
+        # the points that are shared between the point sets are only added once
+        points, inverse = np.unique(np.vstack(list(self.pendingPtSets.values())), axis=0, return_inverse=True)
+        inverse = inverse.flatten()
+
+        offset = 0
+        for ptName, pts in self.pendingPtSets.items():
+            self.pooledPtSets[ptName] = (poolName, inverse[offset : offset + len(pts)])
+            offset += len(pts)
+
+        self.DVGeo.addPointSet(points, poolName)
+        self.pendingPtSets = OrderedDict()
@@ -1,5 +1,6 @@
 # External modules
 import numpy as np
+from scipy import sparse
 
 # Local modules
 from .baseConstraint import GeometricConstraint
@@ -39,7 +40,7 @@ class CircularityConstraint(GeometricConstraint):
         self.coords = self.DVGeo.update(self.name + "coords", config=config)
         self.center = self.DVGeo.update(self.name + "center", config=config)
 
-        self._computeLengths(self.center, self.coords, self.X)
+        self.X = self._computeLengths(self.center, self.coords)
 
         funcs[self.name] = self.X
 
@@ -56,58 +57,51 @@ class CircularityConstraint(GeometricConstraint):
 
         nDV = self.DVGeo.getNDV()
         if nDV > 0:
-            dLndPt = np.zeros((self.nCon, self.coords.shape[0], self.coords.shape[1]))
-            dLndCn = np.zeros((self.nCon, self.center.shape[0], self.center.shape[1]))
-
-            xb = np.zeros(self.nCon)
-            for con in range(self.nCon):
-                centerb = dLndCn[con, 0, :]
-                coordsb = dLndPt[con, :, :]
-                xb[:] = 0.0
-                xb[con] = 1.0
-                # reflength2 = 0
-                # for i in range(3):
-                #     reflength2 = reflength2 + (center[i]-coords[0,i])**2
-                reflength2 = np.sum((self.center - self.coords[0, :]) ** 2)
-                reflength2b = 0.0
-                for i in range(self.nCon):
-                    # length2 = 0
-                    # for j in range(3):
-                    #     length2 = length2 + (center[j]-coords[i+1, j])**2
-                    length2 = np.sum((self.center - self.coords[i + 1, :]) ** 2)
-
-                    if length2 / reflength2 == 0.0:
-                        tempb1 = 0.0
-                    else:
-                        tempb1 = xb[i] / (2.0 * np.sqrt(length2 / reflength2) * reflength2)
-                    length2b = tempb1
-                    reflength2b = reflength2b - length2 * tempb1 / reflength2
-                    xb[i] = 0.0
-                    for j in reversed(range(3)):
-                        tempb0 = 2 * (self.center[0, j] - self.coords[i + 1, j]) * length2b
-                        centerb[j] = centerb[j] + tempb0
-                        coordsb[i + 1, j] = coordsb[i + 1, j] - tempb0
-                for j in reversed(range(3)):  # DO i=3,1,-1
-                    tempb = 2 * (self.center[0, j] - self.coords[0, j]) * reflength2b
-                    centerb[j] = centerb[j] + tempb
-                    coordsb[0, j] = coordsb[0, j] - tempb
-
-            tmpPt = self.DVGeo.totalSensitivity(dLndPt, self.name + "coords", config=config)
-            tmpCn = self.DVGeo.totalSensitivity(dLndCn, self.name + "center", config=config)
-            tmpTotal = {}
-            for key in tmpPt:
-                tmpTotal[key] = tmpPt[key] + tmpCn[key]
-
-            funcsSens[self.name] = tmpTotal
-
-    def _computeLengths(self, center, coords, X):
+            dLndPt, dLndCn = self._computeLengthsSens(self.center, self.coords)
+
+            funcsSens[self.name] = {}
+            self.DVGeo.addSensitivitySeed(dLndPt, self.name + "coords", funcsSens[self.name], config=config)
+            self.DVGeo.addSensitivitySeed(dLndCn, self.name + "center", funcsSens[self.name], config=config)
+
+    def _computeLengths(self, center, coords):
+        """
+        compute the lengths from the center and coordinates, relative to
+        the length to the first point
+        """
+        reflength2 = np.sum((center[0] - coords[0]) ** 2)
+        length2 = np.sum((center - coords[1:]) ** 2, axis=1)
+        return np.sqrt(length2 / reflength2)
+
+    def _computeLengthsSens(self, center, coords):
         """
-        compute the lengths from the center and coordinates
+        compute the derivatives of the relative lengths with respect to
+        the coordinates, as a sparse matrix of size nCon x (3 * nPts),
+        and with respect to the center, as an array of size (nCon, 1, 3)
         """
-        reflength2 = np.sum((center - coords[0, :]) ** 2)
-        for i in range(self.nCon):
-            length2 = np.sum((self.center - self.coords[i + 1, :]) ** 2)
-            X[i] = np.sqrt(length2 / reflength2)
+        d = center - coords
+        reflength2 = np.sum(d[0] ** 2)
+        length2 = np.sum(d[1:] ** 2, axis=1)
+        X = np.sqrt(length2 / reflength2)
+
+        # derivatives of the lengths with respect to the squared lengths
+        length2b = np.divide(1.0, 2.0 * X * reflength2, out=np.zeros_like(X), where=X != 0.0)[:, None]
+        reflength2b = -length2[:, None] * length2b / reflength2
+
+        # each length depends on the center, the first point and its own point
+        dLndCn = (2 * d[1:] * length2b + 2 * d[0] * reflength2b)[:, None, :]
+        cols = np.hstack(
+            [np.tile(np.arange(3), (self.nCon, 1)), 3 * np.arange(1, self.nCon + 1)[:, None] + np.arange(3)]
+        )
+        dLndPt = sparse.csr_matrix(
+            (
+                np.hstack([-2 * d[0] * reflength2b, -2 * d[1:] * length2b]).flatten(),
+                cols.flatten(),
+                np.arange(0, 6 * self.nCon + 1, 6),
+            ),
+            shape=(self.nCon, 3 * len(coords)),
+        )
+
+        return dLndPt, dLndCn
 
     def writeTecplot(self, handle):
         """
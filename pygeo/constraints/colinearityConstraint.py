@@ -127,16 +127,9 @@ class ColinearityConstraint(GeometricConstraint):
                         coordsb[i, j] = coordsb[i, j] - dirvecb[i, j]
                         dirvecb[i, j] = 0.0
 
-            tmpPt = self.DVGeo.totalSensitivity(dCdPt, self.name + "coords", config=config)
-            tmpOrigin = self.DVGeo.totalSensitivity(dCdOrigin, self.name + "origin", config=config)
-
-            tmpTotal = {}
-            for key in tmpPt:
-                tmpTotal[key] = tmpPt[key] + tmpOrigin[key]
-
-            tmpTotal[self.name + "axis"] = dCdAxis
-
-            funcsSens[self.name] = tmpTotal
+            funcsSens[self.name] = {self.name + "axis": dCdAxis}
+            self.DVGeo.addSensitivitySeed(dCdPt, self.name + "coords", funcsSens[self.name], config=config)
+            self.DVGeo.addSensitivitySeed(dCdOrigin, self.name + "origin", funcsSens[self.name], config=config)
 
     def addVariablesPyOpt(self, optProb):
         """
@@ -2,7 +2,7 @@
 from baseclasses.utils import Error
 from mpi4py import MPI
 import numpy as np
-from scipy.sparse import csr_matrix
+from scipy.sparse import csr_matrix, identity, kron
 
 # Local modules
 from .baseConstraint import GeometricConstraint
@@ -53,42 +53,32 @@ class CurvatureConstraint1D(GeometricConstraint):
         y is the coordinates of the points projected to the axis direction.
         We calculate two types of curvatures,
         mean:       meanC2 = avg(C*C)
-        aggregated: KSC2   = log(sum(KSCoeff*C*C))/KSCoeff
+        aggregated: KSC2   = log(sum(exp(KSCoeff*C*C)))/KSCoeff
         We also print out the max curvature for these samples points. You need to tweak the KSCoeff to make sure
         The max curvature should be slightly lower than the KS curvature.
 
         .. note:: we always do a square of the curvatures to make sure they are positive
         """
         # project the coordinates to the axis direction, coordsP is a scalar now
-        coordsP = np.zeros(nPts)
-        for i in range(nPts):
-            coordsP[i] = np.dot(coords[i], axis)
-
-        # init KS, mean, and max curvatures
-        KSC2 = 0.0
-        meanC2 = 0.0
-        maxC2 = -1e16
-        C = np.zeros(nPts)
+        coordsP = np.dot(coords, axis)
 
-        # calculate curvatures
+        # calculate curvatures with the second difference stencil
         # NOTE: we do not calculate the curvatures at the end points!!
         # this treatment allows us to use central FD for all points
-        for i in range(1, nPts - 1):
-            cFDC = (coordsP[i + 1] - 2 * coordsP[i] + coordsP[i - 1]) / eps / eps
-            C[i] = cFDC
-            KSC2 += np.exp(KSCoeff * C[i] * C[i])
-            meanC2 += C[i] * C[i]
-            if (C[i] * C[i]) > maxC2:
-                maxC2 = C[i] * C[i]
+        C = np.zeros(nPts)
+        C[1:-1] = (coordsP[2:] - 2 * coordsP[1:-1] + coordsP[:-2]) / eps / eps
+        C2 = C[1:-1] ** 2
+
+        # The KS function is shifted by the max curvature so that the exponentials do not overflow
+        maxC2 = np.max(C2)
+        KSC2 = maxC2 + np.log(np.sum(np.exp(KSCoeff * (C2 - maxC2)))) / KSCoeff
+        meanC2 = np.mean(C2)
 
         # Assign the values for the end points for visualization purpose. The curvature at the end points
         # are not used in the computation!!
         C[0] = C[1]
         C[nPts - 1] = C[nPts - 2]
 
-        KSC2 = np.log(KSC2) / KSCoeff
-        meanC2 = meanC2 / (nPts - 2)
-
         return C, KSC2, meanC2, maxC2
 
     def evalFunctions(self, funcs, config):
@@ -138,72 +128,29 @@ class CurvatureConstraint1D(GeometricConstraint):
         # we need to hand derive the derivatives of the curvature with respect to the projected points
         nDV = self.DVGeo.getNDV()
         if nDV > 0:
-            dC2dPt = np.zeros((self.coords.shape[0], self.coords.shape[1]))
+            # derivatives with respect to the curvatures of the interior points
+            C = self.C[1:-1]
             if self.curvatureType == "mean":
-                tmp = 2 / (self.nPts - 2) / self.eps / self.eps
-                for i in range(self.nPts):
-                    for j in range(3):
-                        if i == 0:
-                            dC2dPt[i][j] = self.axis[j] * tmp * (self.C[i + 1])
-                        elif i == 1:
-                            dC2dPt[i][j] = self.axis[j] * tmp * (-2 * self.C[i] + self.C[i + 1])
-                        elif i == self.nPts - 1:
-                            dC2dPt[i][j] = self.axis[j] * tmp * (self.C[i - 1])
-                        elif i == self.nPts - 2:
-                            dC2dPt[i][j] = self.axis[j] * tmp * (-2 * self.C[i] + self.C[i - 1])
-                        else:
-                            dC2dPt[i][j] = self.axis[j] * tmp * (self.C[i + 1] - 2 * self.C[i] + self.C[i - 1])
+                Cb = 2 * C / (self.nPts - 2)
+                if self.scaled:
+                    Cb /= self.meanC2Ref + 1e-16
             elif self.curvatureType == "aggregated":
-                eSum = 0.0
-                for i in range(1, self.nPts - 1):
-                    eSum += np.exp(self.KSCoeff * self.C[i] * self.C[i])
-                tmp = 2 / eSum / self.eps / self.eps
-                for i in range(self.nPts):
-                    for j in range(3):
-                        if i == 0:
-                            dC2dPt[i][j] = (
-                                self.axis[j]
-                                * tmp
-                                * (self.C[i + 1] * np.exp(self.KSCoeff * self.C[i + 1] * self.C[i + 1]))
-                            )
-                        elif i == 1:
-                            dC2dPt[i][j] = (
-                                self.axis[j]
-                                * tmp
-                                * (
-                                    -2 * self.C[i] * np.exp(self.KSCoeff * self.C[i] * self.C[i])
-                                    + self.C[i + 1] * np.exp(self.KSCoeff * self.C[i + 1] * self.C[i + 1])
-                                )
-                            )
-                        elif i == self.nPts - 1:
-                            dC2dPt[i][j] = (
-                                self.axis[j]
-                                * tmp
-                                * (self.C[i - 1] * np.exp(self.KSCoeff * self.C[i - 1] * self.C[i - 1]))
-                            )
-                        elif i == self.nPts - 2:
-                            dC2dPt[i][j] = (
-                                self.axis[j]
-                                * tmp
-                                * (
-                                    -2 * self.C[i] * np.exp(self.KSCoeff * self.C[i] * self.C[i])
-                                    + self.C[i - 1] * np.exp(self.KSCoeff * self.C[i - 1] * self.C[i - 1])
-                                )
-                            )
-                        else:
-                            dC2dPt[i][j] = (
-                                self.axis[j]
-                                * tmp
-                                * (
-                                    self.C[i + 1] * np.exp(self.KSCoeff * self.C[i + 1] * self.C[i + 1])
-                                    - 2 * self.C[i] * np.exp(self.KSCoeff * self.C[i] * self.C[i])
-                                    + self.C[i - 1] * np.exp(self.KSCoeff * self.C[i - 1] * self.C[i - 1])
-                                )
-                            )
+                w = np.exp(self.KSCoeff * (C**2 - np.max(C**2)))
+                Cb = 2 * C * w / np.sum(w)
+                if self.scaled:
+                    Cb /= self.KSC2Ref + 1e-16
             else:
                 raise Error("curvatureType=%s not supported! Options are: mean or aggregated" % self.curvatureType)
 
-            funcsSens[self.name] = self.DVGeo.totalSensitivity(dC2dPt, self.name, config=config)
+            # reverse through the second difference stencil and the projection to the axis
+            coordsPb = np.zeros(self.nPts)
+            coordsPb[2:] += Cb
+            coordsPb[1:-1] -= 2 * Cb
+            coordsPb[:-2] += Cb
+            dC2dPt = np.outer(coordsPb / self.eps / self.eps, self.axis)
+
+            funcsSens[self.name] = {}
+            self.DVGeo.addSensitivitySeed(dC2dPt, self.name, funcsSens[self.name], config=config)
 
     def writeTecplot(self, handle):
         """
@@ -270,6 +217,27 @@ class CurvatureConstraint(GeometricConstraint):
             # A list of the coordinates arrays for each surface, in the shape that DVGeo expects (N_nodes,3)
             self.coords += [np.reshape(self.X[iSurf], (surfs[iSurf].X.shape[0] * surfs[iSurf].X.shape[1], 3))]
 
+        # The difference operators and the integration weights only depend on
+        # the structure of each surface, so they are assembled once here
+        self.diffOps = []
+        self.diffOpsT = []
+        self.wt = []
+        for iSurf in range(self.nSurfs):
+            nu, nv = self.node_map[iSurf].shape
+            ops = {wrt: self.buildDiffOperator(nu, nv, wrt) for wrt in ["u", "v"]}
+            self.diffOps += [ops]
+            self.diffOpsT += [{wrt: ops[wrt].T.tocsr() for wrt in ops}]
+            # Assign integration weights for each point
+            # 1   for center nodes
+            # 1/2 for edge nodes
+            # 1/4 for corner nodes
+            wt = np.ones(self.node_map[iSurf].size)
+            wt[self.node_map[iSurf][0, :]] *= 0.5
+            wt[self.node_map[iSurf][-1, :]] *= 0.5
+            wt[self.node_map[iSurf][:, 0]] *= 0.5
+            wt[self.node_map[iSurf][:, -1]] *= 0.5
+            self.wt += [wt]
+
         self.curvatureType = curvatureType
         self.scaled = scaled
         self.KSCoeff = KSCoeff
@@ -325,86 +293,38 @@ class CurvatureConstraint(GeometricConstraint):
         nDV = self.DVGeo.getNDV()
         if nDV > 0:
             # Add the sensitivity of the curvature integral over all surfaces
+            funcsSens[self.name] = {}
             for iSurf in range(self.nSurfs):
                 DkSDX = self.evalCurvAreaSens(iSurf)
                 if self.scaled:
                     DkSDX /= self.curvatureRef
                 # Reshape the Xpt sensitivity to the shape DVGeo is expecting
                 DkSDpt = np.reshape(DkSDX, self.coords[iSurf].shape)
-                if iSurf == 0:
-                    funcsSens[self.name] = self.DVGeo.totalSensitivity(
-                        DkSDpt, self.name + "%d" % (iSurf), config=config
-                    )
-                else:
-                    tmp = self.DVGeo.totalSensitivity(DkSDpt, self.name + "%d" % (iSurf), config=config)
-                    for key in funcsSens[self.name]:
-                        funcsSens[self.name][key] += tmp[key]
+                self.DVGeo.addSensitivitySeed(DkSDpt, self.name + "%d" % (iSurf), funcsSens[self.name], config=config)
 
     def evalCurvArea(self, iSurf):
         """
         Evaluate the integral K**2 over the surface area of the wing.
         Where K is the Gaussian curvature.
         """
-        # Evaluate the derivative of the position vector of every point on the
-        # surface wrt to the parameteric corrdinate u and v
-        t_u = self.evalDiff(iSurf, self.X[iSurf], "u")
-        t_v = self.evalDiff(iSurf, self.X[iSurf], "v")
-        # Compute the normal vector by taking the cross product of t_u and t_v
-        n = self.evalCross(iSurf, t_u, t_v)
-        # Compute the norm of tu_ x tv
-        n_norm = self.evalNorm(iSurf, n)
-        # Normalize the normal vector
-        n_hat = np.zeros_like(n)
-        n_hat[self.X_map[iSurf][:, :, 0]] = n[self.X_map[iSurf][:, :, 0]] / n_norm[self.node_map[iSurf][:, :]]
-        n_hat[self.X_map[iSurf][:, :, 1]] = n[self.X_map[iSurf][:, :, 1]] / n_norm[self.node_map[iSurf][:, :]]
-        n_hat[self.X_map[iSurf][:, :, 2]] = n[self.X_map[iSurf][:, :, 2]] / n_norm[self.node_map[iSurf][:, :]]
-        # Evaluate the second derivatives of the position vector wrt u and v
-        t_uu = self.evalDiff(iSurf, t_u, "u")
-        t_vv = self.evalDiff(iSurf, t_v, "v")
-        t_uv = self.evalDiff(iSurf, t_v, "u")
-        # Compute the components of the first fundamental form of a parameteric
-        # surface
-        E = self.evalInProd(iSurf, t_u, t_u)
-        F = self.evalInProd(iSurf, t_v, t_u)
-        G = self.evalInProd(iSurf, t_v, t_v)
-        # Compute the components of the second fundamental form of a parameteric
-        # surface
-        L = self.evalInProd(iSurf, t_uu, n_hat)
-        M = self.evalInProd(iSurf, t_uv, n_hat)
-        N = self.evalInProd(iSurf, t_vv, n_hat)
-        # Compute Gaussian and mean curvature (K and H)
-        K = (L * N - M * M) / (E * G - F * F)
-        H = (E * N - 2 * F * M + G * L) / (2 * (E * G - F * F))
-        # Compute the combined curvature (C)
-        C = 4.0 * H * H - 2.0 * K
-        # Assign integration weights for each point
-        # 1   for center nodes
-        # 1/2 for edge nodes
-        # 1/4 for corner nodes
-        wt = np.zeros_like(n_norm) + 1
-        wt[self.node_map[iSurf][0, :]] *= 0.5
-        wt[self.node_map[iSurf][-1, :]] *= 0.5
-        wt[self.node_map[iSurf][:, 0]] *= 0.5
-        wt[self.node_map[iSurf][:, -1]] *= 0.5
-        # Compute discrete area associated with each node
-        dS = wt * n_norm
-        one = np.ones(self.node_map[iSurf].size)
+        c = self.evalCurvatureFields(iSurf)
+        K, H, C, dS = c["K"], c["H"], c["C"], c["dS"]
 
         if self.curvatureType == "Gaussian":
             # Now compute integral (K**2) over S, equivalent to sum(K**2*dS)
-            kS = np.dot(one, K * K * dS)
+            kS = np.sum(K * K * dS)
             return [kS, K, H, C]
         elif self.curvatureType == "mean":
             # Now compute integral (H**2) over S, equivalent to sum(H**2*dS)
-            hS = np.dot(one, H * H * dS)
+            hS = np.sum(H * H * dS)
             return [hS, K, H, C]
         elif self.curvatureType == "combined":
             # Now compute integral C over S, equivalent to sum(C*dS)
-            cS = np.dot(one, C * dS)
+            cS = np.sum(C * dS)
             return [cS, K, H, C]
         elif self.curvatureType == "KSmean":
             # Now compute the KS function for mean curvature, equivalent to KS(H*H*dS)
-            sigmaH = np.dot(one, np.exp(self.KSCoeff * H * H * dS))
+            sigmaH = np.sum(np.exp(self.KSCoeff * H * H * dS))
             KSmean = np.log(sigmaH) / self.KSCoeff
             if MPI.COMM_WORLD.rank == 0:
                 print("Max curvature: ", max(H * H * dS))
@@ -419,315 +339,149 @@ class CurvatureConstraint(GeometricConstraint):
         """
         Compute sensitivity of the integral K**2 wrt the coordinate
         locations X
+
+        The derivative is computed in reverse mode: the seed on the
+        nodal curvatures is propagated back through the fundamental
+        forms and the normal vector with element-wise operations, and
+        only the cached difference operators are applied as sparse
+        transposed products.
+        """
+        c = self.evalCurvatureFields(iSurf)
+        t_u, t_v, t_uu, t_vv, t_uv = c["t_u"], c["t_v"], c["t_uu"], c["t_vv"], c["t_uv"]
+        n, n_norm, n_hat = c["n"], c["n_norm"], c["n_hat"]
+        E, F, G, L, M, N = c["E"], c["F"], c["G"], c["L"], c["M"], c["N"]
+        K, H, dS = c["K"], c["H"], c["dS"]
+        wt = self.wt[iSurf]
+
+        # Seeds of the integrand wrt the nodal K, H and dS
+        if self.curvatureType == "Gaussian":
+            # kS = sum(K**2*dS)
+            Kb = 2 * K * dS
+            Hb = np.zeros_like(H)
+            dSb = K * K
+        elif self.curvatureType == "mean":
+            # hS = sum(H**2*dS)
+            Kb = np.zeros_like(K)
+            Hb = 2 * H * dS
+            dSb = H * H
+        elif self.curvatureType == "combined":
+            # cS = sum((4*H*H-2*K)*dS)
+            Kb = -2 * dS
+            Hb = 8 * H * dS
+            dSb = 4 * H * H - 2 * K
+        elif self.curvatureType == "KSmean":
+            # KS(H*H*dS), each term weighted by its share of the KS sum
+            expH = np.exp(self.KSCoeff * H * H * dS)
+            w = expH / np.sum(expH)
+            Kb = np.zeros_like(K)
+            Hb = 2 * H * dS * w
+            dSb = H * H * w
+        else:
+            raise Error(
+                "The curvatureType parameter should be Gaussian, mean, or combined, "
+                "%s is not supported!" % self.curvatureType
+            )
+
+        # K = (L*N - M*M) / (E*G - F*F)
+        # H = (E*N - 2*F*M + G*L) / (2*(E*G - F*F))
+        den = E * G - F * F
+        Kden = K / den
+        Hden = H / den
+        Eb = -Kb * Kden * G + Hb * (N / (2 * den) - Hden * G)
+        Fb = 2 * Kb * Kden * F + Hb * (-M / den + 2 * Hden * F)
+        Gb = -Kb * Kden * E + Hb * (L / (2 * den) - Hden * E)
+        Lb = Kb * N / den + Hb * G / (2 * den)
+        Mb = -2 * Kb * M / den - Hb * F / den
+        Nb = Kb * L / den + Hb * E / (2 * den)
+
+        # First fundamental form: E = t_u.t_u, F = t_v.t_u, G = t_v.t_v
+        t_ub = 2 * Eb[:, None] * t_u + Fb[:, None] * t_v
+        t_vb = 2 * Gb[:, None] * t_v + Fb[:, None] * t_u
+
+        # Second fundamental form: L = t_uu.n_hat, M = t_uv.n_hat, N = t_vv.n_hat
+        t_uub = Lb[:, None] * n_hat
+        t_uvb = Mb[:, None] * n_hat
+        t_vvb = Nb[:, None] * n_hat
+        n_hatb = Lb[:, None] * t_uu + Mb[:, None] * t_uv + Nb[:, None] * t_vv
+
+        # n_hat = n / |n| and dS = wt * |n|
+        n_normb = wt * dSb - np.sum(n_hatb * n, axis=1) / n_norm**2
+        nb = n_hatb / n_norm[:, None] + n_normb[:, None] * n_hat
+
+        # n = t_u x t_v
+        t_ub += np.cross(t_v, nb)
+        t_vb += np.cross(nb, t_u)
+
+        # Second derivatives: t_uu = Du t_u, t_vv = Dv t_v, t_uv = Du t_v
+        DuT = self.diffOpsT[iSurf]["u"]
+        DvT = self.diffOpsT[iSurf]["v"]
+        t_ub = t_ub.flatten() + DuT.dot(t_uub.flatten())
+        t_vb = t_vb.flatten() + DvT.dot(t_vvb.flatten()) + DuT.dot(t_uvb.flatten())
+
+        # First derivatives: t_u = Du X, t_v = Dv X
+        return DuT.dot(t_ub) + DvT.dot(t_vb)
+
+    def evalCurvatureFields(self, iSurf):
+        """
+        Evaluate the nodal quantities the curvature integrals are built
+        from: the tangent vectors and their derivatives, the normal
+        vector, the fundamental forms, the curvatures, and the discrete
+        area associated with each node. Vector fields are returned with
+        shape (nNodes, 3).
         """
         # Evaluate the derivative of the position vector of every point on the
         # surface wrt to the parameteric corrdinate u and v
         t_u = self.evalDiff(iSurf, self.X[iSurf], "u")
-        Dt_uDX = self.evalDiffSens(iSurf, "u")
         t_v = self.evalDiff(iSurf, self.X[iSurf], "v")
-        Dt_vDX = self.evalDiffSens(iSurf, "v")
-        # Compute the normal vector by taking the cross product of t_u and t_v
-        n = self.evalCross(iSurf, t_u, t_v)
-        [DnDt_u, DnDt_v] = self.evalCrossSens(iSurf, t_u, t_v)
-        DnDX = DnDt_u.dot(Dt_uDX) + DnDt_v.dot(Dt_vDX)
-        # Compute the norm of tu_ x tv
-        n_norm = self.evalNorm(iSurf, n)
-        Dn_normDn = self.evalNormSens(iSurf, n)
-        Dn_normDX = Dn_normDn.dot(DnDX)
-        # Normalize the normal vector
-        n_hat = np.zeros_like(n)
-        n_hat[self.X_map[iSurf][:, :, 0]] = n[self.X_map[iSurf][:, :, 0]] / n_norm[self.node_map[iSurf][:, :]]
-        n_hat[self.X_map[iSurf][:, :, 1]] = n[self.X_map[iSurf][:, :, 1]] / n_norm[self.node_map[iSurf][:, :]]
-        n_hat[self.X_map[iSurf][:, :, 2]] = n[self.X_map[iSurf][:, :, 2]] / n_norm[self.node_map[iSurf][:, :]]
-
-        ii = []
-        data = []
-        for i in range(3):
-            # Dn_hat[self.X_map[iSurf][:,:,i]]/Dn[self.X_map[iSurf][:,:,i]]
-            ii += list(np.reshape(self.X_map[iSurf][:, :, i], -1))
-            data += list(np.reshape(n_norm[self.node_map[iSurf][:, :]] ** -1, -1))
-        Dn_hatDn = csr_matrix((data, [ii, ii]), shape=(self.X[iSurf].size, self.X[iSurf].size))
-
-        ii = []
-        jj = []
-        data = []
-        for i in range(3):
-            # Dn_hat[self.X_map[iSurf][:,:,i]]/Dn_norm[self.node_map[iSurf][:,:]]
-            ii += list(np.reshape(self.X_map[iSurf][:, :, i], -1))
-            jj += list(np.reshape(self.node_map[iSurf][:, :], -1))
-            data += list(np.reshape(-n[self.X_map[iSurf][:, :, i]] / (n_norm[self.node_map[iSurf][:, :]] ** 2), -1))
-        Dn_hatDn_norm = csr_matrix((data, [ii, jj]), shape=(n_hat.size, n_norm.size))
-
-        Dn_hatDX = Dn_hatDn.dot(DnDX) + Dn_hatDn_norm.dot(Dn_normDX)
         # Evaluate the second derivatives of the position vector wrt u and v
-        t_uu = self.evalDiff(iSurf, t_u, "u")
-        Dt_uuDt_u = self.evalDiffSens(iSurf, "u")
-        Dt_uuDX = Dt_uuDt_u.dot(Dt_uDX)
-
-        t_vv = self.evalDiff(iSurf, t_v, "v")
-        Dt_vvDt_v = self.evalDiffSens(iSurf, "v")
-        Dt_vvDX = Dt_vvDt_v.dot(Dt_vDX)
-
-        t_uv = self.evalDiff(iSurf, t_v, "u")
-        Dt_uvDt_v = self.evalDiffSens(iSurf, "u")
-        Dt_uvDX = Dt_uvDt_v.dot(Dt_vDX)
+        t_uu = self.evalDiff(iSurf, t_u, "u").reshape(-1, 3)
+        t_vv = self.evalDiff(iSurf, t_v, "v").reshape(-1, 3)
+        t_uv = self.evalDiff(iSurf, t_v, "u").reshape(-1, 3)
+        t_u = t_u.reshape(-1, 3)
+        t_v = t_v.reshape(-1, 3)
+        # Compute the normal vector by taking the cross product of t_u and t_v
+        n = np.cross(t_u, t_v)
+        # Compute the norm of tu_ x tv and normalize the normal vector
+        n_norm = np.sqrt(np.sum(n * n, axis=1))
+        n_hat = n / n_norm[:, None]
         # Compute the components of the first fundamental form of a parameteric
         # surface
-        E = self.evalInProd(iSurf, t_u, t_u)
-        [DEDt_u, _] = self.evalInProdSens(iSurf, t_u, t_u)
-        DEDt_u *= 2
-        DEDX = DEDt_u.dot(Dt_uDX)
-
-        F = self.evalInProd(iSurf, t_v, t_u)
-        [DFDt_v, DFDt_u] = self.evalInProdSens(iSurf, t_v, t_u)
-        DFDX = DFDt_v.dot(Dt_vDX) + DFDt_u.dot(Dt_uDX)
-
-        G = self.evalInProd(iSurf, t_v, t_v)
-        [DGDt_v, _] = self.evalInProdSens(iSurf, t_v, t_v)
-        DGDt_v *= 2
-        DGDX = DGDt_v.dot(Dt_vDX)
-
+        E = np.sum(t_u * t_u, axis=1)
+        F = np.sum(t_v * t_u, axis=1)
+        G = np.sum(t_v * t_v, axis=1)
         # Compute the components of the second fundamental form of a parameteric
         # surface
-        L = self.evalInProd(iSurf, t_uu, n_hat)
-        [DLDt_uu, DLDn_hat] = self.evalInProdSens(iSurf, t_uu, n_hat)
-        DLDX = DLDt_uu.dot(Dt_uuDX) + DLDn_hat.dot(Dn_hatDX)
-
-        M = self.evalInProd(iSurf, t_uv, n_hat)
-        [DMDt_uv, DMDn_hat] = self.evalInProdSens(iSurf, t_uv, n_hat)
-        DMDX = DMDt_uv.dot(Dt_uvDX) + DMDn_hat.dot(Dn_hatDX)
-
-        N = self.evalInProd(iSurf, t_vv, n_hat)
-        [DNDt_vv, DNDn_hat] = self.evalInProdSens(iSurf, t_vv, n_hat)
-        DNDX = DNDt_vv.dot(Dt_vvDX) + DNDn_hat.dot(Dn_hatDX)
-
+        L = np.sum(t_uu * n_hat, axis=1)
+        M = np.sum(t_uv * n_hat, axis=1)
+        N = np.sum(t_vv * n_hat, axis=1)
         # Compute Gaussian and mean curvature (K and H)
         K = (L * N - M * M) / (E * G - F * F)
-        DKDE = self.diags(-(L * N - M * M) / (E * G - F * F) ** 2 * G)
-        DKDF = self.diags((L * N - M * M) / (E * G - F * F) ** 2 * 2 * F)
-        DKDG = self.diags(-(L * N - M * M) / (E * G - F * F) ** 2 * E)
-        DKDL = self.diags(N / (E * G - F * F))
-        DKDM = self.diags(2 * M / (E * G - F * F))
-        DKDN = self.diags(L / (E * G - F * F))
-        DKDX = DKDE.dot(DEDX) + DKDF.dot(DFDX) + DKDG.dot(DGDX) + DKDL.dot(DLDX) + DKDM.dot(DMDX) + DKDN.dot(DNDX)
-
         H = (E * N - 2 * F * M + G * L) / (2 * (E * G - F * F))
-        DHDE = self.diags(N / (2 * (E * G - F * F)) - (E * N - 2 * F * M + G * L) / (2 * (E * G - F * F)) ** 2 * 2 * G)
-        DHDF = self.diags(
-            -2 * M / (2 * (E * G - F * F)) + (E * N - 2 * F * M + G * L) / (2 * (E * G - F * F)) ** 2 * 4 * F
-        )
-        DHDG = self.diags(L / (2 * (E * G - F * F)) - (E * N - 2 * F * M + G * L) / (2 * (E * G - F * F)) ** 2 * 2 * E)
-        DHDL = self.diags(G / (2 * (E * G - F * F)))
-        DHDM = self.diags(-2 * F / (2 * (E * G - F * F)))
-        DHDN = self.diags(E / (2 * (E * G - F * F)))
-        DHDX = DHDE.dot(DEDX) + DHDF.dot(DFDX) + DHDG.dot(DGDX) + DHDL.dot(DLDX) + DHDM.dot(DMDX) + DHDN.dot(DNDX)
-
-        # Assign integration weights for each point
-        # 1   for center nodes
-        # 1/2 for edge nodes
-        # 1/4 for corner nodes
-        wt = np.zeros_like(n_norm) + 1
-        wt[self.node_map[iSurf][0, :]] *= 0.5
-        wt[self.node_map[iSurf][-1, :]] *= 0.5
-        wt[self.node_map[iSurf][:, 0]] *= 0.5
-        wt[self.node_map[iSurf][:, -1]] *= 0.5
+        # Compute the combined curvature (C)
+        C = 4.0 * H * H - 2.0 * K
         # Compute discrete area associated with each node
-        dS = wt * n_norm
-        DdSDX = self.diags(wt).dot(Dn_normDX)
-
-        one = np.ones(self.node_map[iSurf].size)
-
-        if self.curvatureType == "Gaussian":
-            # Now compute integral (K**2) over S, equivalent to sum(K**2*dS)
-            # kS = np.dot(one, K * K * dS)
-            DkSDX = (self.diags(2 * K * dS).dot(DKDX) + self.diags(K * K).dot(DdSDX)).T.dot(one)
-            return DkSDX
-        elif self.curvatureType == "mean":
-            # Now compute integral (H**2) over S, equivalent to sum(H**2*dS)
-            # hS = np.dot(one, H * H * dS)
-            DhSDX = (self.diags(2 * H * dS).dot(DHDX) + self.diags(H * H).dot(DdSDX)).T.dot(one)
-            return DhSDX
-        elif self.curvatureType == "combined":
-            # Now compute dcSDX. Note: cS= sum( (4*H*H-2*K)*dS ), DcSDX = term1 - term2
-            # where term1 = sum( 8*H*DHDX*dS + 4*H*H*DdSdX ), term2 = sum( 2*DKDX*dS + 2*K*DdSdX )
-            term1 = (self.diags(8 * H * dS).dot(DHDX) + self.diags(4 * H * H).dot(DdSDX)).T.dot(one)
-            term2 = (self.diags(2 * dS).dot(DKDX) + self.diags(2 * K).dot(DdSDX)).T.dot(one)
-            DcSDX = term1 - term2
-            return DcSDX
-        elif self.curvatureType == "KSmean":
-            sigmaH = np.dot(one, np.exp(self.KSCoeff * H * H * dS))
-            DhSDX = (
-                self.diags(2 * H * dS / sigmaH * np.exp(self.KSCoeff * H * H * dS)).dot(DHDX)
-                + self.diags(H * H / sigmaH * np.exp(self.KSCoeff * H * H * dS)).dot(DdSDX)
-            ).T.dot(one)
-            return DhSDX
-        else:
-            raise Error(
-                "The curvatureType parameter should be Gaussian, mean, or combined, "
-                "%s is not supported!" % self.curvatureType
-            )
-
-    def evalCross(self, iSurf, u, v):
-        """
-        Evaluate the cross product of two vector fields on the surface
-        (n = u x v)
-        """
-        n = np.zeros_like(self.X[iSurf])
-        n[self.X_map[iSurf][:, :, 0]] = (
-            u[self.X_map[iSurf][:, :, 1]] * v[self.X_map[iSurf][:, :, 2]]
-            - u[self.X_map[iSurf][:, :, 2]] * v[self.X_map[iSurf][:, :, 1]]
-        )
-        n[self.X_map[iSurf][:, :, 1]] = (
-            -u[self.X_map[iSurf][:, :, 0]] * v[self.X_map[iSurf][:, :, 2]]
-            + u[self.X_map[iSurf][:, :, 2]] * v[self.X_map[iSurf][:, :, 0]]
-        )
-        n[self.X_map[iSurf][:, :, 2]] = (
-            u[self.X_map[iSurf][:, :, 0]] * v[self.X_map[iSurf][:, :, 1]]
-            - u[self.X_map[iSurf][:, :, 1]] * v[self.X_map[iSurf][:, :, 0]]
-        )
-        return n
-
-    def evalCrossSens(self, iSurf, u, v):
-        """
-        Evaluate sensitivity of cross product wrt to the input vectors u and v
-        (DnDu, DnDv)
-        """
-        # Compute sensitivity wrt v
-        ii = []
-        jj = []
-        data = []
-        # Dn[self.X_map[iSurf][:,:,0]]/Dv[self.X_map[iSurf][:,:,2]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 0], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 2], -1))
-        data += list(np.reshape(u[self.X_map[iSurf][:, :, 1]], -1))
-        # Dn[self.X_map[iSurf][:,:,0]]/Dv[self.X_map[iSurf][:,:,1]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 0], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 1], -1))
-        data += list(np.reshape(-u[self.X_map[iSurf][:, :, 2]], -1))
-        # Dn[self.X_map[iSurf][:,:,1]]/Dv[self.X_map[iSurf][:,:,2]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 1], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 2], -1))
-        data += list(np.reshape(-u[self.X_map[iSurf][:, :, 0]], -1))
-        # Dn[self.X_map[iSurf][:,:,1]]/Dv[self.X_map[iSurf][:,:,0]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 1], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 0], -1))
-        data += list(np.reshape(u[self.X_map[iSurf][:, :, 2]], -1))
-        # Dn[self.X_map[iSurf][:,:,2]]/Dv[self.X_map[iSurf][:,:,1]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 2], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 1], -1))
-        data += list(np.reshape(u[self.X_map[iSurf][:, :, 0]], -1))
-        # Dn[self.X_map[iSurf][:,:,2]]/Dv[self.X_map[iSurf][:,:,0]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 2], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 0], -1))
-        data += list(np.reshape(-u[self.X_map[iSurf][:, :, 1]], -1))
-
-        DnDv = csr_matrix((data, [ii, jj]), shape=(self.X[iSurf].size, self.X[iSurf].size))
-        # Now wrt v
-        ii = []
-        jj = []
-        data = []
-        # Dn[self.X_map[iSurf][:,:,0]]/Du[self.X_map[iSurf][:,:,1]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 0], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 1], -1))
-        data += list(np.reshape(v[self.X_map[iSurf][:, :, 2]], -1))
-        # Dn[self.X_map[iSurf][:,:,0]]/Du[self.X_map[iSurf][:,:,2]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 0], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 2], -1))
-        data += list(np.reshape(-v[self.X_map[iSurf][:, :, 1]], -1))
-        # Dn[self.X_map[iSurf][:,:,1]]/Du[self.X_map[iSurf][:,:,0]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 1], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 0], -1))
-        data += list(np.reshape(-v[self.X_map[iSurf][:, :, 2]], -1))
-        # Dn[self.X_map[iSurf][:,:,1]]/Du[self.X_map[iSurf][:,:,2]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 1], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 2], -1))
-        data += list(np.reshape(v[self.X_map[iSurf][:, :, 0]], -1))
-        # Dn[self.X_map[iSurf][:,:,2]]/Du[self.X_map[iSurf][:,:,0]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 2], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 0], -1))
-        data += list(np.reshape(v[self.X_map[iSurf][:, :, 1]], -1))
-        # Dn[self.X_map[iSurf][:,:,2]]/Du[self.X_map[iSurf][:,:,1]]
-        ii += list(np.reshape(self.X_map[iSurf][:, :, 2], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 1], -1))
-        data += list(np.reshape(-v[self.X_map[iSurf][:, :, 0]], -1))
-
-        DnDu = csr_matrix((data, [ii, jj]), shape=(self.X[iSurf].size, self.X[iSurf].size))
-        return [DnDu, DnDv]
-
-    def evalNorm(self, iSurf, u):
-        """
-        Evaluate the norm of vector field on the surface
-         (u o u)**1/2
-        """
-        u_norm = np.zeros(self.X[iSurf].size // 3)
-        u_norm[self.node_map[iSurf][:, :]] = np.sqrt(
-            u[self.X_map[iSurf][:, :, 0]] ** 2 + u[self.X_map[iSurf][:, :, 1]] ** 2 + u[self.X_map[iSurf][:, :, 2]] ** 2
-        )
-        return u_norm
-
-    def evalNormSens(self, iSurf, u):
-        """
-        Evaluate the sensitivity of the norm wrt input vector u
-        """
-        u_norm = np.zeros(self.X[iSurf].size // 3)
-        u_norm[self.node_map[iSurf][:, :]] = np.sqrt(
-            u[self.X_map[iSurf][:, :, 0]] ** 2 + u[self.X_map[iSurf][:, :, 1]] ** 2 + u[self.X_map[iSurf][:, :, 2]] ** 2
-        )
-        ii = []
-        jj = []
-        data = []
-        # Du_norm[self.node_map[iSurf][:,:]]Du[self.X_map[iSurf][:,:,0]]
-        ii += list(np.reshape(self.node_map[iSurf][:, :], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 0], -1))
-        data += list(np.reshape(u[self.X_map[iSurf][:, :, 0]] / u_norm[self.node_map[iSurf][:, :]], -1))
-
-        # Du_norm[self.node_map[iSurf][:,:]]Du[self.X_map[iSurf][:,:,1]]
-        ii += list(np.reshape(self.node_map[iSurf][:, :], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 1], -1))
-        data += list(np.reshape(u[self.X_map[iSurf][:, :, 1]] / u_norm[self.node_map[iSurf][:, :]], -1))
-
-        # Du_norm[self.node_map[iSurf][:,:]]Du[self.X_map[iSurf][:,:,2]]
-        ii += list(np.reshape(self.node_map[iSurf][:, :], -1))
-        jj += list(np.reshape(self.X_map[iSurf][:, :, 2], -1))
-        data += list(np.reshape(u[self.X_map[iSurf][:, :, 2]] / u_norm[self.node_map[iSurf][:, :]], -1))
-
-        Du_normDu = csr_matrix((data, [ii, jj]), shape=(u_norm.size, self.X[iSurf].size))
-        return Du_normDu
-
-    def evalInProd(self, iSurf, u, v):
-        """
-        Evaluate the inner product of two vector fields on the surface
-        (ip = u o v)
-        """
-        ip = np.zeros(self.node_map[iSurf].size)
-        for i in range(3):
-            ip[self.node_map[iSurf][:, :]] += u[self.X_map[iSurf][:, :, i]] * v[self.X_map[iSurf][:, :, i]]
-        return ip
-
-    def evalInProdSens(self, iSurf, u, v):
-        """
-        Evaluate sensitivity of inner product wrt to the input vectors u and v
-        (DipDu, DipDv)
-        """
-        ii = []
-        jj = []
-        data = []
-        for i in range(3):
-            # Dip[node_map[:,:]]/Du[self.X_map[iSurf][:,:,i]]
-            ii += list(np.reshape(self.node_map[iSurf][:, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][:, :, i], -1))
-            data += list(np.reshape(v[self.X_map[iSurf][:, :, i]], -1))
-        DipDu = csr_matrix((data, [ii, jj]), shape=(self.node_map[iSurf].size, self.X_map[iSurf].size))
-        ii = []
-        jj = []
-        data = []
-        for i in range(3):
-            # Dip[node_map[:,:]]/Dv[self.X_map[iSurf][:,:,i]]
-            ii += list(np.reshape(self.node_map[iSurf][:, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][:, :, i], -1))
-            data += list(np.reshape(u[self.X_map[iSurf][:, :, i]], -1))
-        DipDv = csr_matrix((data, [ii, jj]), shape=(self.node_map[iSurf].size, self.X_map[iSurf].size))
-        return [DipDu, DipDv]
+        dS = self.wt[iSurf] * n_norm
+
+        return {
+            "t_u": t_u,
+            "t_v": t_v,
+            "t_uu": t_uu,
+            "t_vv": t_vv,
+            "t_uv": t_uv,
+            "n": n,
+            "n_norm": n_norm,
+            "n_hat": n_hat,
+            "E": E,
+            "F": F,
+            "G": G,
+            "L": L,
+            "M": M,
+            "N": N,
+            "K": K,
+            "H": H,
+            "C": C,
+            "dS": dS,
+        }
 
     def evalDiff(self, iSurf, v, wrt):
         """
@@ -735,157 +489,36 @@ class CurvatureConstraint(GeometricConstraint):
         Second order accurate. Central difference for nodes in the center
         forward/backward difference for nodes on the edge
         """
-        v_wrt = np.zeros_like(v)
-        if wrt == "u":
-            v_wrt[self.X_map[iSurf][1:-1, :, :]] = (
-                v[self.X_map[iSurf][2:, :, :]] - v[self.X_map[iSurf][0:-2, :, :]]
-            ) / 2.0
-            v_wrt[self.X_map[iSurf][0, :, :]] = (
-                -1 * v[self.X_map[iSurf][2, :, :]]
-                + 4 * v[self.X_map[iSurf][1, :, :]]
-                - 3 * v[self.X_map[iSurf][0, :, :]]
-            ) / 2.0
-            v_wrt[self.X_map[iSurf][-1, :, :]] = (
-                -(
-                    -1 * v[self.X_map[iSurf][-3, :, :]]
-                    + 4 * v[self.X_map[iSurf][-2, :, :]]
-                    - 3 * v[self.X_map[iSurf][-1, :, :]]
-                )
-                / 2.0
-            )
-        elif wrt == "v":
-            v_wrt[self.X_map[iSurf][:, 1:-1, :]] = (
-                v[self.X_map[iSurf][:, 2:, :]] - v[self.X_map[iSurf][:, 0:-2, :]]
-            ) / 2.0
-            v_wrt[self.X_map[iSurf][:, 0, :]] = (
-                -1 * v[self.X_map[iSurf][:, 2, :]]
-                + 4 * v[self.X_map[iSurf][:, 1, :]]
-                - 3 * v[self.X_map[iSurf][:, 0, :]]
-            ) / 2.0
-            v_wrt[self.X_map[iSurf][:, -1, :]] = (
-                -(
-                    -1 * v[self.X_map[iSurf][:, -3, :]]
-                    + 4 * v[self.X_map[iSurf][:, -2, :]]
-                    - 3 * v[self.X_map[iSurf][:, -1, :]]
-                )
-                / 2.0
-            )
-        return v_wrt
+        return self.diffOps[iSurf][wrt].dot(v)
 
     def evalDiffSens(self, iSurf, wrt):
         """
         Compute sensitivity of v_wrt with respect to input vector field v
         (Dv_wrt/Dv)
         """
-        ii = []
-        jj = []
-        data = []
-        if wrt == "u":
-            # Central Difference
-
-            # Dt_u[X_map[1:-1,:,:]]/DX[X_map[2:,:,:]] = 1/2
-            ii += list(np.reshape(self.X_map[iSurf][1:-1, :, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][2:, :, :], -1))
-            data += [0.5] * len(np.reshape(self.X_map[iSurf][1:-1, :, :], -1))
-
-            # Dt_u[X_map[1:-1,:,:]]/DX[X_map[0:-2,:,:]] = -1/2
-            ii += list(np.reshape(self.X_map[iSurf][1:-1, :, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][0:-2, :, :], -1))
-            data += [-0.5] * len(np.reshape(self.X_map[iSurf][1:-1, :, :], -1))
-
-            # Forward Difference
-
-            # Dt_u[X_map[0,:,:]]/DX[X_map[2,:,:]] = -1/2
-            ii += list(np.reshape(self.X_map[iSurf][0, :, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][2, :, :], -1))
-            data += [-0.5] * len(np.reshape(self.X_map[iSurf][0, :, :], -1))
-
-            # Dt_u[X_map[0,:,:]]/DX[X_map[1,:,:]] = 4/2
-            ii += list(np.reshape(self.X_map[iSurf][0, :, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][1, :, :], -1))
-            data += [2] * len(np.reshape(self.X_map[iSurf][0, :, :], -1))
-
-            # Dt_u[X_map[0,:,:]]/DX[X_map[0,:,:]] = -3/2
-            ii += list(np.reshape(self.X_map[iSurf][0, :, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][0, :, :], -1))
-            data += [-1.5] * len(np.reshape(self.X_map[iSurf][0, :, :], -1))
-
-            # Backward Difference
-
-            # Dt_u[X_map[-1,:,:]]/DX[X_map[-3,:,:]] = 1/2
-            ii += list(np.reshape(self.X_map[iSurf][-1, :, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][-3, :, :], -1))
-            data += [0.5] * len(np.reshape(self.X_map[iSurf][-1, :, :], -1))
-
-            # Dt_u[X_map[-1,:,:]]/DX[X_map[-2,:,:]] = -4/2
-            ii += list(np.reshape(self.X_map[iSurf][-1, :, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][-2, :, :], -1))
-            data += [-2.0] * len(np.reshape(self.X_map[iSurf][-2, :, :], -1))
-
-            # Dt_u[X_map[-1,:,:]]/DX[X_map[-1,:,:]] = 3/2
-            ii += list(np.reshape(self.X_map[iSurf][-1, :, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][-1, :, :], -1))
-            data += [1.5] * len(np.reshape(self.X_map[iSurf][-1, :, :], -1))
-
-        elif wrt == "v":
-            # Central Difference
+        return self.diffOps[iSurf][wrt]
 
-            # Dt_u[X_map[:,1:-1,:]]/DX[X_map[:,2:,:]] = 1/2
-            ii += list(np.reshape(self.X_map[iSurf][:, 1:-1, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][:, 2:, :], -1))
-            data += [0.5] * len(np.reshape(self.X_map[iSurf][:, 1:-1, :], -1))
-
-            # Dt_u[X_map[:,1:-1,:]]/DX[X_map[:,0:-2,:]] = -1/2
-            ii += list(np.reshape(self.X_map[iSurf][:, 1:-1, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][:, 0:-2, :], -1))
-            data += [-0.5] * len(np.reshape(self.X_map[iSurf][:, 1:-1, :], -1))
-
-            # Forward Difference
-
-            # Dt_u[X_map[:,0,:]]/DX[X_map[:,2,:]] = -1/2
-            ii += list(np.reshape(self.X_map[iSurf][:, 0, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][:, 2, :], -1))
-            data += [-0.5] * len(np.reshape(self.X_map[iSurf][:, 0, :], -1))
-
-            # Dt_u[X_map[:,0,:]]/DX[X_map[:,1,:]] = 4/2
-            ii += list(np.reshape(self.X_map[iSurf][:, 0, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][:, 1, :], -1))
-            data += [2] * len(np.reshape(self.X_map[iSurf][:, 0, :], -1))
-
-            # Dt_u[X_map[:,0,:]]/DX[X_map[:,0,:]] = -3/2
-            ii += list(np.reshape(self.X_map[iSurf][:, 0, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][:, 0, :], -1))
-            data += [-1.5] * len(np.reshape(self.X_map[iSurf][:, 0, :], -1))
-
-            # Backward Difference
-
-            # Dt_u[X_map[:,-1,:]]/DX[X_map[:,-3,:]] = 1/2
-            ii += list(np.reshape(self.X_map[iSurf][:, -1, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][:, -3, :], -1))
-            data += [0.5] * len(np.reshape(self.X_map[iSurf][:, -1, :], -1))
-
-            # Dt_u[X_map[:,-1,:]]/DX[X_map[:,-2,:]] = -4/2
-            ii += list(np.reshape(self.X_map[iSurf][:, -1, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][:, -2, :], -1))
-            data += [-2.0] * len(np.reshape(self.X_map[iSurf][:, -2, :], -1))
-
-            # Dt_u[X_map[:,-1,:]]/DX[X_map[:,-1,:]] = 3/2
-            ii += list(np.reshape(self.X_map[iSurf][:, -1, :], -1))
-            jj += list(np.reshape(self.X_map[iSurf][:, -1, :], -1))
-            data += [1.5] * len(np.reshape(self.X_map[iSurf][:, -1, :], -1))
-
-        Dv_uDX = csr_matrix((data, [ii, jj]), shape=(self.X[iSurf].size, self.X[iSurf].size))
-
-        return Dv_uDX
-
-    def diags(self, a):
+    @staticmethod
+    def buildDiffOperator(nu, nv, wrt):
         """
-        A standard vectorized sparse diagonal matrix function. Similar to the above function
-        some versions of scipy don't have this function, so this is here to prevent
-        potential import problems.
+        Assemble the CSR matrix of the finite difference used by
+        evalDiff on a (nu, nv) surface with 3 components per node,
+        ordered like the flattened coordinates X.
         """
-        ii = range(len(a))
-        return csr_matrix((a, [ii, ii]), (len(a), len(a)))
+        n = nu if wrt == "u" else nv
+        # The 1D second order operator: central differences in the
+        # interior, one-sided at the two ends
+        i = np.arange(1, n - 1)
+        rows = np.concatenate([i, i, [0, 0, 0], [n - 1, n - 1, n - 1]])
+        cols = np.concatenate([i + 1, i - 1, [2, 1, 0], [n - 3, n - 2, n - 1]])
+        data = np.concatenate([np.full(n - 2, 0.5), np.full(n - 2, -0.5), [-0.5, 2.0, -1.5], [0.5, -2.0, 1.5]])
+        D = csr_matrix((data, (rows, cols)), shape=(n, n))
+
+        # Node (i, j) component k is stored at X[3 * (i * nv + j) + k]
+        if wrt == "u":
+            return kron(D, identity(3 * nv), format="csr")
+        else:
+            return kron(identity(nu), kron(D, identity(3)), format="csr")
 
     def writeTecplot(self, handle):
         """
@@ -1,5 +1,6 @@
 # External modules
 import numpy as np
+from scipy import sparse
 
 # Local modules
 from .baseConstraint import GeometricConstraint
@@ -23,10 +24,7 @@ class LocationConstraint(GeometricConstraint):
         self.DVGeo.addPointSet(self.coords, self.name, compNames=compNames)
 
         # Now get the reference lengths
-        self.X0 = np.zeros(self.nCon)
-        X = self.coords.flatten()
-        for i in range(self.nCon):
-            self.X0[i] = X[i]
+        self.X0 = self.coords.flatten()
 
     def evalFunctions(self, funcs, config):
         """
@@ -41,8 +39,7 @@ class LocationConstraint(GeometricConstraint):
         self.coords = self.DVGeo.update(self.name, config=config)
         X = self.coords.flatten()
         if self.scaled:
-            for i in range(self.nCon):
-                X[i] /= self.X0[i]
+            X = X / self.X0
 
         funcs[self.name] = X
 
@@ -59,16 +56,24 @@ class LocationConstraint(GeometricConstraint):
 
         nDV = self.DVGeo.getNDV()
         if nDV > 0:
-            dTdPt = np.zeros((self.nCon, self.coords.shape[0], self.coords.shape[1]))
-            counter = 0
-            for i in range(self.coords.shape[0]):
-                for j in range(self.coords.shape[1]):
-                    dTdPt[counter][i][j] = 1.0
-                    if self.scaled:
-                        dTdPt[counter][i][j] /= self.X0[i]
-                    counter += 1
-
-            funcsSens[self.name] = self.DVGeo.totalSensitivity(dTdPt, self.name, config=config)
+            # each constraint is one coordinate, so the seed is a sparse diagonal matrix
+            if self.scaled:
+                dTdPt = sparse.diags(1.0 / self.X0, format="csr")
+            else:
+                dTdPt = sparse.identity(self.nCon, format="csr")
+
+            funcsSens[self.name] = {}
+            self.DVGeo.addSensitivitySeed(dTdPt, self.name, funcsSens[self.name], config=config)
+
+    def getPointDependence(self):
+        """
+        Each constraint is a coordinate of one point.
+        """
+        dCondPt = sparse.csr_matrix(
+            (np.ones(self.nCon), np.arange(self.nCon) // 3, np.arange(self.nCon + 1)),
+            shape=(self.nCon, len(self.coords)),
+        )
+        return self.name, dCondPt
 
     def writeTecplot(self, handle):
         """
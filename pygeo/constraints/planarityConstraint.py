@@ -147,16 +147,11 @@ class PlanarityConstraint(GeometricConstraint):
             p0b[:, :] = allpointsb[0 : self.n]
 
             # map back to DVGeo
-            tmpp0 = self.DVGeo.totalSensitivity(dPdp0, self.name + "p0", config=config)
-            tmpp1 = self.DVGeo.totalSensitivity(dPdp1, self.name + "p1", config=config)
-            tmpp2 = self.DVGeo.totalSensitivity(dPdp2, self.name + "p2", config=config)
-            tmpO = self.DVGeo.totalSensitivity(dPdO, self.name + "origin", config=config)
-
-            tmpTotal = {}
-            for key in tmpp0:
-                tmpTotal[key] = tmpp0[key] + tmpp1[key] + tmpp2[key] + tmpO[key]
-
-            funcsSens[self.name] = tmpTotal
+            funcsSens[self.name] = {}
+            self.DVGeo.addSensitivitySeed(dPdp0, self.name + "p0", funcsSens[self.name], config=config)
+            self.DVGeo.addSensitivitySeed(dPdp1, self.name + "p1", funcsSens[self.name], config=config)
+            self.DVGeo.addSensitivitySeed(dPdp2, self.name + "p2", funcsSens[self.name], config=config)
+            self.DVGeo.addSensitivitySeed(dPdO, self.name + "origin", funcsSens[self.name], config=config)
 
     def writeTecplot(self, handle):
         """
@@ -1,5 +1,6 @@
 # External modules
 import numpy as np
+from scipy import sparse
 
 # Local modules
 from .. import geo_utils
@@ -38,20 +39,15 @@ class RadiusConstraint(GeometricConstraint):
 
         # Compute origin and unit vectors (xi, eta) of 2d space
         origin = (p1 + p2) / 2.0
-        nxi = p1 - origin
-        neta = p3 - origin
-        for i in range(self.nCon):
-            nxi[i] /= geo_utils.euclideanNorm(nxi[i])
-            neta[i] /= geo_utils.euclideanNorm(neta[i])
+        nxi = (p1 - origin) / geo_utils.eDistVec(p1, origin)[:, None]
+        neta = (p3 - origin) / geo_utils.eDistVec(p3, origin)[:, None]
 
         # Compute component of eta in the xi direction
         eta_on_xi = np.einsum("ij,ij->i", nxi, neta)
-        xi_of_eta = np.einsum("ij,i->ij", nxi, eta_on_xi)
 
         # Remove component of eta in the xi direction
-        neta = neta - xi_of_eta
-        for i in range(self.nCon):
-            neta[i] /= geo_utils.euclideanNorm(neta[i])
+        neta = neta - nxi * eta_on_xi[:, None]
+        neta = neta / geo_utils.eDistVec(neta, 0.0)[:, None]
 
         return origin, nxi, neta
 
@@ -115,6 +111,47 @@ class RadiusConstraint(GeometricConstraint):
 
         return r, center
 
+    def computeCircleSens(self, coords):
+        """
+        Compute the derivatives of the radii with respect to the three
+        points that define each circle. The radius of the circle through
+        three points can also be written as
+
+            r = |p2 - p1| * |p3 - p1| * |p3 - p2| / (2 * |(p2 - p1) x (p3 - p1)|)
+
+        which is differentiated in reverse mode for all circles at once.
+
+        Parameters
+        ----------
+        coords : array, size (3 * nCon, 3)
+            The coordinates of the points of all circles
+
+        Returns
+        -------
+        drdPt : array, size (nCon, 3, 3)
+            The derivatives of each radius with respect to the
+            coordinates of p1, p2 and p3
+        """
+        p1, p2, p3 = self.splitPointSets(coords)
+
+        u = p2 - p1
+        v = p3 - p1
+        w = p3 - p2
+        n = np.cross(u, v)
+        u2 = np.sum(u * u, axis=1)[:, None]
+        v2 = np.sum(v * v, axis=1)[:, None]
+        w2 = np.sum(w * w, axis=1)[:, None]
+        n2 = np.sum(n * n, axis=1)[:, None]
+        r = np.sqrt(u2 * v2 * w2 / n2) / 2
+
+        # Reverse through the lengths of the sides and of the normal
+        nb = -r * n / n2
+        ub = r * u / u2 + np.cross(v, nb)
+        vb = r * v / v2 + np.cross(nb, u)
+        wb = r * w / w2
+
+        return np.stack([-ub - vb, ub - wb, vb + wb], axis=1)
+
     def evalFunctions(self, funcs, config):
         """
         Evaluate the functions this object has and place in the funcs dictionary
@@ -146,35 +183,35 @@ class RadiusConstraint(GeometricConstraint):
         if nDV > 0:
             # This is the sensitivity of the radius of curvature w.r.t. the
             # coordinates of each of the three points that make it up
-            # row 0: dr0dp0x dr0dp0y dr0dp0z dr0dp1x dr0dp1y dr0dp1z dr0dp2x ...
-            # row 1: dr1dp0x dr1dp0y dr1dp0z dr1dp1x dr1dp1y dr1dp1z dr1dp2x ...
-            # :
-            drdPt = np.zeros((self.nCon, 9))
-
-            coords = self.coords.astype("D")
-            for i in range(3):  # loop over pts at given slice
-                for j in range(3):  # loop over coordinates in pt
-                    coords[i * self.nCon : (i + 1) * self.nCon, j] += 1e-40j
-                    r, _ = self.computeCircle(coords)
-
-                    drdPt[:, i * 3 + j] = r.imag / 1e-40
-                    coords[i * self.nCon : (i + 1) * self.nCon, j] -= 1e-40j
-
-            # We now need to convert to the 3d sparse matrix form of the jacobian.
-            # We need the derivative of each radius w.r.t. all of the points
-            # in coords w.r.t. all of the coordinates for a given point.
-            # So the final matrix dimensions are (ncon, ncon*3, 3)
-
-            # We also have to scale the sensitivities if scale is True.
+            drdPt = self.computeCircleSens(self.coords)
             if self.scaled:
-                eye = np.diag(1 / self.r0)
-            else:
-                eye = np.eye(self.nCon)
-            drdPt_sparse = np.einsum("ij,jk->ijk", eye, drdPt)
-            drdPt_sparse = drdPt_sparse.reshape(self.nCon, self.nCon * 3, 3)
-            drdPt_sparse = np.hstack([drdPt_sparse[:, ::3, :], drdPt_sparse[:, 1::3, :], drdPt_sparse[:, 2::3, :]])
-
-            funcsSens[self.name] = self.DVGeo.totalSensitivity(drdPt_sparse, self.name, config=config)
+                drdPt /= self.r0[:, None, None]
+
+            # Each radius only depends on its own three points, so the seed is stored
+            # as a sparse matrix of size nCon x (3 * nPts). The points of a radius are
+            # at i, nCon + i and 2 * nCon + i in coords.
+            cols = 3 * (np.arange(self.nCon)[:, None, None] + self.nCon * np.arange(3)[:, None]) + np.arange(3)
+            drdPt_sparse = sparse.csr_matrix(
+                (drdPt.flatten(), cols.flatten(), np.arange(0, 9 * self.nCon + 1, 9)),
+                shape=(self.nCon, 3 * len(self.coords)),
+            )
+
+            funcsSens[self.name] = {}
+            self.DVGeo.addSensitivitySeed(drdPt_sparse, self.name, funcsSens[self.name], config=config)
+
+    def getPointDependence(self):
+        """
+        Each radius depends on its own three points.
+        """
+        dCondPt = sparse.csr_matrix(
+            (
+                np.ones(3 * self.nCon),
+                (np.arange(self.nCon)[:, None] + self.nCon * np.arange(3)).flatten(),
+                np.arange(0, 3 * self.nCon + 1, 3),
+            ),
+            shape=(self.nCon, len(self.coords)),
+        )
+        return self.name, dCondPt
 
     def writeTecplot(self, handle):
         """
@@ -1,5 +1,6 @@
 # External modules
 import numpy as np
+from scipy import sparse
 
 # Local modules
 from .. import geo_utils
@@ -25,9 +26,7 @@ class ThicknessConstraint(GeometricConstraint):
         self.DVGeo.addPointSet(self.coords, self.name, compNames=compNames)
 
         # Now get the reference lengths
-        self.D0 = np.zeros(self.nCon)
-        for i in range(self.nCon):
-            self.D0[i] = geo_utils.norm.euclideanNorm(self.coords[2 * i] - self.coords[2 * i + 1])
+        self.D0 = geo_utils.eDistVec(self.coords[0::2], self.coords[1::2])
 
     def evalFunctions(self, funcs, config):
         """
@@ -40,11 +39,9 @@ class ThicknessConstraint(GeometricConstraint):
         """
         # Pull out the most recent set of coordinates:
         self.coords = self.DVGeo.update(self.name, config=config)
-        D = np.zeros(self.nCon)
-        for i in range(self.nCon):
-            D[i] = geo_utils.norm.euclideanNorm(self.coords[2 * i] - self.coords[2 * i + 1])
-            if self.scaled:
-                D[i] /= self.D0[i]
+        D = geo_utils.eDistVec(self.coords[0::2], self.coords[1::2])
+        if self.scaled:
+            D = D / self.D0
         funcs[self.name] = D
 
     def evalFunctionsSens(self, funcsSens, config):
@@ -60,17 +57,28 @@ class ThicknessConstraint(GeometricConstraint):
 
         nDV = self.DVGeo.getNDV()
         if nDV > 0:
-            dTdPt = np.zeros((self.nCon, self.coords.shape[0], self.coords.shape[1]))
+            # each constraint only depends on its own two points,
+            # so the seed is stored as a sparse matrix of size nCon x (3 * nPts)
+            p1b = geo_utils.eDistVec_b(self.coords[0::2], self.coords[1::2])
+            if self.scaled:
+                p1b /= self.D0[:, None]
+            dTdPt = sparse.csr_matrix(
+                (np.hstack([p1b, -p1b]).flatten(), np.arange(6 * self.nCon), np.arange(0, 6 * self.nCon + 1, 6)),
+                shape=(self.nCon, 3 * len(self.coords)),
+            )
 
-            for i in range(self.nCon):
-                p1b, p2b = geo_utils.eDist_b(self.coords[2 * i, :], self.coords[2 * i + 1, :])
-                if self.scaled:
-                    p1b /= self.D0[i]
-                    p2b /= self.D0[i]
-                dTdPt[i, 2 * i, :] = p1b
-                dTdPt[i, 2 * i + 1, :] = p2b
+            funcsSens[self.name] = {}
+            self.DVGeo.addSensitivitySeed(dTdPt, self.name, funcsSens[self.name], config=config)
 
-            funcsSens[self.name] = self.DVGeo.totalSensitivity(dTdPt, self.name, config=config)
+    def getPointDependence(self):
+        """
+        Each constraint depends on its own two points.
+        """
+        dCondPt = sparse.csr_matrix(
+            (np.ones(2 * self.nCon), np.arange(2 * self.nCon), np.arange(0, 2 * self.nCon + 1, 2)),
+            shape=(self.nCon, len(self.coords)),
+        )
+        return self.name, dCondPt
 
     def writeTecplot(self, handle):
         """
@@ -106,11 +114,9 @@ class ThicknessToChordConstraint(GeometricConstraint):
         self.DVGeo.addPointSet(self.coords, self.name, compNames=compNames)
 
         # Now get the reference lengths
-        self.ToC0 = np.zeros(self.nCon)
-        for i in range(self.nCon):
-            t = np.linalg.norm(self.coords[4 * i] - self.coords[4 * i + 1])
-            c = np.linalg.norm(self.coords[4 * i + 2] - self.coords[4 * i + 3])
-            self.ToC0[i] = t / c
+        t = geo_utils.eDistVec(self.coords[0::4], self.coords[1::4])
+        c = geo_utils.eDistVec(self.coords[2::4], self.coords[3::4])
+        self.ToC0 = t / c
 
     def evalFunctions(self, funcs, config):
         """
@@ -123,11 +129,9 @@ class ThicknessToChordConstraint(GeometricConstraint):
         """
         # Pull out the most recent set of coordinates:
         self.coords = self.DVGeo.update(self.name, config=config)
-        ToC = np.zeros(self.nCon)
-        for i in range(self.nCon):
-            t = geo_utils.eDist(self.coords[4 * i], self.coords[4 * i + 1])
-            c = geo_utils.eDist(self.coords[4 * i + 2], self.coords[4 * i + 3])
-            ToC[i] = (t / c) / self.ToC0[i]
+        t = geo_utils.eDistVec(self.coords[0::4], self.coords[1::4])
+        c = geo_utils.eDistVec(self.coords[2::4], self.coords[3::4])
+        ToC = (t / c) / self.ToC0
 
         funcs[self.name] = ToC
 
@@ -144,21 +148,38 @@ class ThicknessToChordConstraint(GeometricConstraint):
 
         nDV = self.DVGeo.getNDV()
         if nDV > 0:
-            dToCdPt = np.zeros((self.nCon, self.coords.shape[0], self.coords.shape[1]))
-
-            for i in range(self.nCon):
-                t = geo_utils.eDist(self.coords[4 * i], self.coords[4 * i + 1])
-                c = geo_utils.eDist(self.coords[4 * i + 2], self.coords[4 * i + 3])
-
-                p1b, p2b = geo_utils.eDist_b(self.coords[4 * i, :], self.coords[4 * i + 1, :])
-                p3b, p4b = geo_utils.eDist_b(self.coords[4 * i + 2, :], self.coords[4 * i + 3, :])
-
-                dToCdPt[i, 4 * i, :] = p1b / c / self.ToC0[i]
-                dToCdPt[i, 4 * i + 1, :] = p2b / c / self.ToC0[i]
-                dToCdPt[i, 4 * i + 2, :] = (-p3b * t / c**2) / self.ToC0[i]
-                dToCdPt[i, 4 * i + 3, :] = (-p4b * t / c**2) / self.ToC0[i]
-
-            funcsSens[self.name] = self.DVGeo.totalSensitivity(dToCdPt, self.name, config=config)
+            t = geo_utils.eDistVec(self.coords[0::4], self.coords[1::4])[:, None]
+            c = geo_utils.eDistVec(self.coords[2::4], self.coords[3::4])[:, None]
+            ToC0 = self.ToC0[:, None]
+
+            p1b = geo_utils.eDistVec_b(self.coords[0::4], self.coords[1::4])
+            p3b = geo_utils.eDistVec_b(self.coords[2::4], self.coords[3::4])
+
+            # each constraint only depends on its own four points,
+            # so the seed is stored as a sparse matrix of size nCon x (3 * nPts)
+            tb = p1b / c / ToC0
+            cb = -p3b * t / c**2 / ToC0
+            dToCdPt = sparse.csr_matrix(
+                (
+                    np.hstack([tb, -tb, cb, -cb]).flatten(),
+                    np.arange(12 * self.nCon),
+                    np.arange(0, 12 * self.nCon + 1, 12),
+                ),
+                shape=(self.nCon, 3 * len(self.coords)),
+            )
+
+            funcsSens[self.name] = {}
+            self.DVGeo.addSensitivitySeed(dToCdPt, self.name, funcsSens[self.name], config=config)
+
+    def getPointDependence(self):
+        """
+        Each constraint depends on its own four points.
+        """
+        dCondPt = sparse.csr_matrix(
+            (np.ones(4 * self.nCon), np.arange(4 * self.nCon), np.arange(0, 4 * self.nCon + 1, 4)),
+            shape=(self.nCon, len(self.coords)),
+        )
+        return self.name, dCondPt
 
     def writeTecplot(self, handle):
         """
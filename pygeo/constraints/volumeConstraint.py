@@ -1,5 +1,6 @@
 # External modules
 import numpy as np
+from scipy import sparse
 
 # Local modules
 from ..geo_utils.polygon import volumeHex, volumeHex_b, volumeTriangulatedMesh, volumeTriangulatedMesh_b
@@ -62,7 +63,14 @@ class VolumeConstraint(GeometricConstraint):
                 dVdPt /= self.V0
 
             # Now compute the DVGeo total sensitivity:
-            funcsSens[self.name] = self.DVGeo.totalSensitivity(dVdPt, self.name, config=config)
+            funcsSens[self.name] = {}
+            self.DVGeo.addSensitivitySeed(dVdPt, self.name, funcsSens[self.name], config=config)
+
+    def getPointDependence(self):
+        """
+        The volume depends on all of its points.
+        """
+        return self.name, sparse.csr_matrix(np.ones((1, len(self.coords))))
 
     def writeTecplot(self, handle):
         """
@@ -82,20 +90,8 @@ class VolumeConstraint(GeometricConstraint):
         """
         Evaluate the total volume of the current coordinates
         """
-        Volume = 0.0
         x = self.coords.reshape((self.nSpan, self.nChord, 2, 3))
-        for j in range(self.nChord - 1):
-            for i in range(self.nSpan - 1):
-                Volume += volumeHex(
-                    x[i, j, 0],
-                    x[i + 1, j, 0],
-                    x[i, j + 1, 0],
-                    x[i + 1, j + 1, 0],
-                    x[i, j, 1],
-                    x[i + 1, j, 1],
-                    x[i, j + 1, 1],
-                    x[i + 1, j + 1, 1],
-                )
+        Volume = np.sum(volumeHex(*self._getHexCorners(x)))
 
         if Volume < 0:
             Volume = -Volume
@@ -110,26 +106,9 @@ class VolumeConstraint(GeometricConstraint):
         """
         x = self.coords.reshape((self.nSpan, self.nChord, 2, 3))
         xb = np.zeros_like(x)
-        for j in range(self.nChord - 1):
-            for i in range(self.nSpan - 1):
-                volumeHex_b(
-                    x[i, j, 0],
-                    x[i + 1, j, 0],
-                    x[i, j + 1, 0],
-                    x[i + 1, j + 1, 0],
-                    x[i, j, 1],
-                    x[i + 1, j, 1],
-                    x[i, j + 1, 1],
-                    x[i + 1, j + 1, 1],
-                    xb[i, j, 0],
-                    xb[i + 1, j, 0],
-                    xb[i, j + 1, 0],
-                    xb[i + 1, j + 1, 0],
-                    xb[i, j, 1],
-                    xb[i + 1, j, 1],
-                    xb[i, j + 1, 1],
-                    xb[i + 1, j + 1, 1],
-                )
+        # The corner seeds are overlapping views of xb so the
+        # contributions of neighbouring cells accumulate directly
+        volumeHex_b(*self._getHexCorners(x), *self._getHexCorners(xb))
         # We haven't divided by 6.0 yet...lets do it here....
         xb /= 6.0
 
@@ -141,6 +120,24 @@ class VolumeConstraint(GeometricConstraint):
 
         return xb
 
+    @staticmethod
+    def _getHexCorners(x):
+        """
+        Return the 8 corners of every hexahedral cell of the
+        (nSpan, nChord, 2, 3) grid x as views of shape
+        (nSpan-1, nChord-1, 3), ordered as volumeHex expects.
+        """
+        return (
+            x[:-1, :-1, 0],
+            x[1:, :-1, 0],
+            x[:-1, 1:, 0],
+            x[1:, 1:, 0],
+            x[:-1, :-1, 1],
+            x[1:, :-1, 1],
+            x[:-1, 1:, 1],
+            x[1:, 1:, 1],
+        )
+
 
 class TriangulatedVolumeConstraint(GeometricConstraint):
     """
@@ -206,23 +203,13 @@ class TriangulatedVolumeConstraint(GeometricConstraint):
             which will apply to *ALL* the local DV groups or a single string specifying
             a particular configuration.
         """
-        tmpTotal = {}
+        funcsSens[self.name] = {}
 
         # assume evalFunctions was called just prior and grad was stashed on rank=0
         grad_vol = volumeTriangulatedMesh_b(self.surf_p0, self.surf_p1, self.surf_p2)
-        if self.scaled:
-            tmp_p0 = self.DVGeo.totalSensitivity(grad_vol[0] / self.vol_0, self.surface_name + "_p0", config=config)
-            tmp_p1 = self.DVGeo.totalSensitivity(grad_vol[1] / self.vol_0, self.surface_name + "_p1", config=config)
-            tmp_p2 = self.DVGeo.totalSensitivity(grad_vol[2] / self.vol_0, self.surface_name + "_p2", config=config)
-        else:
-            tmp_p0 = self.DVGeo.totalSensitivity(grad_vol[0], self.surface_name + "_p0", config=config)
-            tmp_p1 = self.DVGeo.totalSensitivity(grad_vol[1], self.surface_name + "_p1", config=config)
-            tmp_p2 = self.DVGeo.totalSensitivity(grad_vol[2], self.surface_name + "_p2", config=config)
-
-        for key in tmp_p0:
-            tmpTotal[key] = tmp_p0[key] + tmp_p1[key] + tmp_p2[key]
-
-        funcsSens[self.name] = tmpTotal
+        for i in range(3):
+            dVdPt = grad_vol[i] / self.vol_0 if self.scaled else grad_vol[i]
+            self.DVGeo.addSensitivitySeed(dVdPt, self.surface_name + "_p%d" % i, funcsSens[self.name], config=config)
 
     def writeTecplot(self, handle):
         raise NotImplementedError()
@@ -255,6 +242,9 @@ class CompositeVolumeConstraint(GeometricConstraint):
         """
         V = 0.0
         for vol in self.vols:
+            # Update the coordinates here as well, so this does not rely on
+            # the volumes having been evaluated before
+            vol.coords = vol.DVGeo.update(vol.name, config=config)
             V += vol.evalVolume()
         if self.scaled:
             V /= self.V0
@@ -272,18 +262,13 @@ class CompositeVolumeConstraint(GeometricConstraint):
         """
         nDV = self.DVGeo.getNDV()
         if nDV > 0:
-            tmp = []  # List of dict derivatives
+            # the derivatives of the volumes are summed
+            funcsSens[self.name] = {}
             for vol in self.vols:
                 dVdPt = vol.evalVolumeSens()
                 if self.scaled:
                     dVdPt /= self.V0
-                tmp.append(vol.DVGeo.totalSensitivity(dVdPt, vol.name, config=config))
-
-            # Now we need to sum up the derivatives:
-            funcsSens[self.name] = tmp[0]
-            for i in range(1, len(tmp)):
-                for key in tmp[i]:
-                    funcsSens[self.name][key] += tmp[i][key]
+                vol.DVGeo.addSensitivitySeed(dVdPt, vol.name, funcsSens[self.name], config=config)
 
     def writeTecplot(self, handle):
         raise NotImplementedError()
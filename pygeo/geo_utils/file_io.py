@@ -195,3 +195,166 @@ def readPlot3DSurfFile(fileName):
                 elemCount += 1
 
     return p0, v1, v2
+
+
+def readIGESSurfaces(fileName):
+    """Read all the B-spline surface entities (type 128) from an IGES file
+
+    The directory section is scanned in a single pass and the parameter
+    data of each surface is converted to floats in one shot, rather than
+    token by token.
+
+    Parameters
+    ----------
+    fileName : str
+        Name of the IGES file to read
+
+    Returns
+    -------
+    surfData : list of dict
+        One dictionary per surface with keys ``ku``, ``kv``, ``tu``,
+        ``tv``, ``weights``, ``coef`` (shape (nCtlu, nCtlv, 3)) and
+        ``range`` (umin, umax, vmin, vmax).
+    """
+    with open(fileName) as f:
+        lines = f.read().splitlines()
+
+    # The terminate line gives the number of lines in each section
+    start_lines = int(lines[-1][1:8])
+    general_lines = int(lines[-1][9:16])
+    directory_lines = int(lines[-1][17:24])
+
+    dir_offset = start_lines + general_lines
+    para_offset = dir_offset + directory_lines
+
+    # Directory entries are ALWAYS two lines. Pull out the entity type,
+    # the parameter pointer and the parameter line count for all of them.
+    dirLines = lines[dir_offset:para_offset]
+    entity = np.array([int(line[0:8]) for line in dirLines[0::2]])
+    surfIDs = np.where(entity == 128)[0]
+    starts = [int(dirLines[2 * i][8:16]) for i in surfIDs]
+    counts = [int(dirLines[2 * i + 1][24:32]) for i in surfIDs]
+
+    surfData = []
+    for start, count in zip(starts, counts):
+        # -1 is for conversion from 1 based (iges) to python
+        first = para_offset + start - 1
+        # Columns 1-64 hold the data. Every line ends with a delimiter
+        # and the entity is terminated by ';'
+        block = "".join(line[0:64] for line in lines[first : first + count]).replace(";", ",")
+        data = np.array(block.split(",")[:-1], dtype="d")
+
+        nCtlu = int(data[1] + 1)
+        nCtlv = int(data[2] + 1)
+        ku = int(data[3] + 1)
+        kv = int(data[4] + 1)
+
+        # Fixed layout after the 10 header entries: knots, weights,
+        # control points (u fastest) and finally the parametric range
+        iStart = 10
+        tu = data[iStart : iStart + nCtlu + ku].copy()
+        iStart += nCtlu + ku
+        tv = data[iStart : iStart + nCtlv + kv].copy()
+        iStart += nCtlv + kv
+        weights = data[iStart : iStart + nCtlu * nCtlv]
+        iStart += nCtlu * nCtlv
+        coef = data[iStart : iStart + 3 * nCtlu * nCtlv].reshape((nCtlv, nCtlu, 3)).transpose((1, 0, 2)).copy()
+        iStart += 3 * nCtlu * nCtlv
+        prange = data[iStart : iStart + 4].copy()
+
+        surfData.append({"ku": ku, "kv": kv, "tu": tu, "tv": tv, "weights": weights, "coef": coef, "range": prange})
+
+    return surfData
+
+
+def _formatIGESBlock(values, Pcount, counter):
+    """Format a flat array of values as IGES parameter lines, three
+    values per line. The last value is terminated with ';' and the final
+    line is padded out to the full width. All the complete lines are
+    formatted with a single string operation."""
+    values = np.real(values)
+    nLines = (len(values) + 2) // 3
+    nFull = nLines - 1
+
+    args = np.empty((nFull, 5), dtype=object)
+    args[:, 0:3] = values[: 3 * nFull].reshape((nFull, 3))
+    args[:, 3] = Pcount
+    args[:, 4] = np.arange(counter, counter + nFull)
+    block = ("%20.12g,%20.12g,%20.12g,  %7dP%7d\n" * nFull) % tuple(args.flatten().tolist())
+
+    # The final line closes the entity
+    last = ["%20.12g," % val for val in values[3 * nFull :]]
+    last[-1] = last[-1][:-1] + ";"
+    block += "".join(last) + "%21s" % " " * (3 - len(last)) + "  %7dP%7d\n" % (Pcount, counter + nFull)
+
+    return block, counter + nLines
+
+
+def writeIGESSurfaces(handle, surfs):
+    """Write the directory and parameter sections for a list of pySpline
+    surfaces to an open IGES file handle. All the numerical data for a
+    surface is formatted at once and written in a single call.
+
+    Parameters
+    ----------
+    handle : file handle
+        Open file handle, positioned after the global section
+    surfs : list of pySpline Surface
+        The surfaces to write
+
+    Returns
+    -------
+    nDir : int
+        Number of lines written in the directory section
+    nPara : int
+        Number of lines written in the parameter section
+    """
+    # Directory section
+    Dcount = 1
+    Pcount = 1
+    dirLines = []
+    for surf in surfs:
+        paraEntries = 13 + len(surf.tu) + len(surf.tv) + 4 * surf.nCtlu * surf.nCtlv + 1
+        paraLines = (paraEntries - 10) // 3 + 2
+        if np.mod(paraEntries - 10, 3) != 0:
+            paraLines += 1
+
+        dirLines.append("     128%8d       0       0       1       0       0       000000001D%7d\n" % (Pcount, Dcount))
+        dirLines.append(
+            "     128       0       2%8d       0                               0D%7d\n" % (paraLines, Dcount + 1)
+        )
+        Dcount += 2
+        Pcount += paraLines
+    handle.write("".join(dirLines))
+
+    # Parameter section
+    Pcount = 1
+    counter = 1
+    for surf in surfs:
+        header = "%10d,%10d,%10d,%10d,%10d,          %7dP%7d\n" % (
+            128,
+            surf.nCtlu - 1,
+            surf.nCtlv - 1,
+            surf.ku - 1,
+            surf.kv - 1,
+            Pcount,
+            counter,
+        )
+        header += "%10d,%10d,%10d,%10d,%10d,          %7dP%7d\n" % (0, 0, 1, 0, 0, Pcount, counter + 1)
+        counter += 2
+
+        # Control points are written with u varying fastest
+        values = np.concatenate(
+            [
+                surf.tu,
+                surf.tv,
+                np.ones(surf.nCtlu * surf.nCtlv),
+                np.transpose(surf.coef, (1, 0, 2)).flatten(),
+                [surf.tu[0], surf.tu[-1], surf.tv[0], surf.tv[-1]],
+            ]
+        )
+        block, counter = _formatIGESBlock(values, Pcount, counter)
+        handle.write(header + block)
+        Pcount += 2
+
+    return Dcount - 1, counter - 1
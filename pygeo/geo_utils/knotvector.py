@@ -1,5 +1,7 @@
 # External modules
 import numpy as np
+from scipy import sparse
+from scipy.sparse import linalg
 
 # --------------------------------------------------------------
 #                  Knot Vector Manipulation Functions
@@ -40,3 +42,178 @@ def blendKnotVectors(knotVectors, sym):
 
     newKnotVec = newKnotVec / nVec
     return newKnotVec
+
+
+# --------------------------------------------------------------
+#                  B-spline Basis and Fitting Functions
+# --------------------------------------------------------------
+
+
+def basisFunctions(t, k, u):
+    """Evaluate the k non-zero B-spline basis functions of order k at
+    an array of parametric values u, all at once.
+
+    Parameters
+    ----------
+    t : array
+        The knot vector
+    k : int
+        The order of the spline
+    u : array of length nPts
+        Parametric locations
+
+    Returns
+    -------
+    istart : int array of length nPts
+        Index of the first control point influencing each point
+    B : array of size (nPts, k)
+        Values of the non-zero basis functions
+    """
+    t = np.asarray(t).real
+    u = np.clip(np.atleast_1d(u).real, t[0], t[-1])
+    nCtl = len(t) - k
+    nPts = len(u)
+
+    # Knot span containing each u. The end of the parametric range
+    # belongs to the last non-zero span
+    span = np.clip(np.searchsorted(t, u, side="right") - 1, k - 1, nCtl - 1)
+
+    B = np.zeros((nPts, k))
+    B[:, 0] = 1.0
+    left = np.zeros((nPts, k))
+    right = np.zeros((nPts, k))
+    for j in range(1, k):
+        left[:, j] = u - t[span + 1 - j]
+        right[:, j] = t[span + j] - u
+        saved = np.zeros(nPts)
+        for r in range(j):
+            temp = B[:, r] / (right[:, r + 1] + left[:, j - r])
+            B[:, r] = saved + right[:, r + 1] * temp
+            saved = left[:, j - r] * temp
+        B[:, j] = saved
+
+    return span - k + 1, B
+
+
+def getBasisPts(knots, orders, params, lIndex):
+    """Evaluate the tensor product basis of a surface or volume at a
+    set of points. This is the vectorized equivalent of calling
+    pySpline's getBasisPt for each point.
+
+    Parameters
+    ----------
+    knots : list of arrays
+        The knot vectors in each parametric direction
+    orders : list of int
+        The spline order in each parametric direction
+    params : list of arrays
+        The parametric coordinates of the points in each direction
+    lIndex : int array
+        The local to global control point mapping of the patch
+
+    Returns
+    -------
+    cols : int array of size (nPts, prod(orders))
+        The global control point index of each non-zero entry
+    vals : array of size (nPts, prod(orders))
+        The basis function values
+    """
+    nPts = len(params[0])
+    vals = np.ones((nPts, 1))
+    flatIndex = np.zeros((nPts, 1), "intc")
+    for t, k, u, nCtl in zip(knots, orders, params, lIndex.shape):
+        istart, B = basisFunctions(t, k, u)
+        index = istart[:, None] + np.arange(k)
+        vals = (vals[:, :, None] * B[:, None, :]).reshape((nPts, -1))
+        flatIndex = (flatIndex[:, :, None] * nCtl + index[:, None, :]).reshape((nPts, -1))
+
+    cols = np.asarray(lIndex).flatten()[flatIndex]
+
+    return cols, vals
+
+
+def solveNormalEquations(N, pts, solver="direct", x0=None, tol=1e-10, maxIter=None):
+    """Solve the linear least squares problem min ||N x - pts|| for
+    all the columns of pts together.
+
+    Parameters
+    ----------
+    N : sparse matrix of size (nPts, nCtl)
+        The basis function matrix
+    pts : array of size (nPts, nDim)
+        The points to fit
+    solver : str, {'direct', 'cg', 'lsqr'}
+        'direct' factorizes N^T N once and back-solves all columns in
+        one call. 'cg' runs a Jacobi preconditioned conjugate gradient
+        method on N^T N with all columns iterated together, so each
+        iteration is a single sparse matrix-matrix product. 'lsqr'
+        solves each column with LSQR directly on N, which avoids
+        forming N^T N altogether.
+    x0 : array of size (nCtl, nDim)
+        Initial guess for the iterative solvers
+    tol : float
+        Relative convergence tolerance for the iterative solvers
+    maxIter : int
+        Maximum number of iterations for the iterative solvers. Defaults
+        to the number of unknowns.
+
+    Returns
+    -------
+    x : array of size (nCtl, nDim)
+        The fitted coefficients
+    """
+    N = sparse.csr_matrix(N)
+    nCtl = N.shape[1]
+    if maxIter is None:
+        maxIter = nCtl
+
+    if solver == "direct":
+        NT = N.T.tocsr()
+        NTN = (NT @ N).tocsc()
+        return linalg.splu(NTN).solve(NT @ pts)
+
+    elif solver == "cg":
+        NT = N.T.tocsr()
+        NTN = (NT @ N).tocsr()
+        rhs = NT @ pts
+        diag = NTN.diagonal()
+        diag[diag == 0.0] = 1.0
+
+        if x0 is None:
+            x = np.zeros_like(rhs)
+            r = rhs.copy()
+        else:
+            x = np.array(x0, dtype=rhs.dtype)
+            r = rhs - NTN @ x
+        z = r / diag[:, None]
+        p = z.copy()
+        rz = np.sum(r * z, axis=0)
+        rhsNorm = np.linalg.norm(rhs, axis=0)
+        rhsNorm[rhsNorm == 0.0] = 1.0
+
+        for _ in range(maxIter):
+            if np.all(np.linalg.norm(r, axis=0) <= tol * rhsNorm):
+                break
+            Ap = NTN @ p
+            pAp = np.sum(p * Ap, axis=0)
+            alpha = np.divide(rz, pAp, out=np.zeros_like(rz), where=pAp != 0.0)
+            x += alpha * p
+            r -= alpha * Ap
+            z = r / diag[:, None]
+            rzNew = np.sum(r * z, axis=0)
+            beta = np.divide(rzNew, rz, out=np.zeros_like(rz), where=rz != 0.0)
+            p = z + beta * p
+            rz = rzNew
+
+        return x
+
+    elif solver == "lsqr":
+        x = np.zeros((nCtl, pts.shape[1]))
+        for idim in range(pts.shape[1]):
+            guess = None if x0 is None else x0[:, idim]
+            x[:, idim] = linalg.lsqr(N, pts[:, idim], atol=tol, btol=tol, iter_lim=maxIter, x0=guess)[0]
+
+        return x
+
+    else:
+        raise ValueError(f"Unknown solver '{solver}'. Valid solvers are 'direct', 'cg' and 'lsqr'.")
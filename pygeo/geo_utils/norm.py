@@ -179,3 +179,19 @@ def eDist_b(x1, x2):
     x2b[2] = -tempb2
 
     return x1b, x2b
+
+
+def eDistVec(x1, x2):
+    """Get the euclidean distances between the rows of x1 and x2, which are arrays of size (N, 3)"""
+    d = x1 - x2
+    return np.sqrt(np.sum(d * d, axis=1))
+
+
+def eDistVec_b(x1, x2):
+    """
+    Get the derivatives of the euclidean distances between the rows of x1 and x2
+    with respect to x1. The derivatives with respect to x2 are the negative of these.
+    """
+    d = x1 - x2
+    D = eDistVec(x1, x2)[:, None]
+    return np.divide(d, D, out=np.zeros_like(d), where=D != 0.0)
@@ -55,6 +55,50 @@ def faceOrientation(f1, f2):
         sys.exit(0)
 
 
+def edgeOrientationArray(e1, e2):
+    """Array version of :meth:`edgeOrientation` for (N, 2) arrays of
+    node pairs"""
+    e1 = np.asarray(e1)
+    e2 = np.asarray(e2)
+    same = np.all(e1 == e2, axis=1)
+    orient = np.where(same, 1, -1)
+
+    bad = ~same & ~np.all(e1[:, ::-1] == e2, axis=1)
+    for i in np.where(bad)[0]:
+        edgeOrientation(e1[i], e2[i])
+
+    return orient
+
+
+# Node permutations of f2 for each of the 8 face orientations
+_faceOrientationPerms = np.array(
+    [
+        [0, 1, 2, 3],
+        [1, 0, 3, 2],
+        [2, 3, 0, 1],
+        [3, 2, 1, 0],
+        [0, 2, 1, 3],
+        [2, 0, 3, 1],
+        [1, 3, 0, 2],
+        [3, 1, 2, 0],
+    ]
+)
+
+
+def faceOrientationArray(f1, f2):
+    """Array version of :meth:`faceOrientation` for (N, 4) arrays of
+    face nodes"""
+    f1 = np.asarray(f1)
+    f2 = np.asarray(f2)
+    match = np.all(f1[:, None, :] == f2[:, _faceOrientationPerms], axis=2)
+    orient = np.argmax(match, axis=1)
+
+    for i in np.where(~np.any(match, axis=1))[0]:
+        faceOrientation(f1[i], f2[i])
+
+    return orient
+
+
 def quadOrientation(pt1, pt2):
     """Given two sets of 4 points in ndim space, pt1 and pt2,
     determine the orientation of pt2 wrt pt1
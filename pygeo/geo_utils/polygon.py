@@ -110,8 +110,12 @@ def volumeTetra(nodes):
 
 def volumePyramid(a, b, c, d, p):
     """
-    Compute volume of a square-based pyramid
+    Compute volume of a square-based pyramid. The points may be
+    arrays of size (3) or stacks of shape (..., 3), in which case one
+    volume is returned per pyramid.
     """
+    # Put the coordinate axis first so that p[0] etc. works for both
+    a, b, c, d, p = (np.moveaxis(x, -1, 0) for x in (a, b, c, d, p))
     fourth = 1.0 / 4.0
 
     volume = (
@@ -130,8 +134,12 @@ def volumePyramid_b(a, b, c, d, p, ab, bb, cb, db, pb):
     Compute the reverse-mode derivative of the square-based
     pyramid. This has been copied from reverse-mode AD'ed tapenade
     fortran code and converted to python to use vectors for the
-    points.
+    points. As with volumePyramid, the points may be stacks of shape
+    (..., 3); the seeds are then accumulated in place for every
+    pyramid at once.
     """
+    a, b, c, d, p = (np.moveaxis(x, -1, 0) for x in (a, b, c, d, p))
+    ab, bb, cb, db, pb = (np.moveaxis(x, -1, 0) for x in (ab, bb, cb, db, pb))
     fourth = 1.0 / 4.0
     volpymb = 1.0
     tempb = ((a[1] - c[1]) * (b[2] - d[2]) - (a[2] - c[2]) * (b[1] - d[1])) * volpymb
@@ -180,7 +188,13 @@ def volumeHex(x0, x1, x2, x3, x4, x5, x6, x7):
     Parameters
     ----------
     x{0:7} : arrays or size (3)
-        Array of defining the coordinates of the volume
+        Array of defining the coordinates of the volume. Stacks of
+        shape (..., 3) evaluate many hexahedra at once.
+
+    Returns
+    -------
+    V : float or array
+        The volume, or the array of volumes of shape (...)
     """
 
     p = np.average([x0, x1, x2, x3, x4, x5, x6, x7], axis=0)
@@ -204,16 +218,20 @@ def volumeHex_b(x0, x1, x2, x3, x4, x5, x6, x7, x0b, x1b, x2b, x3b, x4b, x5b, x6
     Parameters
     ----------
     x{0:7} : arrays of len 3
-        Arrays of defining the coordinates of the volume
+        Arrays of defining the coordinates of the volume. Stacks of
+        shape (..., 3) evaluate many hexahedra at once.
 
     Returns
     -------
     xb{0:7} : arrays of len 3
-        Derivatives of the volume wrt the points.
+        Derivatives of the volume wrt the points, accumulated in
+        place. These are missing the factor of 1/6 applied in
+        volumeHex. The seeds may be overlapping views of the same
+        array, e.g. shifted slices of a structured grid of points.
     """
 
     p = np.average([x0, x1, x2, x3, x4, x5, x6, x7], axis=0)
-    pb = np.zeros(3)
+    pb = np.zeros_like(p)
     volumePyramid_b(x0, x1, x3, x2, p, x0b, x1b, x3b, x2b, pb)
     volumePyramid_b(x0, x2, x6, x4, p, x0b, x2b, x6b, x4b, pb)
     volumePyramid_b(x0, x4, x5, x1, p, x0b, x4b, x5b, x1b, pb)
@@ -216,3 +216,72 @@ def pointReduceBruteForce(points, nodeTol=1e-4):
             link.append(j + 1)
 
     return np.array(uniquePoints), np.array(link)
+
+
+def uniqueEntityIndex(nodes, midPts, tol):
+    """Array based equivalent of calling :meth:`uniqueIndex` on a list of
+    EdgeCmpObject or FaceCmpObject entities. Entities are the same if
+    they share the same (sorted) nodes and their midpoints are within
+    tol of each other.
+
+    Parameters
+    ----------
+    nodes : int array of size (N, nNodes)
+        The sorted node numbers of each entity
+    midPts : array of size (N, 3)
+        The midpoint of each entity
+    tol : float
+        Tolerance on the midpoint distance
+
+    Returns
+    -------
+    first : int array
+        For each unique entity, the index of its first occurrence in
+        the original list. The unique entities are in the same
+        (sorted) order as produced by :meth:`uniqueIndex`.
+    link : int array of size N
+        Index of each original entity in the reduced list
+    """
+    nodes = np.asarray(nodes)
+    midPts = np.asarray(midPts)
+    N = len(nodes)
+
+    # Group the entities by their nodes. np.unique sorts the rows
+    # lexicographically, which is the same order the comparison objects use
+    _, groupFirst, group = np.unique(nodes, axis=0, return_index=True, return_inverse=True)
+    group = group.flatten()
+    nGroup = len(groupFirst)
+
+    # In almost all cases the entities sharing nodes are the same entity.
+    # Only the groups where a midpoint differs need to be split up.
+    cluster = np.zeros(N, "intc")
+    mismatch = np.linalg.norm(midPts - midPts[groupFirst[group]], axis=1) >= tol
+    for iGroup in np.unique(group[mismatch]):
+        members = np.where(group == iGroup)[0]
+        reps = []
+        memberCluster = []
+        for member in members:
+            for iRep, rep in enumerate(reps):
+                if eDist(midPts[member], midPts[rep]) < tol:
+                    memberCluster.append(iRep)
+                    break
+            else:
+                memberCluster.append(len(reps))
+                reps.append(member)
+
+        # Distinct entities with the same nodes are ordered by midpoint
+        repPts = midPts[reps]
+        rank = np.zeros(len(reps), "intc")
+        rank[np.lexsort((repPts[:, 2], repPts[:, 1], repPts[:, 0]))] = np.arange(len(reps))
+        cluster[members] = rank[memberCluster]
+
+    # Number of unique entities in each group gives the offsets
+    nCluster = np.zeros(nGroup, "intc")
+    np.maximum.at(nCluster, group, cluster + 1)
+    offset = np.zeros(nGroup, "intc")
+    offset[1:] = np.cumsum(nCluster)[:-1]
+    link = offset[group] + cluster
+
+    _, first = np.unique(link, return_index=True)
+
+    return first, link
@@ -1,8 +1,12 @@
+# Standard Python modules
+import hashlib
+
 # External modules
 from mpi4py import MPI
 import numpy as np
 import openmdao.api as om
 from openmdao.api import AnalysisError
+from scipy import sparse
 
 # Local modules
 from .. import DVConstraints, DVGeometry, DVGeometryESP, DVGeometryVSP
@@ -14,6 +18,8 @@ class OM_DVGEOCOMP(om.ExplicitComponent):
         self.options.declare("file", default=None)
         self.options.declare("type", default=None)
         self.options.declare("options", default=None)
+        # assemble the partials with compute_partials instead of the matrix-free jacvec products
+        self.options.declare("use_partials", default=False)
 
     def setup(self):
         self.geo_type = self.options["type"]
@@ -49,8 +55,30 @@ class OM_DVGEOCOMP(om.ExplicitComponent):
         self.DVCon = DVConstraints()
         self.DVCon.setDVGeo(self.DVGeo)
         self.omPtSetList = []
+        # point set outputs that are only added to DVGeo in the first compute
+        self.omPendingPtSetList = []
+
+        # hashes of the DV inputs and the outputs of the last compute,
+        # these let us skip the work for the outputs that the changed DVs cannot affect
+        self.omDVHashes = {}
+        self.omPtSetCache = {}
+        self.omConCache = None
+        self.omPtSetDVs = {}
+        self.ptSetJacs = {}
+
+        if self.options["use_partials"]:
+            # OpenMDAO would otherwise use compute_jacvec_product because it is overridden
+            self.matrix_free = False
 
     def compute(self, inputs, outputs):
+        """
+        Update the point sets and the constraints for the current DVs.
+        A point set is only updated if one of the DVs that changed since
+        the last compute can move it. The DVs are selected per point set
+        and child FFD, not per config: every point set is updated with the
+        default config, so the DVs of other configs are not skipped for
+        config-specific point sets.
+        """
         # check for inputs that have been added but the points have not been added to dvgeo
         for var in inputs.keys():
             # check that the input name matches the convention for points
@@ -60,29 +88,94 @@ class OM_DVGEOCOMP(om.ExplicitComponent):
                 if var_out not in self.omPtSetList:
                     self.nom_addPointSet(inputs[var], var_out, add_output=False)
 
+        # find the DVs that changed since the last compute.
+        # the DV inputs are not distributed, so all procs agree on this
+        dvHashes = {}
+        for var in inputs.keys():
+            if var[:2] != "x_":
+                dvHashes[var] = hashlib.sha1(inputs[var].tobytes()).hexdigest()
+        changedDVs = {var for var in dvHashes if self.omDVHashes.get(var) != dvHashes[var]}
+        # the hashes are only kept if this compute finishes
+        self.omDVHashes = {}
+
         # inputs are the geometric design variables
-        self.DVGeo.setDesignVars(inputs)
+        if len(changedDVs) > 0:
+            self.DVGeo.setDesignVars(inputs)
 
         # ouputs are the coordinates of the pointsets we have
+        skippedPtSets = []
         for ptName in self.DVGeo.points:
             if ptName in self.omPtSetList:
-                # update this pointset and write it as output
-                outputs[ptName] = self.DVGeo.update(ptName).flatten()
+                # update this pointset if the changed DVs can move it and write it as output
+                ptSetDVs = self._getPointSetDVs(ptName)
+                if ptName not in self.omPtSetCache or ptSetDVs is None or not changedDVs.isdisjoint(ptSetDVs):
+                    self.omPtSetCache[ptName] = self.DVGeo.update(ptName).flatten()
+                    # the point set jacobian used in the forward mode is out of date as well
+                    self.ptSetJacs.pop(ptName, None)
+                else:
+                    skippedPtSets.append(ptName)
+                outputs[ptName] = self.omPtSetCache[ptName]
 
         # compute the DVCon constraint values
-        constraintfunc = dict()
-        self.DVCon.evalFunctions(constraintfunc, includeLinear=True)
+        if len(changedDVs) > 0 or self.omConCache is None:
+            constraintfunc = dict()
+            self.DVCon.evalFunctions(constraintfunc, includeLinear=True)
 
-        for constraintname in constraintfunc:
             # if any constraint returned a fail flag throw an error to OpenMDAO
             # all constraints need the same fail flag, no <name_> prefix
-            if constraintname == "fail":
+            if "fail" in constraintfunc:
                 raise AnalysisError("Analysis error in geometric constraints")
-            outputs[constraintname] = constraintfunc[constraintname]
-
-        # we ran a compute so the inputs changed. update the dvcon jac
-        # next time the jacvec product routine is called
-        self.update_jac = True
+            self.omConCache = constraintfunc
+
+            # the inputs changed. update the dvcon jac
+            # next time the jacvec product routine is called
+            self.update_jac = True
+
+        for constraintname in self.omConCache:
+            outputs[constraintname] = self.omConCache[constraintname]
+
+        if len(skippedPtSets) > 0 and len(changedDVs) > 0:
+            # the child FFD coefficients are only set from the parent in update.
+            # if neither the point sets nor the constraints needed one, do it here
+            # so that the children are consistent with the new DVs
+            if not any(self.DVGeo.updated.values()):
+                self.DVGeo.update(skippedPtSets[0])
+            # the skipped point sets did not move, so they are up to date for the solvers that query DVGeo
+            for geo in self.DVGeo.getFlattenedChildren():
+                for ptName in skippedPtSets:
+                    if ptName in geo.updated:
+                        geo.updated[ptName] = True
+
+        self.omDVHashes = dvHashes
+
+    def _getPointSetDVs(self, ptSetName):
+        # return the names of the DVs that can move the points in this point set, or None if all DVs can
+        if self.geo_type != "ffd" or self.DVGeo.useComposite:
+            return None
+
+        if ptSetName not in self.omPtSetDVs:
+            # the points are only embedded in the children that contain them
+            geos = self.DVGeo.getFlattenedChildren()
+            nEmbedded = np.zeros(len(geos), "intc")
+            for i, geo in enumerate(geos):
+                mask = geo.FFD.embeddedVolumes[ptSetName].mask
+                nEmbedded[i] = 1 if mask is None else len(mask)
+            self.comm.Allreduce(MPI.IN_PLACE, nEmbedded, op=MPI.SUM)
+
+            # the DVs of a child also move the points embedded in its own children
+            dvNames = set()
+            for geo in geos:
+                if any(nEmbedded[geos.index(child)] > 0 for child in geo.getFlattenedChildren()):
+                    for dvList in [
+                        geo.DV_listGlobal,
+                        geo.DV_listLocal,
+                        geo.DV_listSectionLocal,
+                        geo.DV_listSpanwiseLocal,
+                    ]:
+                        dvNames.update(dvList.keys())
+            self.omPtSetDVs[ptSetName] = dvNames
+
+        return self.omPtSetDVs[ptSetName]
 
     def nom_addChild(self, ffd_file):
         # can only add a child to a FFD DVGeo
@@ -107,6 +200,7 @@ class OM_DVGEOCOMP(om.ExplicitComponent):
             # no pointset info is provided, just do a generic i/o. We will add these points during the first compute
             self.add_input("x_%s_in" % discipline, distributed=True, shape_by_conn=True)
             self.add_output("x_%s0" % discipline, distributed=True, copy_shape="x_%s_in" % discipline)
+            self.omPendingPtSetList.append("x_%s0" % discipline)
 
         else:
             # we are provided with points. we can do the full initialization now
@@ -292,11 +386,145 @@ class OM_DVGEOCOMP(om.ExplicitComponent):
         # constraint needs a triangulated reference surface at initialization
         self.DVCon.setSurface(surface, name=name, addToDVGeo=addToDVGeo, DVGeoName=DVGeoName, surfFormat=surfFormat)
 
+    def setup_partials(self):
+        if not self.options["use_partials"]:
+            return
+
+        if self.DVGeo.useComposite:
+            raise RuntimeError("Composite DVs are not supported with use_partials, use the matrix-free mode instead")
+
+        dvNames = self.DVGeo.getVarNames()
+        self.omDVList = dvNames
+
+        # the linear constraints have constant sparse jacobians,
+        # the constraints of each DV are stacked in the output
+        linearSens = {}
+        for key in self.DVCon.linearCon:
+            self.DVCon.linearCon[key].evalFunctionsSens(linearSens)
+        for conName in linearSens:
+            offset = 0
+            for dvName, dcdx in linearSens[conName].items():
+                rows, cols = np.nonzero(dcdx)
+                self.declare_partials(conName, dvName, rows=rows + offset, cols=cols, val=dcdx[rows, cols])
+                offset += dcdx.shape[0]
+
+        # the other constraints are dense with respect to the DVs
+        funcs = {}
+        self.DVCon.evalFunctions(funcs)
+        self.omConList = [conName for conName in funcs if conName != "fail"]
+        for conName in self.omConList:
+            self.declare_partials(conName, dvNames)
+
+        # Points depend on the local DVs through the FFD embedding, which does not change.
+        # A point is declared to depend on a DV if any of its coordinates does,
+        # so that the pattern does not depend on the values at this design.
+        # The global DVs are dense.
+        globalDVs = set()
+        if self.geo_type == "ffd":
+            for geoObj in self.DVGeo.getFlattenedChildren():
+                globalDVs.update(geoObj.DV_listGlobal)
+
+        self.omPtSetPartials = {}
+        for ptSetName in self.omPtSetList + self.omPendingPtSetList:
+            self.omPtSetPartials[ptSetName] = {}
+            if ptSetName in self.omPtSetList and self.geo_type == "ffd":
+                jac = self._getPointSetJacobian(ptSetName)
+            else:
+                jac = {}
+            for dvName in dvNames:
+                if dvName in jac and dvName not in globalDVs:
+                    J = jac[dvName].tocoo()
+                    pts, cols = np.unique(np.column_stack((J.row // 3, J.col)), axis=0).T
+                    rows = (3 * pts[:, None] + np.arange(3)).ravel()
+                    cols = np.repeat(cols, 3)
+                    self.declare_partials(ptSetName, dvName, rows=rows, cols=cols)
+                    self.omPtSetPartials[ptSetName][dvName] = (rows, cols)
+                else:
+                    self.declare_partials(ptSetName, dvName)
+                    self.omPtSetPartials[ptSetName][dvName] = None
+
+    def _getPointSetJacobian(self, ptSetName):
+        """
+        Return the jacobian of the local coordinates of a point set with
+        respect to each DV, as a dict of (3 * nPts, nVal) matrices. These
+        are sparse for FFD-based DVGeo objects and dense otherwise.
+        The coordinate transformation of the point set, if any, is applied
+        to the columns as in totalSensitivityProd.
+        """
+        if self.geo_type == "ffd":
+            self.DVGeo.computeTotalJacobian(ptSetName)
+            JT = self.DVGeo.JT[ptSetName]
+            if JT is None:
+                J = sparse.csc_matrix((3 * len(self.DVGeo.points[ptSetName]), self.DVGeo.getNDV()))
+            else:
+                J = JT.T.tocsc()
+                if ptSetName in self.DVGeo.coordXfer:
+                    J = self._transferJacobian(J, self.DVGeo.coordXfer[ptSetName])
+            return {dvName: sparse.csr_matrix(dXdx) for dvName, dXdx in self.DVGeo.convertSensitivityToDict(J).items()}
+
+        # the surface jacobians of ESP and VSP are dense, this makes sure it is up to date
+        self.DVGeo.totalSensitivityProd({}, ptSetName)
+        jac = self.DVGeo.pointSets[ptSetName].jac
+        dvJac = {}
+        i = 0
+        for dvName, dv in self.DVGeo.DVs.items():
+            dvJac[dvName] = jac[:, i : i + dv.nVal]
+            i += dv.nVal
+        return dvJac
+
+    def _transferJacobian(self, J, coordXfer):
+        """
+        Apply a coordinate transformation to each column of a sparse
+        (3 * nPts, nDV) point set jacobian. The columns are vectors, so
+        only the rotation is applied. The transformation mixes the three
+        coordinates of a point, so it is applied to all the coordinates of
+        the points that a column touches.
+        """
+        rows = []
+        cols = []
+        vals = []
+        for iDV in range(J.shape[1]):
+            colRows = J.indices[J.indptr[iDV] : J.indptr[iDV + 1]]
+            if len(colRows) == 0:
+                continue
+            pts = np.unique(colRows // 3)
+            index = (3 * pts[:, None] + np.arange(3)).ravel()
+            dXdx = J[index, iDV].toarray().reshape(len(pts), 3)
+            rows.append(index)
+            cols.append(np.full(len(index), iDV))
+            vals.append(np.asarray(coordXfer(dXdx, mode="fwd", applyDisplacement=False)).ravel())
+
+        if len(rows) == 0:
+            return J
+        return sparse.csc_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=J.shape)
+
+    def compute_partials(self, inputs, partials):
+        if not self.options["use_partials"]:
+            return
+
+        # the linear constraint partials are constant and were set in setup_partials
+        funcsSens = {}
+        self.DVCon.evalFunctionsSens(funcsSens)
+        for conName in self.omConList:
+            for dvName, dcdx in funcsSens[conName].items():
+                if dvName in self.omDVList:
+                    partials[conName, dvName] = dcdx
+
+        for ptSetName, ptSetPartials in self.omPtSetPartials.items():
+            jac = self._getPointSetJacobian(ptSetName)
+            for dvName, pattern in ptSetPartials.items():
+                dXdx = jac[dvName]
+                if pattern is None:
+                    partials[ptSetName, dvName] = dXdx.toarray() if sparse.issparse(dXdx) else dXdx
+                else:
+                    rows, cols = pattern
+                    partials[ptSetName, dvName] = np.asarray(dXdx[rows, cols]).ravel()
+
     def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
         # only do the computations when we have more than zero entries in d_inputs in the reverse mode
         ni = len(list(d_inputs.keys()))
 
-        if mode == "rev" and ni > 0:
+        if ni > 0:
             # this flag will be set to True after every compute call.
             # if it is true, we assume the design has changed so we re-run the sensitivity update
             # there can be hundreds of calls to this routine due to thickness constraints,
@@ -308,6 +536,10 @@ class OM_DVGEOCOMP(om.ExplicitComponent):
                 # set the flag to False so we dont run the update again if this is called w/o a compute in between
                 self.update_jac = False
 
+        if mode == "fwd" and ni > 0:
+            self._compute_jacvec_product_fwd(d_inputs, d_outputs)
+
+        if mode == "rev" and ni > 0:
             for constraintname in self.constraintfuncsens:
                 for dvname in self.constraintfuncsens[constraintname]:
                     if dvname in d_inputs:
@@ -349,3 +581,32 @@ class OM_DVGEOCOMP(om.ExplicitComponent):
                                 # in multiple objective seeds with totalSensitivity. we can remove the [0]
                                 # once we move back to totalSensitivityTransProd
                                 d_inputs[k] += xdotg[k][0]
+
+    def _compute_jacvec_product_fwd(self, d_inputs, d_outputs):
+        # the DV seeds are not distributed, so every proc sees the same seeds
+        dvNames = self.DVGeo.getVarNames(pyOptSparse=True)
+        seeds = {dvName: d_inputs[dvName] for dvName in dvNames if dvName in d_inputs and np.any(d_inputs[dvName])}
+        if len(seeds) == 0:
+            return
+
+        for constraintname in self.constraintfuncsens:
+            if constraintname in d_outputs:
+                for dvname, dcdx in self.constraintfuncsens[constraintname].items():
+                    if dvname in seeds:
+                        d_outputs[constraintname] += np.dot(dcdx, seeds[dvname])
+
+        # map the composite DV seeds to the DVGeo DVs, the mapping is linear
+        if self.DVGeo.useComposite and self.DVGeo.DVComposite.name in seeds:
+            seeds = self.DVGeo.mapXDictToDVGeo(seeds)
+
+        for ptSetName in self.DVGeo.ptSetNames:
+            if ptSetName in self.omPtSetList and ptSetName in d_outputs:
+                # the jacobians are kept until the next compute, so the
+                # following seeds are just products with the cached matrices.
+                # They include the coordinate transfer, as in the reverse mode
+                if ptSetName not in self.ptSetJacs:
+                    self.ptSetJacs[ptSetName] = self._getPointSetJacobian(ptSetName)
+                jac = self.ptSetJacs[ptSetName]
+                for dvName, seed in seeds.items():
+                    if dvName in jac:
+                        d_outputs[ptSetName] += jac[dvName].dot(seed)
@@ -1,6 +1,8 @@
 # Standard Python modules
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import copy
+import multiprocessing
 import os
 import warnings
 
@@ -18,6 +20,22 @@ from .. import geo_utils, pyBlock, pyNetwork
 from .BaseDVGeo import BaseDVGeometry
 from .designVars import geoDVComposite, geoDVGlobal, geoDVLocal, geoDVSectionLocal, geoDVSpanwiseLocal
 
+# The DVGeometry state owned by each finite difference worker process.
+# Workers are forked, so they inherit a private copy of the object without
+# pickling it. The workers never call MPI and exit without finalizing it,
+# which is only safe when this process is the single rank of the job.
+_fdWorkerState = None
+
+
+def _fdWorkerInit(state):
+    global _fdWorkerState
+    _fdWorkerState = state
+
+
+def _fdWorkerColumns(ptSetName, columns, h, config):
+    DVGeo, coords0, refCoefs = _fdWorkerState
+    return DVGeo._computeFDColumns(ptSetName, columns, coords0, h, config, refCoefs)
+
 
 class DVGeometry(BaseDVGeometry):
     r"""
@@ -2181,13 +2199,15 @@ class DVGeometry(BaseDVGeometry):
 
         Parameters
         ----------
-        dIdpt : array of size (Npt, 3) or (N, Npt, 3)
+        dIdpt : array of size (Npt, 3) or (N, Npt, 3), or sparse matrix of size (N, 3 * Npt)
 
             This is the total derivative of the objective or function
             of interest with respect to the coordinates in
             'ptSetName'. This can be a single array of size (Npt, 3)
             **or** a group of N vectors of size (Npt, 3, N). If you
-            have many to do, it is faster to do many at once.
+            have many to do, it is faster to do many at once. If each
+            function only depends on a few points, the N vectors can
+            be given as the rows of a scipy sparse matrix.
 
         ptSetName : str
             The name of set of points we are dealing with
@@ -2215,8 +2235,12 @@ class DVGeometry(BaseDVGeometry):
         internally and should not be changed by the user.
         """
 
+        # the coordinate transformation is applied to the dense array
+        if sparse.issparse(dIdpt) and ptSetName in self.coordXfer:
+            dIdpt = dIdpt.toarray().reshape(dIdpt.shape[0], -1, 3)
+
         # Make dIdpt at least 3D
-        if len(dIdpt.shape) == 2:
+        if not sparse.issparse(dIdpt) and len(dIdpt.shape) == 2:
             dIdpt = np.array([dIdpt])
         N = dIdpt.shape[0]
 
@@ -2234,9 +2258,13 @@ class DVGeometry(BaseDVGeometry):
         # now that we have self.JT compute the Mat-Mat multiplication
         nDV = self._getNDV()
         dIdx_local = np.zeros((N, nDV), "d")
-        for i in range(N):
+        if sparse.issparse(dIdpt):
             if self.JT[ptSetName] is not None:
-                dIdx_local[i, :] = self.JT[ptSetName].dot(dIdpt[i, :, :].flatten())
+                dIdx_local[:, :] = (sparse.csr_matrix(dIdpt) @ self.JT[ptSetName].T).toarray()
+        else:
+            for i in range(N):
+                if self.JT[ptSetName] is not None:
+                    dIdx_local[i, :] = self.JT[ptSetName].dot(dIdpt[i, :, :].flatten())
 
         if comm:  # If we have a comm, globaly reduce with sum
             dIdx = comm.allreduce(dIdx_local, op=MPI.SUM)
@@ -3689,12 +3717,31 @@ class DVGeometry(BaseDVGeometry):
 
             self.coef = self.coef.real.astype("d")
 
-    def computeTotalJacobianFD(self, ptSetName, config=None):
+    def computeTotalJacobianFD(self, ptSetName, config=None, nProc=1, comm=None, progress=False):
         """This function takes the total derivative of an objective,
         I, with respect the points controlled on this processor using FD.
         We take the transpose prodducts and mpi_allreduce them to get the
         resulting value on each processor. Note that this function is slow
         and should eventually be replaced by an analytic version.
+
+        Parameters
+        ----------
+        ptSetName : str
+            The name of the point set
+        config : str or list
+            The configuration to compute the Jacobian for
+        nProc : int
+            The number of worker processes to distribute the design
+            variable columns over. Each worker is forked from this process
+            and perturbs its own copy of the DVGeometry. Forking a process
+            that belongs to a multi-rank MPI job is not safe, so nProc > 1
+            is only allowed when MPI.COMM_WORLD has a single rank. Use comm
+            to distribute the columns in MPI runs instead.
+        comm : MPI.Intracomm
+            If given, the columns are also distributed over the ranks of
+            comm. The point set must then be the same on all ranks.
+        progress : bool
+            Flag to print the number of computed columns as they finish
         """
 
         self._finalize()
@@ -3718,102 +3765,161 @@ class DVGeometry(BaseDVGeometry):
         for child in self.children:
             child.nPts[ptSetName] = self.nPts[ptSetName]
 
-        DVGlobalCount, DVLocalCount, DVSecLocCount, DVSpanLocCount = self._getDVOffsets()
-
         h = 1e-6
 
-        self.JT[ptSetName] = np.zeros([self.nDV_T, self.nPts[ptSetName]])
-
-        for key in self.DV_listGlobal:
-            for j in range(self.DV_listGlobal[key].nVal):
-                if self.isChild:
-                    self.FFD.coef = refFFDCoef.copy()
-                    self.coef = refCoef.copy()
-                    self.refAxis.coef = refCoef.copy()
-                    self.refAxis._updateCurveCoef()
-
-                refVal = self.DV_listGlobal[key].value[j]
-
-                self.DV_listGlobal[key].value[j] += h
-
-                coordsph = self.update(ptSetName, childDelta=False, config=config).flatten()
-
-                deriv = (coordsph - coords0) / h
-                self.JT[ptSetName][DVGlobalCount, :] = deriv
-
-                DVGlobalCount += 1
-                self.DV_listGlobal[key].value[j] = refVal
-
-        for key in self.DV_listSpanwiseLocal:
-            for j in range(self.DV_listSpanwiseLocal[key].nVal):
-                if self.isChild:
-                    self.FFD.coef = refFFDCoef.copy()
-                    self.coef = refCoef.copy()
-                    self.refAxis.coef = refCoef.copy()
-                    self.refAxis._updateCurveCoef()
+        JT = np.zeros([self.nDV_T, self.nPts[ptSetName]])
+        refCoefs = (refFFDCoef, refCoef) if self.isChild else None
+        rows, derivs = self._computeFDJacobian(
+            ptSetName, coords0, h, config=config, refCoefs=refCoefs, nProc=nProc, comm=comm, progress=progress
+        )
+        JT[rows] = derivs
+        self.JT[ptSetName] = JT
 
-                refVal = self.DV_listSpanwiseLocal[key].value[j]
+        for iChild in range(len(self.children)):
+            child = self.children[iChild]
+            child._finalize()
 
-                self.DV_listSpanwiseLocal[key].value[j] += h
-                coordsph = self.update(ptSetName, childDelta=False, config=config).flatten()
+            # In the updates applied previously, the FFD points on the children
+            # will have been set as deltas. We need to set them as absolute
+            # coordinates based on the changes in the parent before moving down
+            # to the next level
+            self.applyToChild(iChild)
 
-                deriv = (coordsph - coords0) / h
-                self.JT[ptSetName][DVSpanLocCount, :] = deriv
+            # Now get jacobian from child and add to parent jacobian
+            child.computeTotalJacobianFD(ptSetName, config=config, nProc=nProc, comm=comm, progress=progress)
+            self.JT[ptSetName] = self.JT[ptSetName] + child.JT[ptSetName]
 
-                DVSpanLocCount += 1
-                self.DV_listSpanwiseLocal[key].value[j] = refVal
+    def _getFDColumns(self):
+        """
+        Return a list of (DV list name, key, index, JT row) for every
+        design variable of this DVGeo, not including the children
+        """
+        DVGlobalCount, DVLocalCount, DVSecLocCount, DVSpanLocCount = self._getDVOffsets()
 
-        for key in self.DV_listSectionLocal:
-            for j in range(self.DV_listSectionLocal[key].nVal):
-                if self.isChild:
-                    self.FFD.coef = refFFDCoef.copy()
-                    self.coef = refCoef.copy()
-                    self.refAxis.coef = refCoef.copy()
-                    self.refAxis._updateCurveCoef()
+        columns = []
+        for DVListName, count in [
+            ("DV_listGlobal", DVGlobalCount),
+            ("DV_listSpanwiseLocal", DVSpanLocCount),
+            ("DV_listSectionLocal", DVSecLocCount),
+            ("DV_listLocal", DVLocalCount),
+        ]:
+            DVList = getattr(self, DVListName)
+            for key in DVList:
+                for j in range(DVList[key].nVal):
+                    columns.append((DVListName, key, j, count))
+                    count += 1
+
+        return columns
+
+    def _computeFDColumns(self, ptSetName, columns, coords0, h, config, refCoefs):
+        """
+        Compute the forward difference derivative of the point set with
+        respect to each of the given design variable columns
+        """
+        derivs = np.zeros((len(columns), len(coords0)))
+        for i, (DVListName, key, j, _) in enumerate(columns):
+            if refCoefs is not None:
+                self.FFD.coef = refCoefs[0].copy()
+                self.coef = refCoefs[1].copy()
+                self.refAxis.coef = refCoefs[1].copy()
+                self.refAxis._updateCurveCoef()
 
-                refVal = self.DV_listSectionLocal[key].value[j]
+            DV = getattr(self, DVListName)[key]
+            refVal = DV.value[j]
 
-                self.DV_listSectionLocal[key].value[j] += h
+            DV.value[j] += h
+            try:
                 coordsph = self.update(ptSetName, childDelta=False, config=config).flatten()
+            finally:
+                DV.value[j] = refVal
 
-                deriv = (coordsph - coords0) / h
-                self.JT[ptSetName][DVSecLocCount, :] = deriv
+            derivs[i] = (coordsph - coords0) / h
 
-                DVSecLocCount += 1
-                self.DV_listSectionLocal[key].value[j] = refVal
+        return derivs
 
-        for key in self.DV_listLocal:
-            for j in range(self.DV_listLocal[key].nVal):
-                if self.isChild:
-                    self.FFD.coef = refFFDCoef.copy()
-                    self.coef = refCoef.copy()
-                    self.refAxis.coef = refCoef.copy()
-                    self.refAxis._updateCurveCoef()
-
-                refVal = self.DV_listLocal[key].value[j]
-
-                self.DV_listLocal[key].value[j] += h
-                coordsph = self.update(ptSetName, childDelta=False, config=config).flatten()
+    def _computeFDJacobian(self, ptSetName, coords0, h, config=None, refCoefs=None, nProc=1, comm=None, progress=False):
+        """
+        Driver for the finite difference Jacobian of this DVGeo's own
+        design variables. The columns are split over the ranks of comm and
+        then over nProc forked worker processes, each of which owns a copy
+        of this object. This object's design variables are never modified
+        when running in parallel, so an interrupted run leaves it
+        untouched and can simply be restarted.
 
-                deriv = (coordsph - coords0) / h
-                self.JT[ptSetName][DVLocalCount, :] = deriv
+        Returns
+        -------
+        rows : int array
+            The JT rows that were computed
+        derivs : array of size (len(rows), len(coords0))
+            The derivative of the points with respect to each row's DV
+        """
+        if nProc > 1 and MPI.COMM_WORLD.size > 1:
+            raise Error(
+                "Finite difference worker processes (nProc > 1) cannot be forked in an MPI run with more than "
+                + "one rank. Use comm to distribute the columns over the ranks instead."
+            )
 
-                DVLocalCount += 1
-                self.DV_listLocal[key].value[j] = refVal
+        columns = self._getFDColumns()
+        nCol = len(columns)
+        rows = np.array([column[3] for column in columns], "intc")
+
+        if comm is not None and comm.size > 1:
+            # Every rank needs the same points to share the columns
+            allCoords = comm.allgather(coords0)
+            for coords in allCoords:
+                if len(coords) != len(coords0) or not np.array_equal(coords, coords0):
+                    raise Error("Parallel finite differences over comm require the same point set on all ranks.")
+            myCols = np.arange(comm.rank, nCol, comm.size)
+        else:
+            comm = None
+            myCols = np.arange(nCol)
+
+        myDerivs = np.zeros((len(myCols), len(coords0)))
+        showProgress = progress and (comm is None or comm.rank == 0)
+        if nProc > 1 and len(myCols) > 1:
+            # Split the columns into chunks so that the workers are kept busy
+            chunkSize = max(1, len(myCols) // (4 * nProc))
+            chunks = [myCols[i : i + chunkSize] for i in range(0, len(myCols), chunkSize)]
+
+            executor = ProcessPoolExecutor(
+                max_workers=nProc,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_fdWorkerInit,
+                initargs=((self, coords0, refCoefs),),
+            )
+            try:
+                futures = {}
+                for iChunk, chunk in enumerate(chunks):
+                    future = executor.submit(_fdWorkerColumns, ptSetName, [columns[iCol] for iCol in chunk], h, config)
+                    futures[future] = iChunk
+                nDone = 0
+                for future in as_completed(futures):
+                    iChunk = futures[future]
+                    start = iChunk * chunkSize
+                    myDerivs[start : start + len(chunks[iChunk])] = future.result()
+                    nDone += len(chunks[iChunk])
+                    if showProgress:
+                        print(f"Finite difference columns: {nDone} of {len(myCols)} computed")
+            except BaseException:
+                # Don't leave workers running if we are interrupted
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            executor.shutdown()
+        else:
+            for i, iCol in enumerate(myCols):
+                myDerivs[i] = self._computeFDColumns(ptSetName, [columns[iCol]], coords0, h, config, refCoefs)[0]
+                if showProgress:
+                    print(f"Finite difference columns: {i + 1} of {len(myCols)} computed")
 
-        for iChild in range(len(self.children)):
-            child = self.children[iChild]
-            child._finalize()
+        if comm is None:
+            return rows, myDerivs
 
-            # In the updates applied previously, the FFD points on the children
-            # will have been set as deltas. We need to set them as absolute
-            # coordinates based on the changes in the parent before moving down
-            # to the next level
-            self.applyToChild(iChild)
+        # Every rank gets all of the columns
+        derivs = np.zeros((nCol, len(coords0)))
+        for iRank, rankDerivs in enumerate(comm.allgather(myDerivs)):
+            derivs[iRank :: comm.size] = rankDerivs
 
-            # Now get jacobian from child and add to parent jacobian
-            child.computeTotalJacobianFD(ptSetName, config=config)
-            self.JT[ptSetName] = self.JT[ptSetName] + child.JT[ptSetName]
+        return rows, derivs
 
     def _attachedPtJacobian(self, config):
         """
@@ -4290,7 +4396,7 @@ class DVGeometry(BaseDVGeometry):
 
         return vol_counter
 
-    def checkDerivatives(self, ptSetName):
+    def checkDerivatives(self, ptSetName, nProc=1, comm=None):
         """
         Run a brute force FD check on ALL design variables
 
@@ -4298,6 +4404,12 @@ class DVGeometry(BaseDVGeometry):
         ----------
         ptSetName : str
             name of the point set to check
+        nProc : int
+            The number of worker processes used for the finite differences.
+            See :meth:`computeTotalJacobianFD`.
+        comm : MPI.Intracomm
+            Optional communicator to also distribute the finite
+            differences over. The point set must be the same on all ranks.
         """
 
         print("Computing Analytic Jacobian...")
@@ -4308,143 +4420,51 @@ class DVGeometry(BaseDVGeometry):
         self.computeTotalJacobian(ptSetName)
         # self.computeTotalJacobian_fast(ptSetName)
 
-        Jac = copy.deepcopy(self.JT[ptSetName])
-
-        # Global Variables
-        print("========================================")
-        print("             Global Variables           ")
-        print("========================================")
+        Jac = self.JT[ptSetName]
+        if sparse.issparse(Jac):
+            Jac = Jac.toarray()
+        else:
+            Jac = copy.deepcopy(Jac)
 
         if self.isChild:
-            refFFDCoef = copy.copy(self.FFD.coef)
-            refCoef = copy.copy(self.coef)
+            refCoefs = (copy.copy(self.FFD.coef), copy.copy(self.coef))
+        else:
+            refCoefs = None
 
-        coords0 = self.update(ptSetName).flatten()
+        coords0 = self.update(ptSetName, childDelta=False).flatten()
 
         h = 1e-6
 
-        # figure out the split between local and global Variables
-        DVCountGlob, DVCountLoc, DVCountSecLoc, DVCountSpanLoc = self._getDVOffsets()
-
-        for key in self.DV_listGlobal:
-            for j in range(self.DV_listGlobal[key].nVal):
-                print("========================================")
-                print("      GlobalVar(%s), Value(%d)" % (key, j))
-                print("========================================")
-
-                if self.isChild:
-                    self.FFD.coef = refFFDCoef.copy()
-                    self.coef = refCoef.copy()
-                    self.refAxis.coef = self.coef.copy()
-                    self.refAxis._updateCurveCoef()
-
-                refVal = self.DV_listGlobal[key].value[j]
-
-                self.DV_listGlobal[key].value[j] += h
-
-                coordsph = self.update(ptSetName).flatten()
-
-                deriv = (coordsph - coords0) / h
-
-                for ii in range(len(deriv)):
-                    relErr = (deriv[ii] - Jac[DVCountGlob, ii]) / (1e-16 + Jac[DVCountGlob, ii])
-                    absErr = deriv[ii] - Jac[DVCountGlob, ii]
-
-                    if abs(relErr) > h * 10 and abs(absErr) > h * 10:
-                        print(ii, deriv[ii], Jac[DVCountGlob, ii], relErr, absErr)
-
-                DVCountGlob += 1
-                self.DV_listGlobal[key].value[j] = refVal
-
-        for key in self.DV_listLocal:
-            for j in range(self.DV_listLocal[key].nVal):
-                print("========================================")
-                print("      LocalVar(%s), Value(%d)           " % (key, j))
-                print("========================================")
-
-                if self.isChild:
-                    self.FFD.coef = refFFDCoef.copy()
-                    self.coef = refCoef.copy()
-                    self.refAxis.coef = self.coef.copy()
-                    self.refAxis._updateCurveCoef()
-
-                refVal = self.DV_listLocal[key].value[j]
-
-                self.DV_listLocal[key].value[j] += h
-                coordsph = self.update(ptSetName).flatten()
-
-                deriv = (coordsph - coords0) / h
+        rows, derivs = self._computeFDJacobian(ptSetName, coords0, h, refCoefs=refCoefs, nProc=nProc, comm=comm)
+        columns = self._getFDColumns()
 
-                for ii in range(len(deriv)):
-                    relErr = (deriv[ii] - Jac[DVCountLoc, ii]) / (1e-16 + Jac[DVCountLoc, ii])
-                    absErr = deriv[ii] - Jac[DVCountLoc, ii]
-
-                    if abs(relErr) > h and abs(absErr) > h:
-                        print(ii, deriv[ii], Jac[DVCountLoc, ii], relErr, absErr)
-
-                DVCountLoc += 1
-                self.DV_listLocal[key].value[j] = refVal
-
-        for key in self.DV_listSectionLocal:
-            for j in range(self.DV_listSectionLocal[key].nVal):
+        for DVListName, label, tol in [
+            ("DV_listGlobal", "GlobalVar", h * 10),
+            ("DV_listLocal", "LocalVar", h),
+            ("DV_listSectionLocal", "SectionLocalVar", h),
+            ("DV_listSpanwiseLocal", "SpanwiseLocalVar", h),
+        ]:
+            if DVListName == "DV_listGlobal":
                 print("========================================")
-                print("   SectionLocalVar(%s), Value(%d)       " % (key, j))
+                print("             Global Variables           ")
                 print("========================================")
 
-                if self.isChild:
-                    self.FFD.coef = refFFDCoef.copy()
-                    self.coef = refCoef.copy()
-                    self.refAxis.coef = self.coef.copy()
-                    self.refAxis._updateCurveCoef()
-
-                refVal = self.DV_listSectionLocal[key].value[j]
-
-                self.DV_listSectionLocal[key].value[j] += h
-                coordsph = self.update(ptSetName).flatten()
-
-                deriv = (coordsph - coords0) / h
-
-                for ii in range(len(deriv)):
-                    relErr = (deriv[ii] - Jac[DVCountSecLoc, ii]) / (1e-16 + Jac[DVCountSecLoc, ii])
-                    absErr = deriv[ii] - Jac[DVCountSecLoc, ii]
-
-                    if abs(relErr) > h and abs(absErr) > h:
-                        print(ii, deriv[ii], Jac[DVCountSecLoc, ii], relErr, absErr)
-
-                DVCountSecLoc += 1
-                self.DV_listSectionLocal[key].value[j] = refVal
-
-        for key in self.DV_listSpanwiseLocal:
-            for j in range(self.DV_listSpanwiseLocal[key].nVal):
+            for iCol, (colListName, key, j, row) in enumerate(columns):
+                if colListName != DVListName:
+                    continue
                 print("========================================")
-                print("   SpanwiseLocalVar(%s), Value(%d)       " % (key, j))
+                print("      %s(%s), Value(%d)" % (label, key, j))
                 print("========================================")
 
-                if self.isChild:
-                    self.FFD.coef = refFFDCoef.copy()
-                    self.coef = refCoef.copy()
-                    self.refAxis.coef = self.coef.copy()
-                    self.refAxis._updateCurveCoef()
+                deriv = derivs[iCol]
+                relErr = (deriv - Jac[row]) / (1e-16 + Jac[row])
+                absErr = deriv - Jac[row]
 
-                refVal = self.DV_listSpanwiseLocal[key].value[j]
-
-                self.DV_listSpanwiseLocal[key].value[j] += h
-                coordsph = self.update(ptSetName).flatten()
-
-                deriv = (coordsph - coords0) / h
-
-                for ii in range(len(deriv)):
-                    relErr = (deriv[ii] - Jac[DVCountSpanLoc, ii]) / (1e-16 + Jac[DVCountSpanLoc, ii])
-                    absErr = deriv[ii] - Jac[DVCountSpanLoc, ii]
-
-                    if abs(relErr) > h and abs(absErr) > h:
-                        print(ii, deriv[ii], Jac[DVCountSpanLoc, ii], relErr, absErr)
-
-                DVCountSpanLoc += 1
-                self.DV_listSpanwiseLocal[key].value[j] = refVal
+                for ii in np.where((np.abs(relErr) > tol) & (np.abs(absErr) > tol))[0]:
+                    print(ii, deriv[ii], Jac[row, ii], relErr[ii], absErr[ii])
 
         for child in self.children:
-            child.checkDerivatives(ptSetName)
+            child.checkDerivatives(ptSetName, nProc=nProc, comm=comm)
 
     def printDesignVariables(self):
         """
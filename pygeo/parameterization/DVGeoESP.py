@@ -1,6 +1,7 @@
 # Standard Python modules
 from collections import OrderedDict
 from contextlib import contextmanager
+import hashlib
 import os
 import sys
 import time
@@ -94,6 +95,25 @@ class DVGeometryESP(DVGeoSketch):
         Disallow projections to edges in the ESP topology (only allow surfaces).
         This can sometimes fix weird mesh deformation issues near the mesh boundaries.
         Default False.
+    linearDVCheck : int
+        Number of consecutive surface Jacobian evaluations at changed designs over which the column of a
+        design variable must stay the same before it is treated as linear (design independent) and cached.
+        Evaluations at an unchanged design are not counted.
+        Default 0 disables the detection. Variables can also be declared linear in :func:`addVariable()`.
+    linearDVTol : float
+        Relative tolerance used to decide if a Jacobian column stayed the same.
+        Default 1e-6.
+    analyticSens : bool
+        Compute the surface Jacobian from the OpenCSM sensitivities (surface velocities) instead of
+        finite differences. OpenCSM uses analytic sensitivities where the branches support them and
+        finite differences internally otherwise. Design variables for which the sensitivity computation
+        fails fall back to the finite difference with step ``dh``.
+        The velocities are evaluated at fixed parametric coordinates, but the points are rescaled to the
+        parametric range of their face or edge when the model is updated. The velocities therefore miss the
+        motion of the points for variables that change these ranges. The first Jacobian evaluation uses finite
+        differences for all variables and records which ones change the ranges, and those variables keep
+        using finite differences. This assumes that whether a variable changes the ranges does not depend on the design.
+        Default False.
 
     Examples
     --------
@@ -118,6 +138,9 @@ class DVGeometryESP(DVGeoSketch):
         exclude_edge_projections=False,
         ulimits=None,
         vlimits=None,
+        linearDVCheck=0,
+        linearDVTol=1e-6,
+        analyticSens=False,
     ):
         if not ocsmImported:
             raise ImportError("OCSM and pyOCSM must be installed to use DVGeometryESP.")
@@ -128,6 +151,7 @@ class DVGeometryESP(DVGeoSketch):
         super().__init__(fileName=fileName, comm=comm, scale=scale, projTol=projTol)
 
         self.maxproc = maxproc
+        self.analyticSens = analyticSens
         self.esp = True
 
         # will become a list of tuples with (DVName, localIndex) - used for finite difference load balancing
@@ -147,6 +171,19 @@ class DVGeometryESP(DVGeoSketch):
             self.vlimits = np.array([-99999.0, 99999.0])
         self.debug = debug
 
+        # Jacobian columns of linear design variables are cached between
+        # design changes
+        self.linearDVCheck = linearDVCheck
+        self.linearDVTol = linearDVTol
+        self.jacColumnCache = {}
+        self.jacColumnPrev = {}
+        self.jacColumnCount = {}
+        self.jacCacheKey = None
+        # DVs whose sensitivities fell back to finite differences in the last analytic Jacobian
+        self.fdFallbackDVs = []
+        # flags for the DVs that change the parametric ranges of the projected points' faces or edges
+        self.paramRangeDVs = {}
+
         t1 = time.time()
         # read the model
         self.espModel = ocsm.Ocsm(self.fileName)
@@ -862,7 +899,17 @@ class DVGeometryESP(DVGeoSketch):
         return dPt
 
     def addVariable(
-        self, desmptr_name, name=None, value=None, lower=None, upper=None, scale=1.0, rows=None, cols=None, dh=0.001
+        self,
+        desmptr_name,
+        name=None,
+        value=None,
+        lower=None,
+        upper=None,
+        scale=1.0,
+        rows=None,
+        cols=None,
+        dh=0.001,
+        linear=False,
     ):
         """
         Add an ESP design parameter to the DVGeo problem definition.
@@ -911,6 +958,10 @@ class DVGeometryESP(DVGeoSketch):
         dh : float
             Finite difference step size.
             Default 0.001.
+        linear : bool
+            Flag to declare that the surface points depend linearly on this parameter,
+            for example a translation. Its Jacobian columns are then only computed once and reused.
+            Default False.
         """
         # if name is none, use the desptmr name instead
         if name is not None:
@@ -982,7 +1033,9 @@ class DVGeometryESP(DVGeoSketch):
         for localInd in range(nVal):
             self.globalDVList.append((dvName, localInd))
 
-        self.DVs[dvName] = espDV(csmDesPmtr, dvName, value, lower, upper, scale, rows, cols, dh, globalStartInd)
+        self.DVs[dvName] = espDV(
+            csmDesPmtr, dvName, value, lower, upper, scale, rows, cols, dh, globalStartInd, linear=linear
+        )
 
     def printDesignVariables(self):
         """
@@ -1140,113 +1193,205 @@ class DVGeometryESP(DVGeoSketch):
             # built correctly
             return True
 
-    def _evaluatePoints(self, u, v, t, uvlimits0, tlimits0, bodyID, faceID, edgeID, nPts):
-        points = np.zeros((nPts, 3))
-        for ptidx in range(nPts):
-            # check if on an edge or surface
-            bid = bodyID[ptidx]
-            fid = faceID[ptidx]
-            eid = edgeID[ptidx]
+    def _getDVPmtr(self, iDV):
+        """
+        Get the ESP parameter index, row, and column of a global design variable index.
+        """
+        dvName, dvLocalIndex = self.globalDVList[iDV]
+        dv = self.DVs[dvName]
+        rowIdx = dvLocalIndex // len(dv.cols)
+        colIdx = dvLocalIndex % len(dv.cols)
+        return dv.csmDesPmtr.pmtrIndex, dv.rows[rowIdx], dv.cols[colIdx]
 
+    def _computeVelocities(self, iDV, ug, vg, tg, uvlimitsg, tlimitsg, bodyIDg, faceIDg, edgeIDg, nptsg):
+        """
+        Compute the velocities of the points with respect to design variable
+        iDV with the OpenCSM sensitivities. Returns None if OpenCSM cannot
+        compute them.
+        """
+        espParamIdx, espRowIdx, espColIdx = self._getDVPmtr(iDV)
+        try:
+            self.espModel.ClearVels()
+            self.espModel.SetVelD(espParamIdx, espRowIdx, espColIdx, 1.0)
+            outtuple = self.espModel.Build(0, 0)
+            if outtuple[0] != self.num_branches_baseline:
+                return None
+            return self._evaluatePoints(
+                ug, vg, tg, uvlimitsg, tlimitsg, bodyIDg, faceIDg, edgeIDg, nptsg, velocity=True
+            )
+        except ocsm.OcsmError:
+            return None
+        finally:
+            self.espModel.ClearVels()
+
+    def _getParamLimits(self, bodyID, faceID, edgeID, nPts):
+        """
+        Get the parametric limits of the faces and edges the points are projected to,
+        concatenated over the (body, face, edge) triplets in sorted order.
+        """
+        entities = np.unique(np.column_stack((bodyID[:nPts], faceID[:nPts], edgeID[:nPts])).astype(np.int64), axis=0)
+        limits = []
+        for bid, fid, eid in entities.tolist():
             if eid != -1:
-                # get the point from an edge
-                # get upper and lower parametric limits of updated model
-                tlim0 = tlimits0[ptidx]
+                limits.extend(self._getUVLimits(bid, ocsm.EDGE, eid))
+            else:
+                limits.extend(self._getUVLimits(bid, ocsm.FACE, fid))
+        return np.array(limits)
+
+    def _evaluatePoints(self, u, v, t, uvlimits0, tlimits0, bodyID, faceID, edgeID, nPts, comm=None, velocity=False):
+        """
+        Evaluate the coordinates of the projected points on the current model.
+        The points are grouped by the body and edge or face they lie on, so
+        that the parametric limits are only queried once per group and all
+        points of a group are evaluated with a single GetXYZ call.
+
+        If comm is given, all of its ranks must pass the same points. The
+        groups are then split over the ranks and the coordinates are
+        gathered with a single Allgatherv.
+
+        If velocity is True, the OpenCSM velocities of the points are
+        returned instead of their coordinates. The model must have been
+        built with the velocities of the design parameters set.
+        """
+        evaluate = self.espModel.GetVel if velocity else self.espModel.GetXYZ
+        bodyID = np.asarray(bodyID[:nPts])
+        faceID = np.asarray(faceID[:nPts])
+        edgeID = np.asarray(edgeID[:nPts])
+        onEdge = edgeID != -1
+        if np.any(faceID[~onEdge] == -1):
+            raise ValueError("both edge ID and face ID are unset")
+
+        # Group the points by (body, edge or face, index)
+        entityID = np.where(onEdge, edgeID, faceID).astype(np.int64)
+        keys = (bodyID.astype(np.int64) * 2 + onEdge) * (np.max(entityID, initial=0) + 1) + entityID
+        _, groupFirst, groupIdx = np.unique(keys, return_index=True, return_inverse=True)
+        groups = np.column_stack((bodyID, onEdge, entityID))[groupFirst]
+        order = np.argsort(groupIdx, kind="stable")
+        split = np.searchsorted(groupIdx[order], np.arange(len(groups) + 1))
+
+        if comm is None or comm.size == 1:
+            myGroups = np.arange(len(groups))
+        else:
+            # Assign the largest groups first, each to the least loaded rank.
+            # Every rank computes the same assignment.
+            groupRank = np.zeros(len(groups), "intc")
+            load = np.zeros(comm.size, "intc")
+            for iGroup in np.argsort(-np.diff(split), kind="stable"):
+                groupRank[iGroup] = np.argmin(load)
+                load[groupRank[iGroup]] += split[iGroup + 1] - split[iGroup]
+            myGroups = np.where(groupRank == comm.rank)[0]
+
+        myRows = []
+        myPoints = []
+        for iGroup in myGroups:
+            rows = order[split[iGroup] : split[iGroup + 1]]
+            bid, isEdge, eid = groups[iGroup].tolist()
+            if isEdge:
+                # get the upper and lower parametric limits of the updated model
                 tlim = self._getUVLimits(bid, ocsm.EDGE, eid)
-                trange0 = tlim0[1] - tlim0[0]
+                tlim0 = tlimits0[rows]
+                trange0 = tlim0[:, 1] - tlim0[:, 0]
                 trange = tlim[1] - tlim[0]
-                tnew = (t[ptidx] - tlim0[0]) * trange / trange0 + tlim[0]
-                points[ptidx, :] = self.espModel.GetXYZ(bid, ocsm.EDGE, eid, 1, [tnew])
+                tnew = (t[rows] - tlim0[:, 0]) * trange / trange0 + tlim[0]
+                xyz = evaluate(bid, ocsm.EDGE, eid, len(rows), tnew.tolist())
             else:
-                # point from a face
-                if fid == -1:
-                    raise ValueError("both edge ID and face ID are unset")
                 # get the upper and lower uv limits of the updated model
-                uvlim0 = uvlimits0[ptidx]
-                uvlim = self._getUVLimits(bid, ocsm.FACE, fid)
-                urange0 = uvlim0[1] - uvlim0[0]
-                vrange0 = uvlim0[3] - uvlim0[2]
+                uvlim = self._getUVLimits(bid, ocsm.FACE, eid)
+                uvlim0 = uvlimits0[rows]
+                urange0 = uvlim0[:, 1] - uvlim0[:, 0]
+                vrange0 = uvlim0[:, 3] - uvlim0[:, 2]
                 urange = uvlim[1] - uvlim[0]
                 vrange = uvlim[3] - uvlim[2]
                 # scale the input uv points according to the original uv limits
-                unew = (u[ptidx] - uvlim0[0]) * urange / urange0 + uvlim[0]
-                vnew = (v[ptidx] - uvlim0[2]) * vrange / vrange0 + uvlim[2]
-                points[ptidx, :] = self.espModel.GetXYZ(bid, ocsm.FACE, fid, 1, [unew, vnew])
+                unew = (u[rows] - uvlim0[:, 0]) * urange / urange0 + uvlim[0]
+                vnew = (v[rows] - uvlim0[:, 2]) * vrange / vrange0 + uvlim[2]
+                uvnew = np.column_stack((unew, vnew)).flatten()
+                xyz = evaluate(bid, ocsm.FACE, eid, len(rows), uvnew.tolist())
+            myRows.append(rows)
+            myPoints.append(np.reshape(xyz, (len(rows), 3)))
+
+        myRows = np.concatenate(myRows) if myRows else np.zeros(0, "intc")
+        myPoints = np.concatenate(myPoints) if myPoints else np.zeros((0, 3))
+
+        points = np.zeros((nPts, 3))
+        if comm is None or comm.size == 1:
+            points[myRows] = myPoints
+        else:
+            # The rows each rank evaluated are known everywhere, ordered by
+            # rank and then by group
+            allRows = order[np.argsort(groupRank[groupIdx[order]], kind="stable")]
+            sizes = 3 * np.bincount(groupRank[groupIdx], minlength=comm.size).astype("intc")
+            disp = np.zeros(comm.size, "intc")
+            disp[1:] = np.cumsum(sizes)[:-1]
+            allPoints = np.zeros(3 * nPts)
+            comm.Allgatherv([myPoints.flatten(), sizes[comm.rank]], [allPoints, sizes, disp, MPI.DOUBLE])
+            points[allRows] = allPoints.reshape((nPts, 3))
+
         points = points * self.modelScale
         return points
 
     def _updateProjectedPts(self):
         """
-        For each pointset, run _evaluatePoints to obtain new projected_pts and then update the proj_pts
+        For each pointset, run _evaluatePoints to obtain new projected_pts and then update the proj_pts.
+        The distributed and the nondistributed pointsets are each evaluated together, so the points
+        on the same face or edge are evaluated in one call even if they belong to different pointsets.
         """
-        for pointSetName in self.pointSets:
-            pointSet = self.pointSets[pointSetName]
+        for distributed in [True, False]:
+            pointSets = [pointSet for pointSet in self.pointSets.values() if pointSet.distributed == distributed]
+            if len(pointSets) == 0:
+                continue
+            nPts = [pointSet.nPts for pointSet in pointSets]
             proj_pts = self._evaluatePoints(
-                pointSet.u,
-                pointSet.v,
-                pointSet.t,
-                pointSet.uvlimits0,
-                pointSet.tlimits0,
-                pointSet.bodyID,
-                pointSet.faceID,
-                pointSet.edgeID,
-                pointSet.nPts,
+                np.concatenate([pointSet.u for pointSet in pointSets]),
+                np.concatenate([pointSet.v for pointSet in pointSets]),
+                np.concatenate([pointSet.t for pointSet in pointSets]),
+                np.concatenate([pointSet.uvlimits0 for pointSet in pointSets]),
+                np.concatenate([pointSet.tlimits0 for pointSet in pointSets]),
+                np.concatenate([pointSet.bodyID for pointSet in pointSets]),
+                np.concatenate([pointSet.faceID for pointSet in pointSets]),
+                np.concatenate([pointSet.edgeID for pointSet in pointSets]),
+                np.sum(nPts),
+                comm=None if distributed else self.comm,
             )
-            pointSet.proj_pts = proj_pts
+            for pointSet, pts in zip(pointSets, np.split(proj_pts, np.cumsum(nPts)[:-1])):
+                pointSet.proj_pts = pts
 
     def _allgatherCoordinates(self, ul, vl, tl, faceIDl, bodyIDl, edgeIDl, uvlimitsl, tlimitsl):
-        # create the arrays to receive the global info
         # now figure out which proc has how many points.
         sizes = np.array(self.comm.allgather(len(ul)), dtype="intc")
         # displacements for allgather
-        disp = np.array([np.sum(sizes[:i]) for i in range(self.comm.size)], dtype="intc")
+        disp = np.zeros(self.comm.size, dtype="intc")
+        disp[1:] = np.cumsum(sizes)[:-1]
         # global number of points
         nptsg = np.sum(sizes)
-        ug = np.zeros(nptsg)
-        vg = np.zeros(nptsg)
-        tg = np.zeros(nptsg)
-        faceIDg = np.zeros(nptsg, dtype="intc")
-        bodyIDg = np.zeros(nptsg, dtype="intc")
-        edgeIDg = np.zeros(nptsg, dtype="intc")
-        ulower0g = np.zeros(nptsg)
-        uupper0g = np.zeros(nptsg)
-        vlower0g = np.zeros(nptsg)
-        vupper0g = np.zeros(nptsg)
-        tlower0g = np.zeros(nptsg)
-        tupper0g = np.zeros(nptsg)
-        ulowerl = uvlimitsl[:, 0].copy()
-        uupperl = uvlimitsl[:, 1].copy()
-        vlowerl = uvlimitsl[:, 2].copy()
-        vupperl = uvlimitsl[:, 3].copy()
-        tlowerl = tlimitsl[:, 0].copy()
-        tupperl = tlimitsl[:, 1].copy()
-
-        # Now we do an allGatherv to get a long list of all pointset information
-        # TODO probably can avoid breaking up the uvt limits with copies and stack below
-        self.comm.Allgatherv([ul, len(ul)], [ug, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([vl, len(vl)], [vg, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([tl, len(tl)], [tg, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([faceIDl, len(faceIDl)], [faceIDg, sizes, disp, MPI.INT])
-        self.comm.Allgatherv([bodyIDl, len(bodyIDl)], [bodyIDg, sizes, disp, MPI.INT])
-        self.comm.Allgatherv([edgeIDl, len(edgeIDl)], [edgeIDg, sizes, disp, MPI.INT])
-        self.comm.Allgatherv([ulowerl, len(ulowerl)], [ulower0g, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([uupperl, len(uupperl)], [uupper0g, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([vlowerl, len(vlowerl)], [vlower0g, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([vupperl, len(vupperl)], [vupper0g, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([tlowerl, len(tlowerl)], [tlower0g, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([tupperl, len(tupperl)], [tupper0g, sizes, disp, MPI.DOUBLE])
-
-        uvlimitsg = np.column_stack((ulower0g, uupper0g, vlower0g, vupper0g))
-        tlimitsg = np.column_stack((tlower0g, tupper0g))
+
+        # Pack all the point info into one buffer so it can be gathered in a
+        # single collective. The integer IDs are exactly representable.
+        nInfo = 12
+        infol = np.column_stack((ul, vl, tl, faceIDl, bodyIDl, edgeIDl, uvlimitsl, tlimitsl)).astype("d")
+        infog = np.zeros((nptsg, nInfo))
+        self.comm.Allgatherv([infol.flatten(), infol.size], [infog, sizes * nInfo, disp * nInfo, MPI.DOUBLE])
+
+        ug = infog[:, 0].copy()
+        vg = infog[:, 1].copy()
+        tg = infog[:, 2].copy()
+        faceIDg = infog[:, 3].astype("intc")
+        bodyIDg = infog[:, 4].astype("intc")
+        edgeIDg = infog[:, 5].astype("intc")
+        uvlimitsg = infog[:, 6:10].copy()
+        tlimitsg = infog[:, 10:12].copy()
 
         return ug, vg, tg, faceIDg, bodyIDg, edgeIDg, uvlimitsg, tlimitsg, sizes
 
-    def _computeSurfJacobian(self, fd=True):
+    def _computeSurfJacobian(self, fd=None):
         """
         This routine comptues the jacobian of the ESP surface with respect to the design variables.
         Since our point sets are rigidly linked to the ESP projection points, this is all we need to calculate.
         The input pointSets is a list or dictionary of pointSets to calculate the jacobian for.
+        If fd is False, the OpenCSM sensitivities are used where available, see the analyticSens option.
         """
+        if fd is None:
+            fd = not self.analyticSens
 
         # timing stuff:
         t1 = time.time()
@@ -1303,15 +1448,14 @@ class DVGeometryESP(DVGeoSketch):
             # need to get ALL the coordinates from every proc on every proc to do the parallel FD
             if self.maxproc is not None:
                 raise ValueError("Max processor limit is not usable with distributed pointsets")
-            # now figure out which proc has how many points.
-            sizes = np.array(self.comm.allgather(len(ul)), dtype="intc")
-            # displacements for allgather
-            disp = np.array([np.sum(sizes[:i]) for i in range(nproc)], dtype="intc")
-            # global number of points
-            nptsg = np.sum(sizes)
             ug, vg, tg, faceIDg, bodyIDg, edgeIDg, uvlimitsg, tlimitsg, sizes = self._allgatherCoordinates(
                 ul, vl, tl, faceIDl, bodyIDl, edgeIDl, uvlimitsl, tlimitsl
             )
+            # displacements for the scatter
+            disp = np.zeros(self.comm.size, dtype="intc")
+            disp[1:] = np.cumsum(sizes)[:-1]
+            # global number of points
+            nptsg = np.sum(sizes)
         else:
             nptsg = len(ul)
             ug = ul
@@ -1330,87 +1474,148 @@ class DVGeometryESP(DVGeoSketch):
         # we now have all the point info on all procs.
         tcomm += time.time() - t1
 
+        # The cached columns of the linear DVs are only valid for the same point sets, projections and DVs
+        projHash = hashlib.sha256()
+        for arr in [ug, vg, tg, faceIDg, bodyIDg, edgeIDg]:
+            projHash.update(np.ascontiguousarray(arr).tobytes())
+        cacheKey = (
+            tuple((ptSetName, self.pointSets[ptSetName].nPts) for ptSetName in self.pointSets),
+            nDV,
+            projHash.hexdigest(),
+        )
+        # all procs have to agree, otherwise they would schedule different DVs
+        if self.comm.allreduce(cacheKey != self.jacCacheKey, op=MPI.LOR):
+            self.jacColumnCache = {}
+            self.jacColumnPrev = {}
+            self.jacColumnCount = {}
+            self.paramRangeDVs = {}
+            self.jacCacheKey = cacheKey
+        computeList = [iDV for iDV in range(nDV) if iDV not in self.jacColumnCache]
+
         # We need to evaluate all the points on respective procs for FD computations
 
-        # determine how many DVs this proc will perturb.
-        n = 0
-        for iDV in range(self.getNDV()):
-            # I have to do this one.
-            if iDV % nproc == rank:
-                n += 1
+        # evaluate all the points, every proc has all of them here.
+        # With the OpenCSM sensitivities, they are only needed for the fallback.
         if fd:
-            # evaluate all the points
-            pts0 = self._evaluatePoints(ug, vg, tg, uvlimitsg, tlimitsg, bodyIDg, faceIDg, edgeIDg, nptsg)
-            # allocate the approriate sized numpy array for the perturbed points
-            ptsNew = np.zeros((n, nptsg, 3))
-
-            # perturb the DVs on different procs and compute the new point coordinates.
-            i = 0  # Counter on local Jac
-
-            for iDV in range(self.getNDV()):
-                # I have to do this one.
-                if iDV % nproc == rank:
-                    # Get the DV object for this variable
-                    dvName = self.globalDVList[iDV][0]
-                    dvLocalIndex = self.globalDVList[iDV][1]
-                    dvObj = self.DVs[dvName]
-                    # Step size for this particular DV
-                    dh = dvObj.dh
-
-                    # Perturb the DV
-                    dvSave = dvObj.value.copy()
-                    dvObj.value[dvLocalIndex] += dh
-
-                    # update the esp model
-                    t11 = time.time()
-                    self._updateModel()
-                    t12 = time.time()
-                    tesp += t12 - t11
-
+            pts0 = self._evaluatePoints(
+                ug, vg, tg, uvlimitsg, tlimitsg, bodyIDg, faceIDg, edgeIDg, nptsg, comm=self.comm
+            )
+        else:
+            pts0 = None
+        # the perturbed points of the DVs this proc computed
+        ptsNew = {}
+        # the DVs this proc had to finite difference instead of using the sensitivities
+        fallback = []
+        # the parametric range flags of the DVs this proc finite differenced
+        paramRange = {}
+        limits0 = None
+        perturbed = False
+
+        def computeDV(iDV):
+            nonlocal tesp, teval, pts0, limits0, perturbed
+
+            if not fd:
+                # the velocities are only used once the DV is known not to change the parametric ranges
+                if self.paramRangeDVs.get(iDV) is False:
                     t11 = time.time()
-                    # evaluate the points
-
-                    ptsNew[i, :, :] = self._evaluatePoints(
-                        ug, vg, tg, uvlimitsg, tlimitsg, bodyIDg, faceIDg, edgeIDg, nptsg
+                    vel = self._computeVelocities(
+                        iDV, ug, vg, tg, uvlimitsg, tlimitsg, bodyIDg, faceIDg, edgeIDg, nptsg
                     )
                     t12 = time.time()
-                    teval += t12 - t11
-                    # now we can calculate the jac and put it back in ptsNew
-                    ptsNew[i, :, :] = (ptsNew[i, :, :] - pts0[:, :]) / dh
+                    tesp += t12 - t11
+                    if vel is not None:
+                        ptsNew[iDV] = vel
+                        return
+                    fallback.append(iDV)
+                if pts0 is None:
+                    # the model is still at the current design here
+                    pts0 = self._evaluatePoints(ug, vg, tg, uvlimitsg, tlimitsg, bodyIDg, faceIDg, edgeIDg, nptsg)
+                if limits0 is None:
+                    limits0 = self._getParamLimits(bodyIDg, faceIDg, edgeIDg, nptsg)
 
-                    # Reset the DV
-                    dvObj.value = dvSave.copy()
+            # Get the DV object for this variable
+            dvName = self.globalDVList[iDV][0]
+            dvLocalIndex = self.globalDVList[iDV][1]
+            dvObj = self.DVs[dvName]
+            # Step size for this particular DV
+            dh = dvObj.dh
 
-                    # increment the counter
-                    i += 1
+            # Perturb the DV
+            dvSave = dvObj.value.copy()
+            dvObj.value[dvLocalIndex] += dh
 
-            # Now, we have perturbed points on each proc that perturbed a DV
+            # update the esp model
+            t11 = time.time()
+            self._updateModel()
+            t12 = time.time()
+            tesp += t12 - t11
+            perturbed = True
 
-            # reset the model.
+            t11 = time.time()
+            # evaluate the points
+            pts = self._evaluatePoints(ug, vg, tg, uvlimitsg, tlimitsg, bodyIDg, faceIDg, edgeIDg, nptsg)
+            t12 = time.time()
+            teval += t12 - t11
+            # now we can calculate the jac
+            ptsNew[iDV] = (pts - pts0) / dh
+
+            if not fd:
+                limits = self._getParamLimits(bodyIDg, faceIDg, edgeIDg, nptsg)
+                paramRange[iDV] = not np.allclose(limits, limits0, rtol=1e-10, atol=1e-14)
+                if paramRange[iDV] and iDV not in fallback:
+                    fallback.append(iDV)
+
+            # Reset the DV
+            dvObj.value = dvSave.copy()
+
+            if not fd:
+                # a later DV on this proc may use the velocities, which are taken at the built model
+                t11 = time.time()
+                self._updateModel()
+                t12 = time.time()
+                tesp += t12 - t11
+                perturbed = False
+
+        # perturb the DVs on different procs and compute the new point coordinates.
+        owner = self._scheduleFD(nDV, computeDV, nproc=nproc, dvList=computeList)
+
+        # Now, we have perturbed points on each proc that perturbed a DV
+
+        # reset the model if this proc perturbed it
+        if perturbed:
             t11 = time.time()
             self._updateModel()
             t12 = time.time()
             tesp += t12 - t11
 
-        else:
-            raise NotImplementedError("ESP analytic derivatives are not implemented")
+        if not fd:
+            for procParamRange in self.comm.allgather(paramRange):
+                self.paramRangeDVs.update(procParamRange)
+            self.fdFallbackDVs = sorted(sum(self.comm.allgather(fallback), []))
+            if rank == 0 and len(self.fdFallbackDVs) > 0:
+                print(
+                    "OpenCSM sensitivities unavailable or incomplete, used finite differences for",
+                    ", ".join("%s[%d]" % self.globalDVList[iDV] for iDV in self.fdFallbackDVs),
+                )
 
-        ii = 0
-        # loop over the DVs and scatter the perturbed points to original procs
-        for iDV in range(self.getNDV()):
-            # Get the DV object for this variable
-            dvName = self.globalDVList[iDV][0]
-            dvLocalIndex = self.globalDVList[iDV][1]
-            dvObj = self.DVs[dvName]
-            # Step size for this particular DV
-            dh = dvObj.dh
+        # flags for the DVs whose column did not change since the last call although the design did
+        unchanged = np.zeros(nDV, "intc")
+        # the design at which the columns are computed, a column that is the same at the same
+        # design says nothing about the linearity
+        dvValues = np.concatenate([np.atleast_1d(self.DVs[dvName].value) for dvName in self.DVs])
+        designChanged = np.zeros(nDV, "intc")
 
+        # loop over the DVs and scatter the perturbed points to original procs
+        for iDV in range(nDV):
             t11 = time.time()
-            root_proc = iDV % nproc
-            if any_ptset_distributed:
+            root_proc = owner[iDV]
+            if root_proc < 0:
+                # this column is cached, no need to communicate
+                ptsNewL[:] = self.jacColumnCache[iDV]
+            elif any_ptset_distributed:
                 # create the send/recv buffers for the scatter
                 if root_proc == rank:
-                    sendbuf = [ptsNew[ii, :, :].flatten(), sizes * 3, disp * 3, MPI.DOUBLE]
+                    sendbuf = [ptsNew[iDV].flatten(), sizes * 3, disp * 3, MPI.DOUBLE]
                 else:
                     sendbuf = [np.zeros((0, 3)), sizes * 3, disp * 3, MPI.DOUBLE]
                 recvbuf = [ptsNewL, MPI.DOUBLE]
@@ -1419,17 +1624,25 @@ class DVGeometryESP(DVGeoSketch):
             else:
                 # create the send/recv buffers for the bcast
                 if root_proc == rank:
-                    bcastbuf = [ptsNew[ii, :, :].flatten(), MPI.DOUBLE]
-                    ptsNewL[:] = ptsNew[ii, :, :].flatten()
+                    bcastbuf = [ptsNew[iDV].flatten(), MPI.DOUBLE]
+                    ptsNewL[:] = ptsNew[iDV].flatten()
                 else:
                     bcastbuf = [ptsNewL, MPI.DOUBLE]
                 # bcast the info from the proc that perturbed this DV to all procs
                 self.comm.Bcast(bcastbuf, root=root_proc)
-                self.comm.Barrier()
 
             t12 = time.time()
             tcomm += t12 - t11
 
+            # compare the new column with the one from the previous call
+            if root_proc >= 0 and iDV in self.jacColumnPrev:
+                prev, prevDVValues = self.jacColumnPrev[iDV]
+                scale = max(np.max(np.abs(prev), initial=0.0), 1.0)
+                unchanged[iDV] = np.max(np.abs(ptsNewL - prev), initial=0.0) <= self.linearDVTol * scale
+                designChanged[iDV] = not np.array_equal(dvValues, prevDVValues)
+            if root_proc >= 0 and self.linearDVCheck > 0:
+                self.jacColumnPrev[iDV] = (ptsNewL.copy(), dvValues)
+
             # calculate the jacobian here for the pointsets
             offset = 0
             for ptSet in self.pointSets:
@@ -1446,10 +1659,21 @@ class DVGeometryESP(DVGeoSketch):
                 # increment the offset
                 offset += nPts
 
-            # pertrub the local counter on this proc.
-            # This loops over the DVs that this proc perturbed
-            if iDV % nproc == rank:
-                ii += 1
+            # columns of DVs declared linear are cached right away
+            if root_proc >= 0 and self.DVs[self.globalDVList[iDV][0]].linear:
+                self.jacColumnCache[iDV] = ptsNewL.copy()
+
+        # cache the columns that stayed the same on all procs for enough design changes.
+        # calls at the same design neither count as a match nor reset the count
+        if self.linearDVCheck > 0:
+            self.comm.Allreduce(MPI.IN_PLACE, unchanged, op=MPI.MIN)
+            for iDV in computeList:
+                if not unchanged[iDV]:
+                    self.jacColumnCount[iDV] = 0
+                elif designChanged[iDV]:
+                    self.jacColumnCount[iDV] = self.jacColumnCount.get(iDV, 0) + 1
+                if self.jacColumnCount.get(iDV, 0) >= self.linearDVCheck:
+                    self.jacColumnCache[iDV] = self.jacColumnPrev.pop(iDV)[0]
 
         t2 = time.time()
         if rank == 0:
@@ -1457,6 +1681,8 @@ class DVGeometryESP(DVGeoSketch):
             print("updating the esp model took", tesp, "seconds")
             print("evaluating the new points took", teval, "seconds")
             print("communication took", tcomm, "seconds")
+        if self.debug:
+            self._printFDTimes(["%s[%d]" % (dvName, dvLocalIndex) for dvName, dvLocalIndex in self.globalDVList])
 
         # set the update flags
         for ptSet in self.pointSets:
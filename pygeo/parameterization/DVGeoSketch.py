@@ -9,6 +9,7 @@ Enables the use of ESP (Engineering Sketch Pad) and OpenVSP (Open Vehicle Sketch
 # Standard Python modules
 from abc import abstractmethod
 from collections import OrderedDict
+import time
 
 # External modules
 from mpi4py import MPI
@@ -76,6 +77,14 @@ class DVGeoSketch(BaseDVGeometry):
         self.updatedJac = {}
         self.comm = comm
 
+        # Measured cost of each finite difference perturbation, used to
+        # schedule the next surface Jacobian computation
+        self.fdTimes = None
+        self.fdRanks = None
+        # communicator of the dynamic scheduler, duplicated from comm on first use
+        self.fdComm = None
+        self.debug = False
+
         # Initial list of DVs
         self.DVs = OrderedDict()
 
@@ -334,3 +343,120 @@ class DVGeoSketch(BaseDVGeometry):
         pointSets is a list or dictionary of pointSets to calculate the jacobian for.
         """
         pass
+
+    def _scheduleFD(self, nDV, computeDV, nproc=None, dvList=None):
+        """
+        Distribute the finite difference perturbations of the design
+        variables over the first nproc ranks of self.comm.
+
+        With three or more procs, rank 0 acts as a scheduler and hands out
+        the DVs one at a time to whichever rank becomes idle, starting with
+        the DVs that took longest in the previous call. With fewer procs,
+        the DVs are assigned statically to balance the times measured in the
+        previous call, or round-robin if there are none yet.
+
+        Parameters
+        ----------
+        nDV : int
+            The number of design variables
+        computeDV : callable
+            ``computeDV(iDV)`` perturbs design variable iDV and stores the
+            result on this rank. Its run time is measured.
+        nproc : int, optional
+            The number of procs to use, defaults to all of self.comm
+        dvList : list of int, optional
+            The design variables to perturb, defaults to all of them
+
+        Returns
+        -------
+        owner : int array of size nDV
+            The rank that computed each design variable, -1 for the
+            design variables that are not in dvList
+        """
+        if nproc is None:
+            nproc = self.comm.size
+        rank = self.comm.rank
+
+        if self.fdTimes is None or len(self.fdTimes) != nDV:
+            self.fdTimes = np.zeros(nDV)
+        if dvList is None:
+            dvList = np.arange(nDV)
+        dvList = np.asarray(dvList, dtype="intc")
+        order = dvList[np.argsort(-self.fdTimes[dvList], kind="stable")]
+        nCompute = len(order)
+
+        if nproc >= 3 and self.fdComm is None:
+            # the scheduling messages get their own communicator, so that they
+            # cannot be matched with other point-to-point messages on self.comm
+            self.fdComm = self.comm.Dup()
+
+        myTimes = {}
+        if nproc < 3:
+            owner = -np.ones(nDV, "intc")
+            if np.any(self.fdTimes[dvList] > 0.0):
+                load = np.zeros(nproc)
+                for iDV in order:
+                    owner[iDV] = np.argmin(load)
+                    load[owner[iDV]] += self.fdTimes[iDV]
+            else:
+                owner[dvList] = np.arange(nCompute, dtype="intc") % nproc
+
+            for iDV in np.where(owner == rank)[0]:
+                t0 = time.time()
+                computeDV(iDV)
+                myTimes[iDV] = time.time() - t0
+
+        elif rank == 0:
+            # Hand out the DVs to the ranks that ask for work
+            nextDV = 0
+            nActive = nproc - 1
+            status = MPI.Status()
+            while nActive > 0:
+                self.fdComm.recv(source=MPI.ANY_SOURCE, tag=1, status=status)
+                if nextDV < nCompute:
+                    self.fdComm.send(order[nextDV], dest=status.Get_source(), tag=2)
+                    nextDV += 1
+                else:
+                    self.fdComm.send(-1, dest=status.Get_source(), tag=2)
+                    nActive -= 1
+
+        elif rank < nproc:
+            while True:
+                self.fdComm.send(None, dest=0, tag=1)
+                iDV = self.fdComm.recv(source=0, tag=2)
+                if iDV < 0:
+                    break
+                t0 = time.time()
+                computeDV(iDV)
+                myTimes[iDV] = time.time() - t0
+
+        # Everyone needs to know who computed what
+        owner = -np.ones(nDV, "intc")
+        for iRank, rankTimes in enumerate(self.comm.allgather(myTimes)):
+            for iDV, dvTime in rankTimes.items():
+                owner[iDV] = iRank
+                self.fdTimes[iDV] = dvTime
+        self.fdRanks = owner
+
+        return owner
+
+    def _printFDTimes(self, dvNames):
+        """
+        Print the time each finite difference perturbation took and the
+        resulting load on each rank. This is useful to pick the number of
+        procs used for the finite differences.
+        """
+        if self.comm.rank != 0 or self.fdTimes is None:
+            return
+
+        print("FD perturbation times:")
+        computed = self.fdRanks >= 0
+        for iDV in np.argsort(-self.fdTimes, kind="stable"):
+            if computed[iDV]:
+                print("    %-30s %10.4f s on rank %d" % (dvNames[iDV], self.fdTimes[iDV], self.fdRanks[iDV]))
+            else:
+                print("    %-30s     cached" % dvNames[iDV])
+        load = np.bincount(self.fdRanks[computed], weights=self.fdTimes[computed], minlength=self.comm.size)
+        busy = load[load > 0]
+        if len(busy) > 0:
+            print("FD load: max %.4f s, mean %.4f s over %d procs" % (np.max(busy), np.mean(busy), len(busy)))
@@ -1,5 +1,7 @@
 # Standard Python modules
 from collections import OrderedDict
+import hashlib
+import os
 import time
 
 # External modules
@@ -147,7 +149,7 @@ class DVGeometryVSP(DVGeoSketch):
             t3 = time.time()
             print("Initialized DVGeometry VSP in", (t3 - t0), "seconds.")
 
-    def addPointSet(self, points, ptName, **kwargs):
+    def addPointSet(self, points, ptName, cache_projections=False, **kwargs):
         """
         Add a set of coordinates to DVGeometry
 
@@ -164,6 +166,13 @@ class DVGeometryVSP(DVGeoSketch):
             coordinates. Thisname will need to be provided when
             updating the coordinates or when getting the derivatives
             of the coordinates.
+        cache_projections : None or str
+            The user can optionally cache the point set projections to save initialization time.
+            If a filename is provided, the ``geom, r, s, t`` coordinates of the points will be saved
+            in numpy compressed format ('.npz' extension should be used). None uses ``ptName + ".npz"``.
+            The cache is only used if the points on each proc and the VSP file are unchanged
+            and the cached projections are still within tolerance of the model;
+            otherwise the points are projected again and the cache is overwritten.
 
         Returns
         -------
@@ -180,6 +189,20 @@ class DVGeometryVSP(DVGeoSketch):
 
         points = np.array(points).real.astype("d")
 
+        # cache_projections=False will disable caching, but None will generate a cachefile name automatically
+        if cache_projections is None:
+            cache_projections = ptName + ".npz"
+
+        if cache_projections:
+            pointsHash = hashlib.sha256(points.tobytes()).hexdigest()
+            cached = self._loadProjectionCache(cache_projections, points, pointsHash)
+            if cached is not None:
+                pts, geom, r, s, t, dMax_global = cached
+                self.pointSets[ptName] = PointSet(points, pts, geom, r, s, t)
+                self.updated[ptName] = False
+                self.updatedJac[ptName] = False
+                return dMax_global
+
         # we need to project each of these points onto the VSP geometry,
         # get geometry and surface IDs, u, v values, and coordinates of the projections.
         # then calculate the self.offset variable using the projected points.
@@ -333,8 +356,122 @@ class DVGeometryVSP(DVGeoSketch):
         # Set the updated flag to false because the jacobian is not up to date.
         self.updated[ptName] = False
         self.updatedJac[ptName] = False
+
+        if cache_projections:
+            self._saveProjectionCache(cache_projections, pointsHash, geom, r, s, t, dMax_global)
+
         return dMax_global
 
+    def _getFileHash(self):
+        """
+        Hash of the VSP file, used to validate the projection caches.
+        """
+        fileHash = None
+        if self.comm.rank == 0:
+            with open(self.fileName, "rb") as f:
+                fileHash = hashlib.sha256(f.read()).hexdigest()
+        return self.comm.bcast(fileHash, root=0)
+
+    def _loadProjectionCache(self, cacheFile, points, pointsHash):
+        """
+        Load the projections of a distributed point set from a cache
+        written by _saveProjectionCache. The cache is only used if it was
+        written for the same points on the same number of procs and VSP
+        file, and if the cached projections are still within tolerance of
+        the points. Returns None if the cache cannot be used.
+        """
+        sizes = np.array(self.comm.allgather(len(points)), dtype="intc")
+        pointsHashes = self.comm.gather(pointsHash, root=0)
+        fileHash = self._getFileHash()
+
+        reason = None
+        info = None
+        cachedDMax = None
+        if self.comm.rank == 0:
+            if not os.path.isfile(cacheFile):
+                reason = "it does not exist"
+            else:
+                cache = np.load(cacheFile)
+                if cache["nprocs"] != self.comm.size or not np.array_equal(cache["sizes"], sizes):
+                    reason = "the point counts have changed on some proc"
+                elif list(cache["pointsHash"]) != pointsHashes:
+                    reason = "the points have changed"
+                elif str(cache["fileHash"]) != fileHash:
+                    reason = "the VSP file has changed"
+                else:
+                    info = np.column_stack((cache["r"], cache["s"], cache["t"], cache["geom"]))
+                    cachedDMax = float(cache["dmax"])
+        reason = self.comm.bcast(reason, root=0)
+        if reason is not None:
+            if self.comm.rank == 0 and reason != "it does not exist":
+                print("DVGeometryVSP note: Ignoring the projection cache", cacheFile, "because", reason)
+            return None
+        cachedDMax = self.comm.bcast(cachedDMax, root=0)
+
+        # send each proc its projections
+        disp = np.zeros(self.comm.size, dtype="intc")
+        disp[1:] = np.cumsum(sizes)[:-1]
+        infol = np.zeros((len(points), 4))
+        sendbuf = [info, sizes * 4, disp * 4, MPI.DOUBLE] if self.comm.rank == 0 else None
+        self.comm.Scatterv(sendbuf, [infol, MPI.DOUBLE], root=0)
+        r = infol[:, 0].copy()
+        s = infol[:, 1].copy()
+        t = infol[:, 2].copy()
+        geom = infol[:, 3].astype("intc")
+
+        # check that the cached projections are still valid for this geometry
+        pts = np.zeros(points.shape)
+        for i in range(len(points)):
+            pnt = openvsp.CompPntRST(self.allComps[geom[i]], 0, r[i], s[i], t[i])
+            pts[i, :] = (pnt.x(), pnt.y(), pnt.z())
+        pts *= self.modelScale
+        dMax = np.max(np.linalg.norm(pts - points, axis=1), initial=1e-16) * self.meshScale
+        dMax_global = self.comm.allreduce(dMax, op=MPI.MAX)
+        if dMax_global > max(self.projTol, cachedDMax * (1.0 + 1e-3)):
+            if self.comm.rank == 0:
+                print(
+                    "DVGeometryVSP note: Ignoring the projection cache",
+                    cacheFile,
+                    "because the projections are no longer valid for this geometry",
+                )
+            return None
+
+        if self.comm.rank == 0:
+            print("DVGeometryVSP note:\nLoaded the projections of", np.sum(sizes), "points from", cacheFile)
+            print("Maximum distance between the added points and the VSP geometry is", dMax_global)
+
+        return pts, geom, r, s, t, dMax_global
+
+    def _saveProjectionCache(self, cacheFile, pointsHash, geom, r, s, t, dMax_global):
+        """
+        Gather the projections of a distributed point set on the root proc
+        and save them with the data needed to validate them later.
+        """
+        sizes = np.array(self.comm.allgather(len(r)), dtype="intc")
+        pointsHashes = self.comm.gather(pointsHash, root=0)
+        fileHash = self._getFileHash()
+
+        disp = np.zeros(self.comm.size, dtype="intc")
+        disp[1:] = np.cumsum(sizes)[:-1]
+        infol = np.column_stack((r, s, t, geom)).astype("d")
+        infog = np.zeros((np.sum(sizes), 4)) if self.comm.rank == 0 else None
+        recvbuf = [infog, sizes * 4, disp * 4, MPI.DOUBLE] if self.comm.rank == 0 else None
+        self.comm.Gatherv([infol.flatten(), infol.size], recvbuf, root=0)
+
+        if self.comm.rank == 0:
+            np.savez_compressed(
+                cacheFile,
+                nprocs=self.comm.size,
+                sizes=sizes,
+                pointsHash=np.array(pointsHashes),
+                fileHash=fileHash,
+                dmax=dMax_global,
+                r=infog[:, 0],
+                s=infog[:, 1],
+                t=infog[:, 2],
+                geom=infog[:, 3].astype("intc"),
+            )
+
     def setDesignVars(self, dvDict):
         """
         Standard routine for setting design variables from a design
@@ -928,7 +1065,8 @@ class DVGeometryVSP(DVGeoSketch):
         # now figure out which proc has how many points.
         sizes = np.array(self.comm.allgather(len(rl)), dtype="intc")
         # displacements for allgather
-        disp = np.array([np.sum(sizes[:i]) for i in range(nproc)], dtype="intc")
+        disp = np.zeros(nproc, dtype="intc")
+        disp[1:] = np.cumsum(sizes)[:-1]
         # global number of points
         nptsg = np.sum(sizes)
         # create a local new point array. We will use this to get the new
@@ -936,17 +1074,15 @@ class DVGeometryVSP(DVGeoSketch):
         # because we get the new points, calculate the jacobian and save it right after
         ptsNewL = np.zeros(len(rl) * 3)
 
-        # create the arrays to receive the global info
-        rg = np.zeros(nptsg)
-        sg = np.zeros(nptsg)
-        tg = np.zeros(nptsg)
-        gg = np.zeros(nptsg, dtype="intc")
-
-        # Now we do an allGatherv to get a long list of all pointset information
-        self.comm.Allgatherv([rl, len(rl)], [rg, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([sl, len(sl)], [sg, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([tl, len(tl)], [tg, sizes, disp, MPI.DOUBLE])
-        self.comm.Allgatherv([gl, len(gl)], [gg, sizes, disp, MPI.INT])
+        # Now we do a single allGatherv to get a long list of all pointset
+        # information. The component indices are exactly representable.
+        infol = np.column_stack((rl, sl, tl, gl)).astype("d")
+        infog = np.zeros((nptsg, 4))
+        self.comm.Allgatherv([infol.flatten(), infol.size], [infog, sizes * 4, disp * 4, MPI.DOUBLE])
+        rg = infog[:, 0].copy()
+        sg = infog[:, 1].copy()
+        tg = infog[:, 2].copy()
+        gg = infog[:, 3].astype("intc")
 
         # we now have all the point info on all procs.
         tcomm += time.time() - t1
@@ -961,54 +1097,42 @@ class DVGeometryVSP(DVGeoSketch):
             pnt = openvsp.CompPntRST(self.allComps[gg[j]], 0, rg[j], sg[j], tg[j])
             pts0[j, :] = (pnt.x(), pnt.y(), pnt.z())
 
-        # determine how many DVs this proc will perturb.
-        n = 0
-        for iDV in range(len(dvKeys)):
-            # I have to do this one.
-            if iDV % nproc == rank:
-                n += 1
+        # the perturbed points of the DVs this proc computed
+        ptsNew = {}
 
-        # allocate the approriate sized numpy array for the perturbed points
-        ptsNew = np.zeros((n, nptsg, 3))
+        def computeDV(iDV):
+            nonlocal tvsp, teval
 
-        # perturb the DVs on different procs and compute the new point coordinates.
-        i = 0  # Counter on local Jac
+            # Step size for this particular DV
+            dh = self.DVs[dvKeys[iDV]].dh
 
-        for iDV in range(len(dvKeys)):
-            # I have to do this one.
-            if iDV % nproc == rank:
-                # Step size for this particular DV
-                dh = self.DVs[dvKeys[iDV]].dh
-
-                # Perturb the DV
-                dvSave = self.DVs[dvKeys[iDV]].value.copy()
-                self.DVs[dvKeys[iDV]].value += dh
-
-                # update the vsp model
-                t11 = time.time()
-                self._updateModel()
-                t12 = time.time()
-                tvsp += t12 - t11
-
-                t11 = time.time()
-                # evaluate the points
-                for j in range(nptsg):
-                    pnt = openvsp.CompPntRST(self.allComps[gg[j]], 0, rg[j], sg[j], tg[j])
-                    ptsNew[i, j, :] = (pnt.x(), pnt.y(), pnt.z())
-                t12 = time.time()
-                teval += t12 - t11
-
-                # now we can calculate the jac and put it back in ptsNew
-                ptsNew[i, :, :] = (ptsNew[i, :, :] - pts0[:, :]) / dh
-
-                # Reset the DV
-                self.DVs[dvKeys[iDV]].value = dvSave.copy()
-
-                # increment the counter
-                i += 1
+            # Perturb the DV
+            dvSave = self.DVs[dvKeys[iDV]].value.copy()
+            self.DVs[dvKeys[iDV]].value += dh
 
-        # scale the points
-        ptsNew *= self.modelScale
+            # update the vsp model
+            t11 = time.time()
+            self._updateModel()
+            t12 = time.time()
+            tvsp += t12 - t11
+
+            t11 = time.time()
+            # evaluate the points
+            pts = np.zeros((nptsg, 3))
+            for j in range(nptsg):
+                pnt = openvsp.CompPntRST(self.allComps[gg[j]], 0, rg[j], sg[j], tg[j])
+                pts[j, :] = (pnt.x(), pnt.y(), pnt.z())
+            t12 = time.time()
+            teval += t12 - t11
+
+            # now we can calculate the jac and scale the points
+            ptsNew[iDV] = (pts - pts0) / dh * self.modelScale
+
+            # Reset the DV
+            self.DVs[dvKeys[iDV]].value = dvSave.copy()
+
+        # perturb the DVs on different procs and compute the new point coordinates.
+        owner = self._scheduleFD(len(dvKeys), computeDV)
 
         # Now, we have perturbed points on each proc that perturbed a DV
 
@@ -1018,22 +1142,18 @@ class DVGeometryVSP(DVGeoSketch):
         t12 = time.time()
         tvsp += t12 - t11
 
-        ii = 0
         # loop over the DVs and scatter the perturbed points to original procs
         for iDV in range(len(dvKeys)):
-            # Step size for this particular DV
-            dh = self.DVs[dvKeys[iDV]].dh
-
             t11 = time.time()
             # create the send/recv buffers for the scatter
-            if iDV % nproc == rank:
-                sendbuf = [ptsNew[ii, :, :].flatten(), sizes * 3, disp * 3, MPI.DOUBLE]
+            if owner[iDV] == rank:
+                sendbuf = [ptsNew[iDV].flatten(), sizes * 3, disp * 3, MPI.DOUBLE]
             else:
                 sendbuf = [np.zeros((0, 3)), sizes * 3, disp * 3, MPI.DOUBLE]
             recvbuf = [ptsNewL, MPI.DOUBLE]
 
             # scatter the info from the proc that perturbed this DV to all procs
-            self.comm.Scatterv(sendbuf, recvbuf, root=(iDV % nproc))
+            self.comm.Scatterv(sendbuf, recvbuf, root=owner[iDV])
 
             t12 = time.time()
             tcomm += t12 - t11
@@ -1058,17 +1178,14 @@ class DVGeometryVSP(DVGeoSketch):
                 # increment the offset
                 offset += nPts
 
-            # pertrub the local counter on this proc.
-            # This loops over the DVs that this proc perturbed
-            if iDV % nproc == rank:
-                ii += 1
-
         t2 = time.time()
         if rank == 0:
             print("FD jacobian calcs with dvgeovsp took", (t2 - t1), "seconds in total")
             print("updating the vsp model took", tvsp, "seconds")
             print("evaluating the new points took", teval, "seconds")
             print("communication took", tcomm, "seconds")
+        if self.debug:
+            self._printFDTimes(dvKeys)
 
         # set the update flags
         for ptSet in self.pointSets:
@@ -297,7 +297,7 @@ class geoDVComposite(geoDV):
 
 
 class espDV(geoDV):
-    def __init__(self, csmDesPmtr, name, value, lower, upper, scale, rows, cols, dh, globalstartind):
+    def __init__(self, csmDesPmtr, name, value, lower, upper, scale, rows, cols, dh, globalstartind, linear=False):
         """
         Internal class for storing ESP design variable information
         """
@@ -310,6 +310,7 @@ class espDV(geoDV):
         self.nVal = len(rows) * len(cols)
         self.dh = dh
         self.globalStartInd = globalstartind
+        self.linear = linear
 
 
 class vspDV(geoDV):
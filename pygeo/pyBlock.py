@@ -8,11 +8,10 @@ import numpy as np
 from pyspline import Volume
 from pyspline.utils import closeTecplot, openTecplot, writeTecplot3D
 from scipy import sparse
-from scipy.sparse import linalg
 from scipy.spatial import ConvexHull
 
 # Local modules
-from .geo_utils import blendKnotVectors, readNValues
+from .geo_utils import blendKnotVectors, getBasisPts, readNValues, solveNormalEquations
 from .topology import BlockTopology
 
 
@@ -48,6 +47,13 @@ class pyBlock:
         maximum order of the splines used for the underlying formulation.
         Default is a 4th order spline in each direction if the dimensions
         allow.
+
+    rcmReorder : bool
+        Only used for FFDs. Renumber the global control points with the
+        reverse Cuthill-McKee algorithm to reduce the bandwidth of the
+        sparse derivative matrices. This gives better memory locality for
+        large multi-block FFDs, but changes the order of the control
+        points and hence of local design variables.
     """
 
     def __init__(self, initType, fileName=None, FFD=False, symmPlane=None, kmax=4, **kwargs):
@@ -71,7 +77,7 @@ class pyBlock:
     #                     Initialization Types
     # ----------------------------------------------------------------------
 
-    def _readPlot3D(self, fileName, order="f", FFD=False, symmTol=0.001, kmax=4):
+    def _readPlot3D(self, fileName, order="f", FFD=False, symmTol=0.001, kmax=4, rcmReorder=False):
         """Load a plot3D file and create the splines to go with each
         patch. See the pyBlock() docstring for more information.
 
@@ -212,7 +218,7 @@ class pyBlock:
             # end for (ivol loop)
 
             self.nVol = len(self.vols)
-            self._calcConnectivity(1e-4, 1e-4)
+            self._calcConnectivity(1e-4, 1e-4, rcmReorder=rcmReorder)
             nCtl = self.topo.nGlobal
             self.coef = np.zeros((nCtl, 3))
             self._setVolumeCoef()
@@ -229,7 +235,7 @@ class pyBlock:
             self.nVol = len(self.vols)
         # end if (FFD Check)
 
-    def fitGlobal(self, greedyReorder=False):
+    def fitGlobal(self, greedyReorder=False, solver="direct", warmStart=False, tol=1e-10, maxIter=None):
         """
         Determine the set of b-spline coefficients that best fits the
         set of volumes in the global sense. This is *required* for
@@ -240,6 +246,17 @@ class pyBlock:
         greedyReorder : bool
             Flag to compute ordering of initial mesh in a greedy
             ordering sense.
+        solver : str, {'direct', 'cg', 'lsqr'}
+            Linear solver used for the least squares fit. 'direct'
+            factorizes the normal equations. 'cg' and 'lsqr' are
+            iterative and use much less memory for large fits.
+        warmStart : bool
+            Use the current coefficients as the initial guess for the
+            iterative solvers
+        tol : float
+            Relative convergence tolerance for the iterative solvers
+        maxIter : int
+            Maximum number of iterations for the iterative solvers
         """
 
         nCtl = self.topo.nGlobal
@@ -254,48 +271,38 @@ class pyBlock:
         origTopo.calcGlobalNumbering(sizes, greedyReorder=greedyReorder)
         N = origTopo.nGlobal
         print(" -> Creating global point list")
+        first = origTopo.gIndex.first()
         pts = np.zeros((N, 3))
-        for ii in range(N):
-            pts[ii] = self.vols[origTopo.gIndex[ii][0][0]].X[
-                origTopo.gIndex[ii][0][1], origTopo.gIndex[ii][0][2], origTopo.gIndex[ii][0][3]
-            ]
-
-        # Get the maximum k (ku, kv, kw for each vol)
-        kmax = 2
+        rows = []
+        cols = []
+        vals = []
         for ivol in range(self.nVol):
-            kmax = max(kmax, self.vols[ivol].ku, self.vols[ivol].kv, self.vols[ivol].kw)
+            vol = self.vols[ivol]
+            ptIndex = np.where(first[:, 0] == ivol)[0]
+            i = first[ptIndex, 1]
+            j = first[ptIndex, 2]
+            k = first[ptIndex, 3]
+            pts[ptIndex] = vol.X[i, j, k]
+
+            volCols, volVals = getBasisPts(
+                [vol.tu, vol.tv, vol.tw],
+                [vol.ku, vol.kv, vol.kw],
+                [vol.U[i, j, k], vol.V[i, j, k], vol.W[i, j, k]],
+                self.topo.lIndex[ivol],
+            )
+            rows.append(np.repeat(ptIndex, volCols.shape[1]))
+            cols.append(volCols.flatten())
+            vals.append(volVals.flatten())
 
-        nnz = N * kmax * kmax * kmax
-        vals = np.zeros(nnz)
-        rowPtr = [0]
-        colInd = np.zeros(nnz, "intc")
-        for ii in range(N):
-            ivol = origTopo.gIndex[ii][0][0]
-            i = origTopo.gIndex[ii][0][1]
-            j = origTopo.gIndex[ii][0][2]
-            k = origTopo.gIndex[ii][0][3]
-
-            u = self.vols[ivol].U[i, j, k]
-            v = self.vols[ivol].V[i, j, k]
-            w = self.vols[ivol].W[i, j, k]
-
-            vals, colInd = self.vols[ivol].getBasisPt(u, v, w, vals, rowPtr[ii], colInd, self.topo.lIndex[ivol])
-            kinc = self.vols[ivol].ku * self.vols[ivol].kv * self.vols[ivol].kw
-            rowPtr.append(rowPtr[-1] + kinc)
+        # Now make a sparse matrix and solve the least squares problem
+        # for all three coordinates at once
+        NN = sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(N, nCtl))
 
-        # Now we can crop out any additional values in colInd and vals
-        vals = vals[: rowPtr[-1]]
-        colInd = colInd[: rowPtr[-1]]
+        x0 = None
+        if warmStart and self.coef is not None and self.coef.shape == (nCtl, 3):
+            x0 = self.coef.real
 
-        # Now make a sparse matrix, the N, and N^T * N factors, sovle
-        # and set:
-        NN = sparse.csr_matrix((vals, colInd, rowPtr))
-        NNT = NN.T
-        NTN = NNT * NN
-        solve = linalg.factorized(NTN)
-        self.coef = np.zeros((nCtl, 3))
-        for idim in range(3):
-            self.coef[:, idim] = solve(NNT * pts[:, idim])
+        self.coef = solveNormalEquations(NN, pts, solver=solver, x0=x0, tol=tol, maxIter=maxIter)
 
         self._updateVolumeCoef()
         for ivol in range(self.nVol):
@@ -306,7 +313,7 @@ class pyBlock:
     #                     Topology Information Functions
     # ----------------------------------------------------------------------
 
-    def doConnectivity(self, fileName=None, nodeTol=1e-4, edgeTol=1e-4, greedyReorder=False):
+    def doConnectivity(self, fileName=None, nodeTol=1e-4, edgeTol=1e-4, greedyReorder=False, rcmReorder=False):
         """
         This function is used if a separate fitting topology is
         required for non-FFD creations. The sequence of calls is given
@@ -323,6 +330,8 @@ class pyBlock:
             Tolerance for co-incidient mid points of edges
         greedyReorder : bool
             Flag to reorder numbering in a greedy form.
+        rcmReorder : bool
+            Flag to reorder numbering with reverse Cuthill-McKee.
         """
 
         if fileName is not None and os.path.isfile(fileName):
@@ -341,9 +350,9 @@ class pyBlock:
         sizes = []
         for ivol in range(self.nVol):
             sizes.append([self.vols[ivol].nClu, self.vols[ivol].nCtlv, self.vols[ivol].nCtlw])
-        self.topo.calcGlobalNumbering(sizes, greedyReorder=greedyReorder)
+        self.topo.calcGlobalNumbering(sizes, greedyReorder=greedyReorder, rcmReorder=rcmReorder)
 
-    def _calcConnectivity(self, nodeTol, edgeTol):
+    def _calcConnectivity(self, nodeTol, edgeTol, rcmReorder=False):
         """Determine the blocking connectivity
 
         Parameters
@@ -352,6 +361,8 @@ class pyBlock:
             Tolerance for identical nodes
         edgeTol :float
             Tolerance for midpoint of edges to determine if they are the same
+        rcmReorder : bool
+            Flag to reorder numbering with reverse Cuthill-McKee
         """
         coords = np.zeros((self.nVol, 26, 3))
 
@@ -369,7 +380,7 @@ class pyBlock:
         sizes = []
         for ivol in range(self.nVol):
             sizes.append([self.vols[ivol].nCtlu, self.vols[ivol].nCtlv, self.vols[ivol].nCtlw])
-        self.topo.calcGlobalNumbering(sizes)
+        self.topo.calcGlobalNumbering(sizes, rcmReorder=rcmReorder)
 
     def printConnectivity(self):
         """
@@ -656,13 +667,8 @@ class pyBlock:
     # ----------------------------------------------------------------------
     def _updateVolumeCoef(self):
         """Copy the pyBlock list of control points back to the volumes"""
-        for ii in range(len(self.coef)):
-            for jj in range(len(self.topo.gIndex[ii])):
-                ivol = self.topo.gIndex[ii][jj][0]
-                i = self.topo.gIndex[ii][jj][1]
-                j = self.topo.gIndex[ii][jj][2]
-                k = self.topo.gIndex[ii][jj][3]
-                self.vols[ivol].coef[i, j, k] = self.coef[ii].real.astype("d")
+        for ivol, (globalIndex, local) in enumerate(self.topo.gIndex.byEntity(self.nVol)):
+            self.vols[ivol].coef[local] = self.coef[globalIndex].real.astype("d")
 
     def _setVolumeCoef(self):
         """Set the global coefficient array self.coef from the
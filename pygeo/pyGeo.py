@@ -8,7 +8,6 @@ import numpy as np
 from pyspline import Curve, Surface
 from pyspline.utils import closeTecplot, openTecplot, writeTecplot2D
 from scipy import sparse
-from scipy.sparse.linalg import factorized
 
 # Local modules
 from . import geo_utils
@@ -161,91 +160,27 @@ class pyGeo:
         fileName : str
             Name of file to load.
         """
-        f = open(fileName)
-        Ifile = []
-        for line in f:
-            line = line.replace(";", ",")  # This is a bit of a hack...
-            Ifile.append(line)
-        f.close()
-
-        start_lines = int(Ifile[-1][1:8])
-        general_lines = int(Ifile[-1][9:16])
-        directory_lines = int(Ifile[-1][17:24])
-        # parameter_lines = int((Ifile[-1][25:32]))
-
-        # Now we know how many lines we have to deal with
-        dir_offset = start_lines + general_lines
-        para_offset = dir_offset + directory_lines
-
-        surf_list = []
-        # Directory lines is ALWAYS a multiple of 2
-        for i in range(directory_lines // 2):
-            # 128 is bspline surface type
-            if int(Ifile[2 * i + dir_offset][0:8]) == 128:
-                start = int(Ifile[2 * i + dir_offset][8:16])
-                num_lines = int(Ifile[2 * i + 1 + dir_offset][24:32])
-                surf_list.append([start, num_lines])
-
-        self.nSurf = len(surf_list)
+        surfData = geo_utils.readIGESSurfaces(fileName)
+        self.nSurf = len(surfData)
 
         print("Found %d surfaces in Iges File." % (self.nSurf))
 
         self.surfs = []
 
-        for isurf in range(self.nSurf):  # Loop over our patches
-            data = []
-            # Create a list of all data
-            # -1 is for conversion from 1 based (iges) to python
-            para_offset = surf_list[isurf][0] + dir_offset + directory_lines - 1
-
-            for i in range(surf_list[isurf][1]):
-                aux = Ifile[i + para_offset][0:69].split(",")
-                for j in range(len(aux) - 1):
-                    data.append(float(aux[j]))
-
-            # Now we extract what we need
-            Nctlu = int(data[1] + 1)
-            Nctlv = int(data[2] + 1)
-            ku = int(data[3] + 1)
-            kv = int(data[4] + 1)
-
-            counter = 10
-            tu = data[counter : counter + Nctlu + ku]
-            counter += Nctlu + ku
-
-            tv = data[counter : counter + Nctlv + kv]
-            counter += Nctlv + kv
-
-            weights = data[counter : counter + Nctlu * Nctlv]
-            weights = np.array(weights)
-            if weights.all() != 1:
+        for data in surfData:  # Loop over our patches
+            if np.any(data["weights"] != 1.0):
                 print("WARNING: Not all weight in B-spline surface are 1. A NURBS surface CANNOT be replicated exactly")
-            counter += Nctlu * Nctlv
-
-            coef = np.zeros([Nctlu, Nctlv, 3])
-            for j in range(Nctlv):
-                for i in range(Nctlu):
-                    coef[i, j, :] = data[counter : counter + 3]
-                    counter += 3
-
-            # Last we need the ranges
-            prange = np.zeros(4)
-
-            prange[0] = data[counter]
-            prange[1] = data[counter + 1]
-            prange[2] = data[counter + 2]
-            prange[3] = data[counter + 3]
 
             # Re-scale the knot vectors in case the upper bound is not 1
-            tu = np.array(tu)
-            tv = np.array(tv)
+            tu = data["tu"]
+            tv = data["tv"]
             if not tu[-1] == 1.0:
                 tu /= tu[-1]
 
             if not tv[-1] == 1.0:
                 tv /= tv[-1]
 
-            self.surfs.append(Surface(ku=ku, kv=kv, tu=tu, tv=tv, coef=coef))
+            self.surfs.append(Surface(ku=data["ku"], kv=data["kv"], tu=tu, tv=tv, coef=data["coef"]))
 
             # Generate dummy data for connectivity to work
             u = np.linspace(0, 1, 3)
@@ -737,11 +672,25 @@ class pyGeo:
 
         self.setSurfaceCoef()
 
-    def fitGlobal(self):
+    def fitGlobal(self, solver="direct", warmStart=False, tol=1e-10, maxIter=None):
         """
         Perform a global B-spline surface fit to determine the
         coefficients of each patch. This is only used with an plot3D
         init type
+
+        Parameters
+        ----------
+        solver : str, {'direct', 'cg', 'lsqr'}
+            Linear solver used for the least squares fit. 'direct'
+            factorizes the normal equations. 'cg' and 'lsqr' are
+            iterative and use much less memory for large fits.
+        warmStart : bool
+            Use the current coefficients as the initial guess for the
+            iterative solvers
+        tol : float
+            Relative convergence tolerance for the iterative solvers
+        maxIter : int
+            Maximum number of iterations for the iterative solvers
         """
 
         print("Global Fitting")
@@ -758,51 +707,34 @@ class pyGeo:
         origTopo.calcGlobalNumbering(sizes)
         N = origTopo.nGlobal
         print(" -> Creating global point list")
+        first = origTopo.gIndex.first()
         pts = np.zeros((N, 3))
-        for ii in range(N):
-            pts[ii] = self.surfs[origTopo.gIndex[ii][0][0]].X[origTopo.gIndex[ii][0][1], origTopo.gIndex[ii][0][2]]
-
-        # Get the maximum k (ku, kv for each surf)
-        kmax = 2
+        rows = []
+        cols = []
+        vals = []
         for isurf in range(self.nSurf):
-            if self.surfs[isurf].ku > kmax:
-                kmax = self.surfs[isurf].ku
-            if self.surfs[isurf].kv > kmax:
-                kmax = self.surfs[isurf].kv
-
-        nnz = N * kmax * kmax
-        vals = np.zeros(nnz)
-        rowPtr = [0]
-        colInd = np.zeros(nnz, "intc")
-
-        for ii in range(N):
-            isurf = origTopo.gIndex[ii][0][0]
-            i = origTopo.gIndex[ii][0][1]
-            j = origTopo.gIndex[ii][0][2]
-
-            u = self.surfs[isurf].U[i, j]
-            v = self.surfs[isurf].V[i, j]
-
-            vals, colInd = self.surfs[isurf].getBasisPt(u, v, vals, rowPtr[ii], colInd, self.topo.lIndex[isurf])
-
-            kinc = self.surfs[isurf].ku * self.surfs[isurf].kv
-            rowPtr.append(rowPtr[-1] + kinc)
+            surf = self.surfs[isurf]
+            ptIndex = np.where(first[:, 0] == isurf)[0]
+            i = first[ptIndex, 1]
+            j = first[ptIndex, 2]
+            pts[ptIndex] = surf.X[i, j]
+
+            surfCols, surfVals = geo_utils.getBasisPts(
+                [surf.tu, surf.tv], [surf.ku, surf.kv], [surf.U[i, j], surf.V[i, j]], self.topo.lIndex[isurf]
+            )
+            rows.append(np.repeat(ptIndex, surfCols.shape[1]))
+            cols.append(surfCols.flatten())
+            vals.append(surfVals.flatten())
 
-        # Now we can crop out any additional values in col_ptr and vals
-        vals = vals[: rowPtr[-1]]
-        colInd = colInd[: rowPtr[-1]]
         # Now make a sparse matrix
+        NN = sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(N, nCtl))
 
-        NN = sparse.csr_matrix((vals, colInd, rowPtr))
-        print(" -> Multiplying N^T * N")
-        NNT = NN.T
-        NTN = NNT * NN
-        print(" -> Factorizing...")
-        solve = factorized(NTN)
-        print(" -> Back Solving...")
-        self.coef = np.zeros((nCtl, 3))
-        for idim in range(3):
-            self.coef[:, idim] = solve(NNT * pts[:, idim])
+        x0 = None
+        if warmStart and self.coef is not None and self.coef.shape == (nCtl, 3):
+            x0 = self.coef.real
+
+        print(" -> Solving...")
+        self.coef = geo_utils.solveNormalEquations(NN, pts, solver=solver, x0=x0, tol=tol, maxIter=maxIter)
 
         print(" -> Setting Surface Coefficients...")
         self._updateSurfaceCoef()
@@ -1105,20 +1037,10 @@ class pyGeo:
         f.write("21Hdennette@wiz-worx.com,23HLegacy PDD AP Committee,11,3,               G      3\n")
         f.write("13H920717.080000,23HMIL-PRF-28000B0,CLASS 1;                            G      4\n")
 
-        Dcount = 1
-        Pcount = 1
-
-        for isurf in range(self.nSurf):
-            Pcount, Dcount = self.surfs[isurf].writeIGES_directory(f, Dcount, Pcount)
-
-        Pcount = 1
-        counter = 1
-
-        for isurf in range(self.nSurf):
-            Pcount, counter = self.surfs[isurf].writeIGES_parameters(f, Pcount, counter)
+        nDir, nPara = geo_utils.writeIGESSurfaces(f, self.surfs)
 
         # Write the terminate statement
-        f.write("S%7dG%7dD%7dP%7d%40sT%6s1\n" % (1, 4, Dcount - 1, counter - 1, " ", " "))
+        f.write("S%7dG%7dD%7dP%7d%40sT%6s1\n" % (1, 4, nDir, nPara, " ", " "))
         f.close()
 
     def writeTin(self, fileName):
@@ -1162,12 +1084,8 @@ class pyGeo:
 
     def _updateSurfaceCoef(self):
         """Copy the pyGeo list of control points back to the surfaces"""
-        for ii in range(len(self.coef)):
-            for jj in range(len(self.topo.gIndex[ii])):
-                isurf = self.topo.gIndex[ii][jj][0]
-                i = self.topo.gIndex[ii][jj][1]
-                j = self.topo.gIndex[ii][jj][2]
-                self.surfs[isurf].coef[i, j] = self.coef[ii].astype("d")
+        for isurf, (globalIndex, local) in enumerate(self.topo.gIndex.byEntity(self.nSurf)):
+            self.surfs[isurf].coef[local] = self.coef[globalIndex].astype("d")
 
         for isurf in range(self.nSurf):
             self.surfs[isurf].setEdgeCurves()
@@ -49,10 +49,10 @@ class pyNetwork:
         self.topo.calcGlobalNumbering(sizes)
 
         self.coef = np.zeros((self.topo.nGlobal, 3))
-        for i in range(len(self.coef)):
-            icurve = self.topo.gIndex[i][0][0]
-            ii = self.topo.gIndex[i][0][1]
-            self.coef[i] = self.curves[icurve].coef[ii]
+        first = self.topo.gIndex.first()
+        for icurve in range(self.nCurve):
+            mask = first[:, 0] == icurve
+            self.coef[mask] = self.curves[icurve].coef[first[mask, 1]]
 
     # ----------------------------------------------------------------------
     #               Curve Writing Output Functions
@@ -160,11 +160,8 @@ class pyNetwork:
 
     def _updateCurveCoef(self):
         """update the coefficents on the pyNetwork update"""
-        for ii in range(len(self.coef)):
-            for jj in range(len(self.topo.gIndex[ii])):
-                icurve = self.topo.gIndex[ii][jj][0]
-                i = self.topo.gIndex[ii][jj][1]
-                self.curves[icurve].coef[i] = self.coef[ii]
+        for icurve, (globalIndex, local) in enumerate(self.topo.gIndex.byEntity(self.nCurve)):
+            self.curves[icurve].coef[local] = self.coef[globalIndex]
 
     def getBounds(self, curves=None):
         """Determine the extents of the set of curves.
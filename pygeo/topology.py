@@ -3,13 +3,13 @@ import sys
 
 # External modules
 import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import reverse_cuthill_mckee
 
 # Local modules
-from .geo_utils.index_position import indexPosition1D, indexPosition2D, indexPosition3D
+from .geo_utils.index_position import indexPosition1D, indexPosition2D
 from .geo_utils.node_edge_face import (
     Edge,
-    EdgeCmpObject,
-    FaceCmpObject,
     nodesFromEdge,
     nodesFromFace,
     setEdgeValue,
@@ -17,8 +17,180 @@ from .geo_utils.node_edge_face import (
     setNodeValue,
 )
 from .geo_utils.norm import eDist
-from .geo_utils.orientation import edgeOrientation, faceOrientation
-from .geo_utils.remove_duplicates import pointReduce, unique, uniqueIndex
+from .geo_utils.orientation import edgeOrientationArray, faceOrientationArray
+from .geo_utils.remove_duplicates import pointReduce, unique, uniqueEntityIndex, uniqueIndex
+
+# Local node numbers on each of the 12 edges and 6 faces of a volume
+_volEdgeNodes = np.array([nodesFromEdge(iedge) for iedge in range(12)])
+_volFaceNodes = np.array([nodesFromFace(iface) for iface in range(6)])
+
+# The (i, j, k) size index along each of the 12 edges and the two
+# in-plane size indices of each of the 6 faces of a volume
+_volEdgeAxis = np.array([0, 0, 1, 1, 0, 0, 1, 1, 2, 2, 2, 2])
+_volFaceAxes = np.array([[0, 1], [0, 1], [1, 2], [1, 2], [0, 2], [0, 2]])
+
+# Interior of each of the 6 faces of a volume
+_volFaceSlices = [
+    (slice(1, -1), slice(1, -1), 0),
+    (slice(1, -1), slice(1, -1), -1),
+    (0, slice(1, -1), slice(1, -1)),
+    (-1, slice(1, -1), slice(1, -1)),
+    (slice(1, -1), 0, slice(1, -1)),
+    (slice(1, -1), -1, slice(1, -1)),
+]
+
+
+def _orientFaceIndex(faceIndex, faceDir):
+    """Return the face numbering faceIndex as seen from a volume whose
+    face has orientation faceDir"""
+    if faceDir in [1, 3, 5, 7]:
+        faceIndex = faceIndex[::-1, :]
+    if faceDir in [2, 3, 6, 7]:
+        faceIndex = faceIndex[:, ::-1]
+    if faceDir >= 4:
+        faceIndex = faceIndex.T
+
+    return faceIndex
+
+
+class GlobalIndex:
+    """
+    The global->local index of a topology in compressed (CSR) form. The
+    entries of global point ``i`` are the rows
+    ``entries[offsets[i]:offsets[i + 1]]``, each of which is
+    ``[ient, i, (j, (k))]``.
+
+    Indexing, ``len`` and iteration behave like the original list of
+    lists, so ``gIndex[i][jj][0]`` still works. Use :meth:`toList` to
+    get the actual nested lists.
+
+    Parameters
+    ----------
+    offsets : int array of size (nGlobal + 1)
+        Start of the entries of each global point
+    entries : int array of size (nEntries, nDim + 1)
+        The entity number and local indices of every entry
+    """
+
+    def __init__(self, offsets, entries):
+        self.offsets = np.asarray(offsets, "intc")
+        self.entries = np.asarray(entries, "intc")
+        self._entityIndex = None
+
+    @classmethod
+    def fromLocal(cls, lIndex, entityList=None):
+        """Create the global index from the local->global index arrays.
+        The entries of each global point are ordered by entity and then
+        by local index.
+
+        Parameters
+        ----------
+        lIndex : list of int arrays
+            The local->global index of each entity
+        entityList : list of int
+            The entity number of each lIndex array. Defaults to
+            ``range(len(lIndex))``
+        """
+        if entityList is None:
+            entityList = range(len(lIndex))
+
+        globalIndex = []
+        entries = []
+        for ient, index in zip(entityList, lIndex):
+            index = np.asarray(index)
+            globalIndex.append(index.flatten())
+            entries.append(
+                np.column_stack([np.full(index.size, ient), np.indices(index.shape).reshape((index.ndim, -1)).T])
+            )
+        globalIndex = np.concatenate(globalIndex)
+
+        offsets = np.zeros(np.max(globalIndex) + 2, "intc")
+        offsets[1:] = np.cumsum(np.bincount(globalIndex))
+
+        return cls(offsets, np.concatenate(entries)[np.argsort(globalIndex, kind="stable")])
+
+    @classmethod
+    def fromList(cls, gIndex):
+        """Create the global index from the original list of lists form"""
+        counts = [len(entries) for entries in gIndex]
+        offsets = np.zeros(len(gIndex) + 1, "intc")
+        offsets[1:] = np.cumsum(counts)
+
+        return cls(offsets, np.concatenate([np.reshape(entries, (len(entries), -1)) for entries in gIndex]))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.entries[self.offsets[i] : self.offsets[i + 1]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def toList(self):
+        """Return the global index as a list of lists of ``[ient, i, (j, (k))]``"""
+        entries = self.entries.tolist()
+        return [entries[self.offsets[i] : self.offsets[i + 1]] for i in range(len(self))]
+
+    def counts(self):
+        """Return the number of entries of each global point"""
+        return np.diff(self.offsets)
+
+    def globalIndex(self):
+        """Return the global point of each entry"""
+        return np.repeat(np.arange(len(self), dtype="intc"), self.counts())
+
+    def first(self):
+        """Return the first entry of each global point"""
+        return self.entries[self.offsets[:-1]]
+
+    def byEntity(self, nEnt):
+        """Split the entries by entity.
+
+        Parameters
+        ----------
+        nEnt : int
+            The number of entities
+
+        Returns
+        -------
+        entityIndex : list
+            For each entity, a tuple of the global point of its entries
+            and a tuple of index arrays for the local indices, so that
+            ``coef[local] = globalCoef[glob]`` sets the local values.
+            The split is computed once and cached.
+        """
+        if self._entityIndex is not None and len(self._entityIndex) == nEnt:
+            return self._entityIndex
+
+        globalIndex = self.globalIndex()
+        order = np.argsort(self.entries[:, 0], kind="stable")
+        split = np.searchsorted(self.entries[order, 0], np.arange(nEnt + 1))
+
+        entityIndex = []
+        for ient in range(nEnt):
+            rows = order[split[ient] : split[ient + 1]]
+            entityIndex.append((globalIndex[rows], tuple(self.entries[rows, 1:].T)))
+        self._entityIndex = entityIndex
+
+        return entityIndex
+
+    def permute(self, perm):
+        """Return a new global index with the global points reordered
+
+        Parameters
+        ----------
+        perm : int array
+            perm[new] = old global index
+        """
+        counts = self.counts()[perm]
+        offsets = np.zeros(len(perm) + 1, "intc")
+        offsets[1:] = np.cumsum(counts)
+        rows = np.repeat(self.offsets[perm] - offsets[:-1], counts) + np.arange(offsets[-1])
+
+        return GlobalIndex(offsets, self.entries[rows])
+
 
 # --------------------------------------------------------------
 #                Topology classes
@@ -69,8 +241,9 @@ class Topology:
 
         lIndex : ndarray
             The local->global list of arrays for each volume
-        gIndex : ndarray
-            The global->local list points for the entire topology
+        gIndex : GlobalIndex
+            The global->local list points for the entire topology, stored
+            in compressed form
         edges : ndarray
             The list of edge objects defining the topology
         simple : bool
@@ -361,6 +534,58 @@ class Topology:
 
         return nList
 
+    def reorderRCM(self):
+        """Renumber the global control points with the reverse
+        Cuthill-McKee algorithm. Two control points are considered
+        adjacent when they are neighbours in the local numbering of any
+        entity. This reduces the bandwidth of operators like dPtdCoef
+        which improves memory locality for the sparse products. Must be
+        called after calcGlobalNumbering. lIndex and gIndex are permuted
+        consistently.
+
+        Returns
+        -------
+        perm : int array
+            perm[new] = old global index
+        """
+        rows = []
+        cols = []
+        for lIndex in self.lIndex:
+            lIndex = np.asarray(lIndex)
+            for axis in range(lIndex.ndim):
+                n = lIndex.shape[axis]
+                rows.append(np.take(lIndex, np.arange(n - 1), axis=axis).flatten())
+                cols.append(np.take(lIndex, np.arange(1, n), axis=axis).flatten())
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        graph = sparse.csr_matrix(
+            (np.ones(2 * len(rows)), (np.append(rows, cols), np.append(cols, rows))),
+            shape=(self.nGlobal, self.nGlobal),
+        )
+
+        perm = reverse_cuthill_mckee(graph, symmetric_mode=True)
+        invPerm = np.zeros(self.nGlobal, "intc")
+        invPerm[perm] = np.arange(self.nGlobal)
+
+        self.lIndex = [invPerm[lIndex].astype("intc") for lIndex in self.lIndex]
+        if self.gIndex is not None:
+            self.gIndex = self.gIndex.permute(perm)
+
+        return perm
+
+    def _greedyReorder(self):
+        """Renumber the global points in the order they are first
+        encountered when looping over the entities and their local
+        indices. lIndex and gIndex are permuted consistently."""
+        _, firstPos = np.unique(np.concatenate([lIndex.flatten() for lIndex in self.lIndex]), return_index=True)
+        perm = np.argsort(firstPos, kind="stable")
+        invPerm = np.zeros(len(perm), "intc")
+        invPerm[perm] = np.arange(len(perm))
+
+        self.lIndex = [invPerm[lIndex].astype("intc") for lIndex in self.lIndex]
+        if self.gIndex is not None:
+            self.gIndex = self.gIndex.permute(perm)
+
 
 class CurveTopology(Topology):
     """
@@ -439,7 +664,6 @@ class CurveTopology(Topology):
         # Assign unique numbers to the edges
         for ii in range(len(curveList)):
             curSize = [sizes[ii]]
-            icurve = curveList[ii]
             for iedge in range(1):
                 edge = self.edgeLink[ii][iedge]
 
@@ -448,11 +672,7 @@ class CurveTopology(Topology):
                         edgeIndex[edge].append(counter)
                         counter += 1
 
-        gIndex = [[] for i in range(counter)]  # We must add [] for
-        # each global node
-
         for ii in range(len(curveList)):
-            icurve = curveList[ii]
             N = sizes[ii]
             lIndex.append(-1 * np.ones(N, "intc"))
 
@@ -462,7 +682,6 @@ class CurveTopology(Topology):
                 if _type == 1:  # Node
                     curNode = self.nodeLink[ii][node]
                     lIndex[ii][i] = nodeIndex[curNode]
-                    gIndex[nodeIndex[curNode]].append([icurve, i])
                 else:
                     if self.edgeDir[ii][0] == -1:
                         curIndex = edgeIndex[self.edgeLink[ii][0]][N - i - 2]
@@ -470,10 +689,9 @@ class CurveTopology(Topology):
                         curIndex = edgeIndex[self.edgeLink[ii][0]][i - 1]
 
                     lIndex[ii][i] = curIndex
-                    gIndex[curIndex].append([icurve, i])
 
-        self.nGlobal = len(gIndex)
-        self.gIndex = gIndex
+        self.nGlobal = counter
+        self.gIndex = GlobalIndex.fromLocal(lIndex, curveList)
         self.lIndex = lIndex
 
 
@@ -683,7 +901,6 @@ class SurfaceTopology(Topology):
 
         # ----------------- Start of Edge Computation ---------------------
         counter = 0
-        gIndex = []
         lIndex = []
 
         if len(sizes) != len(surfaceList):
@@ -698,7 +915,6 @@ class SurfaceTopology(Topology):
         # Assign unique numbers to the edges
         for ii in range(len(surfaceList)):
             curSize = [sizes[ii][0], sizes[ii][0], sizes[ii][1], sizes[ii][1]]
-            isurf = surfaceList[ii]
             for iedge in range(4):
                 edge = self.edgeLink[ii][iedge]
 
@@ -713,12 +929,9 @@ class SurfaceTopology(Topology):
                             edgeIndex[edge].append(counter)
                             counter += 1
 
-        gIndex = [[] for i in range(counter)]  # We must add [] for
-        # each global node
         lIndex = []
         # Now actually fill everything up
         for ii in range(len(surfaceList)):
-            isurf = surfaceList[ii]
             N = sizes[ii][0]
             M = sizes[ii][1]
             lIndex.append(-1 * np.ones((N, M), "intc"))
@@ -729,7 +942,6 @@ class SurfaceTopology(Topology):
 
                     if _type == 0:  # Interior
                         lIndex[ii][i, j] = counter
-                        gIndex.append([[isurf, i, j]])
                         counter += 1
                     elif _type == 1:  # Edge
                         if edge in [0, 1]:
@@ -745,46 +957,19 @@ class SurfaceTopology(Topology):
                             else:
                                 curIndex = edgeIndex[self.edgeLink[ii][edge]][j - 1]
                         lIndex[ii][i, j] = curIndex
-                        gIndex[curIndex].append([isurf, i, j])
 
                     else:  # Node
                         curNode = self.nodeLink[ii][node]
                         lIndex[ii][i, j] = nodeIndex[curNode]
-                        gIndex[nodeIndex[curNode]].append([isurf, i, j])
         # end for (surface loop)
 
-        # Reorder the indices with a greedy scheme
-        newIndices = np.zeros(len(gIndex), "intc")
-        newIndices[:] = -1
-        newGIndex = [[] for i in range(len(gIndex))]
-        counter = 0
-
-        # Re-order the lIndex
-        for ii in range(len(surfaceList)):
-            isurf = surfaceList[ii]
-            N = sizes[ii][0]
-            M = sizes[ii][1]
-            for i in range(N):
-                for j in range(M):
-                    if newIndices[lIndex[ii][i, j]] == -1:
-                        newIndices[lIndex[ii][i, j]] = counter
-                        lIndex[ii][i, j] = counter
-                        counter += 1
-                    else:
-                        lIndex[ii][i, j] = newIndices[lIndex[ii][i, j]]
-
-        # Re-order the gIndex
-        for ii in range(len(gIndex)):
-            isurf = gIndex[ii][0][0]
-            i = gIndex[ii][0][1]
-            j = gIndex[ii][0][2]
-            pt = lIndex[isurf][i, j]
-            newGIndex[pt] = gIndex[ii]
-
-        self.nGlobal = len(gIndex)
-        self.gIndex = newGIndex
+        self.nGlobal = counter
+        self.gIndex = GlobalIndex.fromLocal(lIndex, surfaceList)
         self.lIndex = lIndex
 
+        # Reorder the indices with a greedy scheme
+        self._greedyReorder()
+
     def getSurfaceFromEdge(self, edge):
         """Determine the surfaces and their edgeLink index that points to edge iedge"""
         # Its not efficient but it works - scales with Nface not constant
@@ -879,95 +1064,53 @@ class BlockTopology(Topology):
         # ----------------------------------------------------------
         #                     Unique Edges
         # ----------------------------------------------------------
-        # Now determine the unique edges:
-        edgeObjs = []
-        origEdges = []
-        for ivol in range(nVol):
-            for iedge in range(12):
-                # Node number on volume
-                n1, n2 = nodesFromEdge(iedge)
-
-                # Actual Global Node Number
-                n1 = nodeLink[ivol][n1]
-                n2 = nodeLink[ivol][n2]
-
-                # Midpoint
-                midpoint = coords[ivol][iedge + 8]
-
-                # Sorted Nodes:
-                ns = sorted([n1, n2])
-
-                # Append the new edgeCmp Object
-                edgeObjs.append(EdgeCmpObject(ns[0], ns[1], n1, n2, midpoint, edgeTol))
-
-                # Keep track of original edge orientation---needed for
-                # face direction
-                origEdges.append([n1, n2])
+        # Global node numbers of the two ends of every edge of every
+        # volume. Keep the original orientation---needed for edge direction
+        origEdges = nodeLink[:, _volEdgeNodes].reshape((nVol * 12, 2))
+        edgeMidPts = coords[:, 8:20, :].reshape((nVol * 12, 3))
 
         # Generate unique set of edges
-        uniqueEdgeObjs, edgeLink = uniqueIndex(edgeObjs)
+        uniqueEdges, edgeLink = uniqueEntityIndex(np.sort(origEdges, axis=1), edgeMidPts, edgeTol)
+        uniqueEdgeNodes = origEdges[uniqueEdges]
+
+        edgeDir = edgeOrientationArray(origEdges, uniqueEdgeNodes[edgeLink])
 
-        edgeDir = []
-        for i in range(len(edgeObjs)):  # This is nVol * 12
-            edgeDir.append(edgeOrientation(origEdges[i], uniqueEdgeObjs[edgeLink[i]].nodes))
         # ----------------------------------------------------------
         #                     Unique Faces
         # ----------------------------------------------------------
-
-        faceObjs = []
-        origFaces = []
-        for ivol in range(nVol):
-            for iface in range(6):
-                # Node number on volume
-                n1, n2, n3, n4 = nodesFromFace(iface)
-
-                # Actual Global Node Number
-                n1 = nodeLink[ivol][n1]
-                n2 = nodeLink[ivol][n2]
-                n3 = nodeLink[ivol][n3]
-                n4 = nodeLink[ivol][n4]
-
-                # Midpoint --> May be [0, 0, 0] -> This is OK
-                midpoint = coords[ivol][iface + 8 + 12]
-
-                # Sort the nodes before they go into the faceObject
-                ns = sorted([n1, n2, n3, n4])
-                faceObjs.append(FaceCmpObject(ns[0], ns[1], ns[2], ns[3], n1, n2, n3, n4, midpoint, 1e-4))
-                # Keep track of original face orientation---needed for
-                # face direction
-                origFaces.append([n1, n2, n3, n4])
+        origFaces = nodeLink[:, _volFaceNodes].reshape((nVol * 6, 4))
+        # Midpoint --> May be [0, 0, 0] -> This is OK
+        faceMidPts = coords[:, 20:26, :].reshape((nVol * 6, 3))
 
         # Generate unique set of faces
-        uniqueFaceObjs, faceLink = uniqueIndex(faceObjs)
+        uniqueFaces, faceLink = uniqueEntityIndex(np.sort(origFaces, axis=1), faceMidPts, 1e-4)
+        uniqueFaceNodes = origFaces[uniqueFaces]
 
-        faceDir = []
-        faceDirRev = []
-        for i in range(len(faceObjs)):  # This is nVol * 12
-            faceDir.append(faceOrientation(uniqueFaceObjs[faceLink[i]].nodes, origFaces[i]))
-            faceDirRev.append(faceOrientation(origFaces[i], uniqueFaceObjs[faceLink[i]].nodes))
+        faceDir = faceOrientationArray(uniqueFaceNodes[faceLink], origFaces)
+        faceDirRev = faceOrientationArray(origFaces, uniqueFaceNodes[faceLink])
 
         # --------- Set the Requried Data for this class ------------
         self.nNode = len(un)
-        self.nEdge = len(uniqueEdgeObjs)
-        self.nFace = len(uniqueFaceObjs)
+        self.nEdge = len(uniqueEdges)
+        self.nFace = len(uniqueFaces)
         self.nVol = len(coords)
         self.nEnt = self.nVol
 
         self.nodeLink = nodeLink
-        self.edgeLink = np.array(edgeLink).reshape((nVol, 12))
-        self.faceLink = np.array(faceLink).reshape((nVol, 6))
+        self.edgeLink = edgeLink.reshape((nVol, 12))
+        self.faceLink = faceLink.reshape((nVol, 6))
 
-        self.edgeDir = np.array(edgeDir).reshape((nVol, 12))
-        self.faceDir = np.array(faceDir).reshape((nVol, 6))
-        self.faceDirRev = np.array(faceDirRev).reshape((nVol, 6))
+        self.edgeDir = edgeDir.reshape((nVol, 12))
+        self.faceDir = faceDir.reshape((nVol, 6))
+        self.faceDirRev = faceDirRev.reshape((nVol, 6))
 
         # Next Calculate the Design Group Information
         edgeLinkSorted = np.sort(edgeLink.flatten())
         edgeLinkInd = np.argsort(edgeLink.flatten())
 
         ue = []
-        for i in range(len(uniqueEdgeObjs)):
-            ue.append([uniqueEdgeObjs[i].nodes[0], uniqueEdgeObjs[i].nodes[1], -1, 0, 0])
+        for i in range(self.nEdge):
+            ue.append([uniqueEdgeNodes[i, 0], uniqueEdgeNodes[i, 1], -1, 0, 0])
 
         self._calcDGs(ue, edgeLink, edgeLinkSorted, edgeLinkInd)
 
@@ -976,8 +1119,10 @@ class BlockTopology(Topology):
         for i in range(self.nEdge):  # Create the edge objects
             self.edges.append(Edge(ue[i][0], ue[i][1], 0, 0, 0, ue[i][2], ue[i][3]))
 
-    def calcGlobalNumbering(self, sizes=None, volumeList=None, greedyReorder=False, gIndex=True):
-        """Internal function to calculate the global/local numbering for each volume"""
+    def calcGlobalNumbering(self, sizes=None, volumeList=None, greedyReorder=False, gIndex=True, rcmReorder=False):
+        """Internal function to calculate the global/local numbering for each volume.
+        If rcmReorder is True, the numbering is finally permuted with
+        reverse Cuthill-McKee to reduce the bandwidth."""
 
         if sizes is not None:
             for i in range(len(sizes)):
@@ -1006,171 +1151,104 @@ class BlockTopology(Topology):
             volumeList = np.arange(0, self.nVol)
 
         # ----------------- Start of Edge Computation ---------------------
-        counter = 0
-        gIndex = []
-        lIndex = []
-
         if len(sizes) != len(volumeList):
             raise ValueError("The list of sizes and the list of volumes must be the same length")
 
+        sizes = np.array(sizes, "intc")
+        nVolList = len(volumeList)
+        edgeLink = np.array(self.edgeLink[:nVolList])
+        faceLink = np.array(self.faceLink[:nVolList])
+
         # Assign unique numbers to the corners -> Corners are indexed
         # sequentially
         nodeIndex = np.arange(self.nNode)
         counter = len(nodeIndex)
 
-        edgeIndex = [np.empty((0), "intc") for i in range(self.nEdge)]
-        faceIndex = [np.empty((0, 0), "intc") for i in range(self.nFace)]
-        # Assign unique numbers to the edges
-
-        for ii in range(len(volumeList)):
-            curSizeE = [
-                sizes[ii][0],
-                sizes[ii][0],
-                sizes[ii][1],
-                sizes[ii][1],
-                sizes[ii][0],
-                sizes[ii][0],
-                sizes[ii][1],
-                sizes[ii][1],
-                sizes[ii][2],
-                sizes[ii][2],
-                sizes[ii][2],
-                sizes[ii][2],
-            ]
-
-            curSizeF = [
-                [sizes[ii][0], sizes[ii][1]],
-                [sizes[ii][0], sizes[ii][1]],
-                [sizes[ii][1], sizes[ii][2]],
-                [sizes[ii][1], sizes[ii][2]],
-                [sizes[ii][0], sizes[ii][2]],
-                [sizes[ii][0], sizes[ii][2]],
-            ]
-
-            ivol = volumeList[ii]
-            for iedge in range(12):
-                edge = self.edgeLink[ii][iedge]
-                if edgeIndex[edge].shape == (0,):  # Not added yet
-                    edgeIndex[edge] = np.resize(edgeIndex[edge], curSizeE[iedge] - 2)
-                    if self.edges[edge].degen == 1:
-                        # Get the counter value for this "node"
-                        index = nodeIndex[self.edges[edge].n1]
-                        for jj in range(curSizeE[iedge] - 2):
-                            edgeIndex[edge][jj] = index
-                    else:
-                        for jj in range(curSizeE[iedge] - 2):
-                            edgeIndex[edge][jj] = counter
-                            counter += 1
-
-            for iface in range(6):
-                face = self.faceLink[ii][iface]
-                if faceIndex[face].shape == (0, 0):
-                    faceIndex[face] = np.resize(faceIndex[face], [curSizeF[iface][0] - 2, curSizeF[iface][1] - 2])
-                    for iii in range(curSizeF[iface][0] - 2):
-                        for jjj in range(curSizeF[iface][1] - 2):
-                            faceIndex[face][iii, jjj] = counter
-                            counter += 1
-
-        # end for (volume list)
-
-        gIndex = [[] for i in range(counter)]  # We must add [] for
-        # each global node
-        lIndex = []
-
-        def addNode(i, j, k, N, M, L):
-            _type, number, _, _ = indexPosition3D(i, j, k, N, M, L)
-
-            if _type == 1:  # Face
-                if number in [0, 1]:
-                    icount = i
-                    imax = N
-                    jcount = j
-                    jmax = M
-                elif number in [2, 3]:
-                    icount = j
-                    imax = M
-                    jcount = k
-                    jmax = L
-                elif number in [4, 5]:
-                    icount = i
-                    imax = N
-                    jcount = k
-                    jmax = L
-
-                if self.faceDir[ii][number] == 0:
-                    curIndex = faceIndex[self.faceLink[ii][number]][icount - 1, jcount - 1]
-                elif self.faceDir[ii][number] == 1:
-                    curIndex = faceIndex[self.faceLink[ii][number]][imax - icount - 2, jcount - 1]
-                elif self.faceDir[ii][number] == 2:
-                    curIndex = faceIndex[self.faceLink[ii][number]][icount - 1, jmax - jcount - 2]
-                elif self.faceDir[ii][number] == 3:
-                    curIndex = faceIndex[self.faceLink[ii][number]][imax - icount - 2, jmax - jcount - 2]
-                elif self.faceDir[ii][number] == 4:
-                    curIndex = faceIndex[self.faceLink[ii][number]][jcount - 1, icount - 1]
-                elif self.faceDir[ii][number] == 5:
-                    curIndex = faceIndex[self.faceLink[ii][number]][jmax - jcount - 2, icount - 1]
-                elif self.faceDir[ii][number] == 6:
-                    curIndex = faceIndex[self.faceLink[ii][number]][jcount - 1, imax - icount - 2]
-                elif self.faceDir[ii][number] == 7:
-                    curIndex = faceIndex[self.faceLink[ii][number]][jmax - jcount - 2, imax - icount - 2]
-
-                lIndex[ii][i, j, k] = curIndex
-                gIndex[curIndex].append([ivol, i, j, k])
-
-            elif _type == 2:  # Edge
-                if number in [0, 1, 4, 5]:
-                    if self.edgeDir[ii][number] == -1:  # Its a reverse dir
-                        curIndex = edgeIndex[self.edgeLink[ii][number]][N - i - 2]
-                    else:
-                        curIndex = edgeIndex[self.edgeLink[ii][number]][i - 1]
-
-                elif number in [2, 3, 6, 7]:
-                    if self.edgeDir[ii][number] == -1:  # Its a reverse dir
-                        curIndex = edgeIndex[self.edgeLink[ii][number]][M - j - 2]
-                    else:
-                        curIndex = edgeIndex[self.edgeLink[ii][number]][j - 1]
-
-                elif number in [8, 9, 10, 11]:
-                    if self.edgeDir[ii][number] == -1:  # Its a reverse dir
-                        curIndex = edgeIndex[self.edgeLink[ii][number]][L - k - 2]
-                    else:
-                        curIndex = edgeIndex[self.edgeLink[ii][number]][k - 1]
-
-                lIndex[ii][i, j, k] = curIndex
-                gIndex[curIndex].append([ivol, i, j, k])
-
-            elif _type == 3:  # Node
-                curNode = self.nodeLink[ii][number]
-                lIndex[ii][i, j, k] = nodeIndex[curNode]
-                gIndex[nodeIndex[curNode]].append([ivol, i, j, k])
-
-        # end for (volume loop)
+        # Edges and faces are numbered the first time they are
+        # encountered, looping over the volumes and, within each volume,
+        # over the 12 edges and then the 6 faces. Find the first
+        # occurrences and lay the numbers out in that order.
+        edges, edgeFirst = np.unique(edgeLink.flatten(), return_index=True)
+        faces, faceFirst = np.unique(faceLink.flatten(), return_index=True)
+
+        edgeDegen = np.array([edge.degen == 1 for edge in self.edges], bool)
+        edgeLen = np.zeros(self.nEdge, "intc")
+        edgeLen[edges] = sizes[:, _volEdgeAxis].flatten()[edgeFirst] - 2
+        faceShape = np.zeros((self.nFace, 2), "intc")
+        faceShape[faces] = sizes[:, _volFaceAxes].reshape((nVolList * 6, 2))[faceFirst] - 2
+
+        # Degenerate edges just point back to their node
+        nNew = np.concatenate([np.where(edgeDegen[edges], 0, edgeLen[edges]), np.prod(faceShape[faces], axis=1)])
+        order = np.argsort(
+            np.concatenate([(edgeFirst // 12) * 18 + edgeFirst % 12, (faceFirst // 6) * 18 + 12 + faceFirst % 6])
+        )
+        start = np.zeros(len(nNew), "intc")
+        start[order] = counter + np.cumsum(nNew[order]) - nNew[order]
+        counter += np.sum(nNew)
+
+        edgeStart = np.zeros(self.nEdge, "intc")
+        edgeStart[edges] = start[: len(edges)]
+        faceStart = np.zeros(self.nFace, "intc")
+        faceStart[faces] = start[len(edges) :]
 
         # Now actually fill everything up
-        for ii in range(len(volumeList)):
+        lIndex = []
+        boundary = []
+        boundaryIndex = []
+        boundaryIJK = {}
+        for ii in range(nVolList):
             ivol = volumeList[ii]
             N = sizes[ii][0]
             M = sizes[ii][1]
             L = sizes[ii][2]
             lIndex.append(-1 * np.ones((N, M, L), "intc"))
 
-            # DO the 6 planes
-            for k in [0, L - 1]:
-                for i in range(N):
-                    for j in range(M):
-                        addNode(i, j, k, N, M, L)
-            for j in [0, M - 1]:
-                for i in range(N):
-                    for k in range(1, L - 1):
-                        addNode(i, j, k, N, M, L)
-
-            for i in [0, N - 1]:
-                for j in range(1, M - 1):
-                    for k in range(1, L - 1):
-                        addNode(i, j, k, N, M, L)
+            # 8 Corners
+            for iNode in range(8):
+                setNodeValue(lIndex[ii], nodeIndex[self.nodeLink[ii][iNode]], iNode)
+
+            # 12 Edges
+            for iEdge in range(12):
+                edge = edgeLink[ii][iEdge]
+                if edgeDegen[edge]:
+                    values = np.ones(edgeLen[edge], "intc") * nodeIndex[self.edges[edge].n1]
+                else:
+                    values = np.arange(edgeStart[edge], edgeStart[edge] + edgeLen[edge])
+                setEdgeValue(lIndex[ii], values, self.edgeDir[ii][iEdge], iEdge)
+
+            # 6 Faces
+            for iFace in range(6):
+                face = faceLink[ii][iFace]
+                values = np.arange(faceStart[face], faceStart[face] + np.prod(faceShape[face]))
+                values = _orientFaceIndex(values.reshape(faceShape[face]), self.faceDir[ii][iFace])
+                lIndex[ii][_volFaceSlices[iFace]] = values
+
+            # Collect the boundary nodes in the order they are added to
+            # gIndex: the two k planes, the two j planes and the two i planes
+            if (N, M, L) not in boundaryIJK:
+                ijk = []
+                for k in [0, L - 1]:
+                    i, j = np.mgrid[0:N, 0:M].reshape((2, -1))
+                    ijk.append(np.stack([i, j, np.full_like(i, k)], axis=1))
+                for j in [0, M - 1]:
+                    i, k = np.mgrid[0:N, 1 : L - 1].reshape((2, -1))
+                    ijk.append(np.stack([i, np.full_like(i, j), k], axis=1))
+                for i in [0, N - 1]:
+                    j, k = np.mgrid[1 : M - 1, 1 : L - 1].reshape((2, -1))
+                    ijk.append(np.stack([np.full_like(j, i), j, k], axis=1))
+                boundaryIJK[(N, M, L)] = np.concatenate(ijk)
+            ijk = boundaryIJK[(N, M, L)]
+            boundary.append(np.column_stack([np.full(len(ijk), ivol), ijk]))
+            boundaryIndex.append(lIndex[ii][ijk[:, 0], ijk[:, 1], ijk[:, 2]])
+        # end for (volume list)
+
+        # Group the boundary entries by global index, keeping their order
+        boundaryIndex = np.concatenate(boundaryIndex)
+        entries = [np.concatenate(boundary)[np.argsort(boundaryIndex, kind="stable")]]
+        counts = [np.bincount(boundaryIndex, minlength=counter)]
 
         # Add the remainder
-        for ii in range(len(volumeList)):
+        for ii in range(nVolList):
             ivol = volumeList[ii]
             N = sizes[ii][0]
             M = sizes[ii][1]
@@ -1185,51 +1263,26 @@ class BlockTopology(Topology):
             lIndex[ii][1 : N - 1, 1 : M - 1, 1 : L - 1] = np.arange(counter, counter + toAdd).reshape((NN, MM, LL))
 
             counter = counter + toAdd
-            A = np.zeros((toAdd, 1, 4), "intc")
-            A[:, 0, 0] = ivol
-            A[:, 0, 1:] = np.mgrid[1 : N - 1, 1 : M - 1, 1 : L - 1].transpose((1, 2, 3, 0)).reshape((toAdd, 3))
-            gIndex.extend(A)
+            A = np.zeros((toAdd, 4), "intc")
+            A[:, 0] = ivol
+            A[:, 1:] = np.mgrid[1 : N - 1, 1 : M - 1, 1 : L - 1].transpose((1, 2, 3, 0)).reshape((toAdd, 3))
+            entries.append(A)
+            counts.append(np.ones(toAdd, "intc"))
+
+        offsets = np.zeros(counter + 1, "intc")
+        offsets[1:] = np.cumsum(np.concatenate(counts))
 
         # Set the following as atributes
-        self.nGlobal = len(gIndex)
-        self.gIndex = gIndex
+        self.nGlobal = counter
+        self.gIndex = GlobalIndex(offsets, np.concatenate(entries))
         self.lIndex = lIndex
 
         if greedyReorder:
             # Reorder the indices with a greedy scheme
-            newIndices = np.zeros(len(gIndex), "intc")
-            newIndices[:] = -1
-            newGIndex = [[] for i in range(len(gIndex))]
-            counter = 0
-
-            # Re-order the lIndex
-            for ii in range(len(volumeList)):
-                ivol = volumeList[ii]
-                N = sizes[ii][0]
-                M = sizes[ii][1]
-                L = sizes[ii][2]
-                for i in range(N):
-                    for j in range(M):
-                        for k in range(L):
-                            if newIndices[lIndex[ii][i, j, k]] == -1:
-                                newIndices[lIndex[ii][i, j, k]] = counter
-                                lIndex[ii][i, j, k] = counter
-                                counter += 1
-                            else:
-                                lIndex[ii][i, j, k] = newIndices[lIndex[ii][i, j, k]]
+            self._greedyReorder()
 
-            # Re-order the gIndex
-            for ii in range(len(gIndex)):
-                ivol = gIndex[ii][0][0]
-                i = gIndex[ii][0][1]
-                j = gIndex[ii][0][2]
-                k = gIndex[ii][0][3]
-                pt = lIndex[ivol][i, j, k]
-                newGIndex[pt] = gIndex[ii]
-
-            self.gIndex = newGIndex
-            self.lIndex = lIndex
-        # end if (greedy reorder)
+        if rcmReorder:
+            self.reorderRCM()
 
     def calcGlobalNumbering2(self, sizes=None, gIndex=True, volumeList=None, greedyReorder=False):
         """Internal function to calculate the global/local numbering for each volume"""
@@ -1359,19 +1412,7 @@ class BlockTopology(Topology):
         # end for
 
         if gIndex:
-            # We must add [] for each global node
-            gIndex = [[] for i in range(counter)]
-
-            for ii in range(len(volumeList)):
-                iVol = volumeList[ii]
-                N = sizes[ii][0]
-                M = sizes[ii][1]
-                L = sizes[ii][2]
-
-                for i in range(N):
-                    for j in range(M):
-                        for k in range(L):
-                            gIndex[lIndex[ii][i, j, k]].append([iVol, i, j, k])
+            gIndex = GlobalIndex.fromLocal(lIndex, volumeList)
         else:
             gIndex = None
 
@@ -1381,39 +1422,7 @@ class BlockTopology(Topology):
 
         if greedyReorder:
             # Reorder the indices with a greedy scheme
-            newIndices = np.zeros(len(gIndex), "intc")
-            newIndices[:] = -1
-            newGIndex = [[] for i in range(len(gIndex))]
-            counter = 0
-
-            # Re-order the lIndex
-            for ii in range(len(volumeList)):
-                ivol = volumeList[ii]
-                N = sizes[ii][0]
-                M = sizes[ii][1]
-                L = sizes[ii][2]
-                for i in range(N):
-                    for j in range(M):
-                        for k in range(L):
-                            if newIndices[lIndex[ii][i, j, k]] == -1:
-                                newIndices[lIndex[ii][i, j, k]] = counter
-                                lIndex[ii][i, j, k] = counter
-                                counter += 1
-                            else:
-                                lIndex[ii][i, j, k] = newIndices[lIndex[ii][i, j, k]]
-
-            # Re-order the gIndex
-            for ii in range(len(gIndex)):
-                ivol = gIndex[ii][0][0]
-                i = gIndex[ii][0][1]
-                j = gIndex[ii][0][2]
-                k = gIndex[ii][0][3]
-                pt = lIndex[ivol][i, j, k]
-                newGIndex[pt] = gIndex[ii]
-
-            self.gIndex = newGIndex
-            self.lIndex = lIndex
-        # end if (greedy reorder)
+            self._greedyReorder()
 
     def reOrder(self, reOrderList):
         """This function takes as input a permutation list which is used to reorder the entities in the topology object"""
@@ -0,0 +1,52 @@
+"""
+Benchmark of the BlockTopology connectivity and global numbering.
+
+The blocks are unit cubes on a structured grid, each with a random
+orientation, so that the edge and face orientations are exercised.
+Run with ``python bench_blockTopology.py``.
+"""
+
+# Standard Python modules
+import itertools
+import time
+
+# External modules
+import numpy as np
+
+# First party modules
+from pygeo.topology import BlockTopology
+
+
+def getBlocks(nx, ny, nz, seed=0):
+    # the corners of each block in the (8, 3) order used by BlockTopology, with a random orientation
+    rng = np.random.default_rng(seed)
+    perms = list(itertools.permutations(range(3)))
+    coords = []
+    for a in range(nx):
+        for b in range(ny):
+            for c in range(nz):
+                perm = list(perms[rng.integers(len(perms))])
+                flip = rng.integers(2, size=3)
+                corners = []
+                for k in range(2):
+                    for j in range(2):
+                        for i in range(2):
+                            loc = np.array([i, j, k])[perm]
+                            loc = np.where(flip, 1 - loc, loc)
+                            corners.append(np.array([a, b, c]) + loc)
+                coords.append(corners)
+    return np.array(coords, dtype=float)
+
+
+if __name__ == "__main__":
+    for nx, ny, nz, n in [(6, 6, 4, 10), (10, 10, 5, 6), (4, 4, 4, 20)]:
+        coords = getBlocks(nx, ny, nz)
+        sizes = np.full((len(coords), 3), n)
+
+        t0 = time.perf_counter()
+        topo = BlockTopology(coords=coords)
+        t1 = time.perf_counter()
+        topo.calcGlobalNumbering(sizes)
+        t2 = time.perf_counter()
+
+        print(f"{len(coords)} volumes, {n}^3 nodes: init {t1 - t0:.3f} s, numbering {t2 - t1:.3f} s")
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark of the volume and volume sensitivity evaluation of VolumeConstraint.
+
+The array evaluation is compared with a loop over the cells that calls the
+scalar volumeHex and volumeHex_b routines, which is how the volume was
+evaluated before. Run with ``python bench_volumeConstraint.py``.
+"""
+
+# Standard Python modules
+import time
+import types
+
+# External modules
+import numpy as np
+
+# First party modules
+from pygeo.constraints.volumeConstraint import VolumeConstraint
+from pygeo.geo_utils.polygon import volumeHex, volumeHex_b
+
+
+def getGrid(nSpan, nChord, rng):
+    # a slightly perturbed box with the (nSpan, nChord, 2, 3) layout of the constraint coordinates
+    s = np.linspace(0, 3, nSpan)
+    c = np.linspace(0, 1, nChord)
+    x = np.zeros((nSpan, nChord, 2, 3))
+    x[..., 0] = c[None, :, None]
+    x[..., 1] = s[:, None, None]
+    x[..., 0, 2] = -0.1
+    x[..., 1, 2] = 0.1
+    return x + 0.01 * rng.random(x.shape)
+
+
+def loopVolume(x):
+    V = 0.0
+    for j in range(x.shape[1] - 1):
+        for i in range(x.shape[0] - 1):
+            V += volumeHex(
+                x[i, j, 0],
+                x[i + 1, j, 0],
+                x[i, j + 1, 0],
+                x[i + 1, j + 1, 0],
+                x[i, j, 1],
+                x[i + 1, j, 1],
+                x[i, j + 1, 1],
+                x[i + 1, j + 1, 1],
+            )
+    return V
+
+
+def loopVolumeSens(x, sign):
+    xb = np.zeros_like(x)
+    for j in range(x.shape[1] - 1):
+        for i in range(x.shape[0] - 1):
+            volumeHex_b(
+                x[i, j, 0],
+                x[i + 1, j, 0],
+                x[i, j + 1, 0],
+                x[i + 1, j + 1, 0],
+                x[i, j, 1],
+                x[i + 1, j, 1],
+                x[i, j + 1, 1],
+                x[i + 1, j + 1, 1],
+                xb[i, j, 0],
+                xb[i + 1, j, 0],
+                xb[i, j + 1, 0],
+                xb[i + 1, j + 1, 0],
+                xb[i, j, 1],
+                xb[i + 1, j, 1],
+                xb[i, j + 1, 1],
+                xb[i + 1, j + 1, 1],
+            )
+    # the sensitivity of the absolute value of the volume
+    return sign * xb.reshape(-1, 3) / 6.0
+
+
+def timeit(func, nRepeat=5):
+    t0 = time.perf_counter()
+    for _ in range(nRepeat):
+        result = func()
+    return result, (time.perf_counter() - t0) / nRepeat
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for nSpan, nChord in [(10, 10), (20, 30), (50, 50)]:
+        x = getGrid(nSpan, nChord, rng)
+        # only the attributes that evalVolume and evalVolumeSens use
+        con = types.SimpleNamespace(
+            nSpan=nSpan,
+            nChord=nChord,
+            coords=x.reshape(-1, 3),
+            flipVolume=False,
+            _getHexCorners=VolumeConstraint._getHexCorners,
+        )
+
+        V, tArray = timeit(lambda: VolumeConstraint.evalVolume(con))
+        VLoop, tLoop = timeit(lambda: abs(loopVolume(x)))
+        dV, tArraySens = timeit(lambda: VolumeConstraint.evalVolumeSens(con))
+        sign = np.sign(loopVolume(x))
+        dVLoop, tLoopSens = timeit(lambda: loopVolumeSens(x, sign))
+
+        print(f"{nSpan} x {nChord} grid")
+        print(
+            f"  volume: loop {1e3 * tLoop:.2f} ms, arrays {1e3 * tArray:.2f} ms, "
+            + f"rel. diff {abs(V - VLoop) / VLoop:.1e}"
+        )
+        print(
+            f"  sens:   loop {1e3 * tLoopSens:.2f} ms, arrays {1e3 * tArraySens:.2f} ms, "
+            + f"max diff {np.max(np.abs(dV - dVLoop)):.1e}"
+        )
@@ -8,7 +8,7 @@ import commonUtils
 import numpy as np
 
 # First party modules
-from pygeo import DVGeometry, geo_utils
+from pygeo import DVGeometry, geo_utils, pyBlock
 
 
 class RegTestPyGeo(unittest.TestCase):
@@ -277,6 +277,100 @@ class RegTestPyGeo(unittest.TestCase):
                 sens = big.totalSensitivity(dIdPt, "X")
                 handler.root_add_dict("dIdx", sens, rtol=1e-12, atol=1e-12, msg="Check sens dict")
 
+    def test_rcm_reorder(self):
+        # Two connected volumes so the global numbering is non-trivial
+        slices = np.array(
+            [
+                [[[0, 0, 0], [1, 0, 0]], [[0, 0.2, 0], [1, 0.2, 0]]],
+                [[[0, 0, 2], [1, 0, 2]], [[0, 0.2, 2], [1, 0.2, 2]]],
+                [[[0.5, 0, 6], [1, 0, 6]], [[0.5, 0.2, 6], [1, 0.2, 6]]],
+            ],
+            dtype="d",
+        )
+        file_name = os.path.join(self.base_path, "../../input_files/rcm_wing.xyz")
+        geo_utils.write_wing_FFD_file(file_name, slices, [4, 5], 3, 5)
+        DVGeo = DVGeometry(file_name)
+        DVGeoRCM = DVGeometry(file_name, rcmReorder=True)
+        os.remove(file_name)
+
+        # Same control points, just numbered differently
+        perm = np.lexsort(DVGeo.FFD.coef.T)
+        permRCM = np.lexsort(DVGeoRCM.FFD.coef.T)
+        np.testing.assert_allclose(DVGeo.FFD.coef[perm], DVGeoRCM.FFD.coef[permRCM])
+        for lIndex, lIndexRCM in zip(DVGeo.FFD.topo.lIndex, DVGeoRCM.FFD.topo.lIndex):
+            np.testing.assert_allclose(DVGeo.FFD.coef[lIndex], DVGeoRCM.FFD.coef[lIndexRCM])
+
+        points = np.array([[0.5, 0.1, 0.5], [0.75, 0.1, 3.0], [0.8, 0.05, 5.5]])
+        for geo in [DVGeo, DVGeoRCM]:
+            geo.addRefAxis("ref", xFraction=0.25, alignIndex="k")
+            add_vars(geo, "wing", translate=True, rotate="z")
+            geo.addPointSet(points, "X")
+            geo.setDesignVars({"translate_wing": [0.1, -0.2, 0.3], "rotate_z_wing": 5.0})
+
+        np.testing.assert_allclose(DVGeo.update("X"), DVGeoRCM.update("X"), rtol=1e-12, atol=1e-12)
+        DVGeo.computeTotalJacobian("X")
+        DVGeoRCM.computeTotalJacobian("X")
+        np.testing.assert_allclose(DVGeo.JT["X"].toarray(), DVGeoRCM.JT["X"].toarray(), rtol=1e-12, atol=1e-12)
+
+    def test_global_index(self):
+        slices = np.array(
+            [
+                [[[0, 0, 0], [1, 0, 0]], [[0, 0.2, 0], [1, 0.2, 0]]],
+                [[[0, 0, 2], [1, 0, 2]], [[0, 0.2, 2], [1, 0.2, 2]]],
+                [[[0.5, 0, 6], [1, 0, 6]], [[0.5, 0.2, 6], [1, 0.2, 6]]],
+            ],
+            dtype="d",
+        )
+        file_name = os.path.join(self.base_path, "../../input_files/gindex_wing.xyz")
+        geo_utils.write_wing_FFD_file(file_name, slices, [4, 5], 3, 5)
+        DVGeo = DVGeometry(file_name)
+        os.remove(file_name)
+        topo = DVGeo.FFD.topo
+
+        # Every entry of the global index points back to its global point
+        gIndex = topo.gIndex
+        gIndexList = gIndex.toList()
+        self.assertEqual(len(gIndex), topo.nGlobal)
+        for ivol, i, j, k in gIndex.entries:
+            self.assertIn([ivol, i, j, k], gIndexList[topo.lIndex[ivol][i, j, k]])
+        for ivol, (globalIndex, local) in enumerate(gIndex.byEntity(DVGeo.FFD.nVol)):
+            np.testing.assert_array_equal(topo.lIndex[ivol][local], globalIndex)
+
+        # Every local point has exactly one entry
+        self.assertEqual(len(gIndex.entries), sum(lIndex.size for lIndex in topo.lIndex))
+        self.assertTrue(np.any(gIndex.counts() > 1))
+
+    def test_fitGlobal_solvers(self):
+        # Two connected volumes, with enough points in each direction for a cubic fit
+        slices = np.array(
+            [
+                [[[0, 0, 0], [1, 0, 0]], [[0, 0.2, 0], [1, 0.2, 0]]],
+                [[[0, 0, 2], [1, 0, 2]], [[0, 0.2, 2], [1, 0.2, 2]]],
+                [[[0.5, 0, 6], [1, 0, 6]], [[0.5, 0.2, 6], [1, 0.2, 6]]],
+            ],
+            dtype="d",
+        )
+        file_name = os.path.join(self.base_path, "../../input_files/fit_wing.xyz")
+        geo_utils.write_wing_FFD_file(file_name, slices, [8, 10], 6, 5)
+        block = pyBlock("plot3d", fileName=file_name, FFD=False)
+        os.remove(file_name)
+        block.doConnectivity()
+
+        block.fitGlobal()
+        coefDirect = block.coef.copy()
+
+        # The iterative solvers give the same fit
+        for solver in ["cg", "lsqr"]:
+            block.fitGlobal(solver=solver, tol=1e-12)
+            np.testing.assert_allclose(block.coef, coefDirect, rtol=0, atol=1e-8)
+
+        # Starting from the converged fit, a single iteration is enough
+        block.fitGlobal(solver="cg", tol=1e-8, maxIter=1)
+        self.assertGreater(np.max(np.abs(block.coef - coefDirect)), 1e-6)
+        block.coef = coefDirect.copy()
+        block.fitGlobal(solver="cg", warmStart=True, tol=1e-8, maxIter=1)
+        np.testing.assert_allclose(block.coef, coefDirect, rtol=0, atol=1e-8)
+
 
 """
 The following are some helper functions for setting up the design variables for
@@ -147,7 +147,9 @@ class RegTestPyGeo(unittest.TestCase):
         if self.multi and not pysurfInstalled:
             self.skipTest("requires pySurf")
 
-    def generate_dvgeo_dvcon(self, geometry, addToDVGeo=False, intersected=False):
+    def generate_dvgeo_dvcon(
+        self, geometry, addToDVGeo=False, intersected=False, poolPointSets=True, sparseJacobian=False
+    ):
         """
         This function creates the DVGeometry and DVConstraints objects for each geometry used in this class.
 
@@ -190,7 +192,7 @@ class RegTestPyGeo(unittest.TestCase):
             DVGeoMulti.addComponent("deforming", DVGeo)
             DVGeoMulti.addComponent("stationary", DVGeoNozzle)
 
-        DVCon = DVConstraints()
+        DVCon = DVConstraints(poolPointSets=poolPointSets, sparseJacobian=sparseJacobian)
         nRefAxPts = DVGeo.addRefAxis("wing", xFraction=xFraction, alignIndex="k")
         self.nTwist = nRefAxPts - 1
 
@@ -545,6 +547,141 @@ class RegTestPyGeo(unittest.TestCase):
 
             funcs, funcsSens = self.wing_test_deformed(DVGeo, DVCon, handler)
 
+    def test_pointSetPool(self):
+        # the pooled point sets should give the same constraints as separate point sets
+        results = []
+        for poolPointSets in [True, False]:
+            DVGeo, DVCon = self.generate_dvgeo_dvcon("c172", poolPointSets=poolPointSets)
+
+            leList = [[0.7, 0.0, 0.1], [0.7, 0.0, 5.0]]
+            teList = [[0.9, 0.0, 0.1], [0.9, 0.0, 5.0]]
+            DVCon.addThicknessConstraints2D(leList, teList, 5, 5)
+            DVCon.addThicknessConstraints1D(leList, nCon=10, axis=[0, 1, 0])
+            DVCon.addSurfaceAreaConstraint()
+
+            xDV = DVGeo.getValues()
+            np.random.seed(37)
+            xDV["local"] = np.random.normal(0.0, 0.05, len(xDV["local"]))
+            DVGeo.setDesignVars(xDV)
+
+            funcs = {}
+            funcsSens = {}
+            DVCon.evalFunctions(funcs)
+            DVCon.evalFunctionsSens(funcsSens)
+            results.append((funcs, funcsSens))
+
+            # the five constraint point sets are merged into one
+            if not self.multi:
+                nPtSets = 1 if poolPointSets else 5
+                self.assertEqual(len(DVCon.DVGeometries["default"].points), nPtSets)
+
+        funcs, funcsSens = results[0]
+        for conName in funcs:
+            np.testing.assert_allclose(funcs[conName], results[1][0][conName], rtol=1e-12, atol=1e-12)
+            for dvName in funcsSens[conName]:
+                np.testing.assert_allclose(
+                    funcsSens[conName][dvName], results[1][1][conName][dvName], rtol=1e-10, atol=1e-10
+                )
+
+    def test_sensitivityBatch(self):
+        # the seeds registered in a batch should give the same sensitivities as evaluating them right away
+        DVGeo, DVCon = self.generate_dvgeo_dvcon("c172")
+
+        leList = [[0.7, 0.0, 0.1], [0.7, 0.0, 5.0]]
+        teList = [[0.9, 0.0, 0.1], [0.9, 0.0, 5.0]]
+        DVCon.addThicknessConstraints2D(leList, teList, 5, 5)
+        DVCon.addVolumeConstraint(leList, teList, 4, 4)
+        DVCon.addSurfaceAreaConstraint()
+        DVCon.addProjectedAreaConstraint()
+
+        xDV = DVGeo.getValues()
+        np.random.seed(37)
+        xDV["local"] = np.random.normal(0.0, 0.05, len(xDV["local"]))
+        DVGeo.setDesignVars(xDV)
+
+        funcs = {}
+        funcsSens = {}
+        DVCon.evalFunctions(funcs)
+        DVCon.evalFunctionsSens(funcsSens)
+
+        cons = [con for constraint in DVCon.constraints.values() for con in constraint.values()]
+        pool = DVCon.pointSetPools["default"]
+        for con in cons:
+            # the seeds of the surface constraints are summed over several point sets
+            sensRef = {}
+            con.evalFunctionsSens(sensRef, None)
+
+            # in a batch, nothing is evaluated until the pool is flushed
+            sens = {}
+            pool.startSensitivityBatch()
+            con.evalFunctionsSens(sens, None)
+            if not self.multi:
+                self.assertEqual(sens[con.name], {})
+            pool.flushSensitivities()
+            self.assertEqual(pool.pendingSeeds, [])
+            pool.endSensitivityBatch()
+
+            for dvName in sensRef[con.name]:
+                np.testing.assert_allclose(sens[con.name][dvName], sensRef[con.name][dvName], rtol=1e-12, atol=1e-12)
+                np.testing.assert_allclose(
+                    funcsSens[con.name][dvName], sensRef[con.name][dvName], rtol=1e-12, atol=1e-12
+                )
+
+    def test_sparseJacobian(self):
+        # the sparse blocks should hold the same sensitivities as the dense ones
+        class OptProb:
+            def __init__(self):
+                self.cons = {}
+
+            def addConGroup(self, name, nCon, wrt=None, jac=None, **kwargs):
+                self.cons[name] = (wrt, jac)
+
+        results = []
+        for sparseJacobian in [False, True]:
+            DVGeo, DVCon = self.generate_dvgeo_dvcon("c172", sparseJacobian=sparseJacobian)
+
+            leList = [[0.7, 0.0, 0.1], [0.7, 0.0, 5.0]]
+            teList = [[0.9, 0.0, 0.1], [0.9, 0.0, 5.0]]
+            DVCon.addThicknessConstraints2D(leList, teList, 5, 5)
+            DVCon.addThicknessToChordConstraints1D(leList, nCon=5, axis=[0, 1, 0], chordDir=[1, 0, 0])
+            DVCon.addVolumeConstraint(leList, teList, 4, 4)
+            DVCon.addSurfaceAreaConstraint()
+
+            optProb = OptProb()
+            DVCon.addConstraintsPyOpt(optProb)
+
+            xDV = DVGeo.getValues()
+            np.random.seed(37)
+            xDV["local"] = np.random.normal(0.0, 0.05, len(xDV["local"]))
+            DVGeo.setDesignVars(xDV)
+
+            funcsSens = {}
+            DVCon.evalFunctionsSens(funcsSens)
+            results.append((optProb, funcsSens))
+
+        funcsSens = results[0][1]
+        optProb, sparseSens = results[1]
+        for conName in funcsSens:
+            wrt, jac = optProb.cons[conName]
+            if jac is None:
+                for dvName in wrt:
+                    np.testing.assert_allclose(funcsSens[conName][dvName], sparseSens[conName][dvName])
+                continue
+
+            # the surface area is dense and the thickness constraints do not depend on every local DV
+            self.assertNotIn("area", conName)
+            if "thickness" in conName and not self.child:
+                self.assertLess(len(jac["local"]["coo"][0]), np.prod(jac["local"]["shape"]))
+
+            for dvName in funcsSens[conName]:
+                dense = np.zeros_like(funcsSens[conName][dvName])
+                if dvName in jac:
+                    rows, cols, values = sparseSens[conName][dvName]["coo"]
+                    np.testing.assert_array_equal(rows, jac[dvName]["coo"][0])
+                    np.testing.assert_array_equal(cols, jac[dvName]["coo"][1])
+                    dense[rows, cols] = values
+                np.testing.assert_allclose(dense, funcsSens[conName][dvName], rtol=1e-12, atol=1e-12)
+
     def test_surfaceArea_box(self, train=False, refDeriv=False):
         refFile = os.path.join(self.base_path, "ref/test_DVConstraints_surfaceArea_box.ref")
         with BaseRegTest(refFile, train=train) as handler:
@@ -926,6 +1063,23 @@ class RegTestPyGeo(unittest.TestCase):
             funcs, funcsSens = self.wing_test_twist(DVGeo, DVCon, handler)
             funcs, funcsSens = self.wing_test_deformed(DVGeo, DVCon, handler)
 
+    def test_curvature_derivs(self):
+        # the Gaussian and combined curvatures are not covered by the reference file, check them against FD
+        DVGeo, DVCon = self.generate_dvgeo_dvcon("rae2822", addToDVGeo=True)
+        surfFile = os.path.join(self.base_path, "../../input_files/deform_geometry_wing.xyz")
+        for curvatureType in ["Gaussian", "combined"]:
+            DVCon.addCurvatureConstraint(surfFile, curvatureType=curvatureType, name=f"{curvatureType}_curvature_con")
+
+        funcsSens = {}
+        DVCon.evalFunctions({})
+        DVCon.evalFunctionsSens(funcsSens)
+        funcsSensFD = evalFunctionsSensFD(DVGeo, DVCon, fdstep=1e-5)
+        for conName in funcsSens:
+            for dvName in funcsSens[conName]:
+                np.testing.assert_allclose(
+                    funcsSens[conName][dvName], funcsSensFD[conName][dvName], rtol=1e-3, atol=1e-3
+                )
+
     def test_curvature1D(self, train=False, refDeriv=False):
         refFile = os.path.join(self.base_path, "ref/test_DVConstraints_curvature1D.ref")
         with BaseRegTest(refFile, train=train) as handler:
@@ -950,6 +1104,31 @@ class RegTestPyGeo(unittest.TestCase):
             funcs, funcsSens = self.wing_test_twist(DVGeo, DVCon, handler)
             funcs, funcsSens = self.wing_test_deformed(DVGeo, DVCon, handler)
 
+    def test_curvature1D_derivs(self):
+        # check the derivatives of the scaled and unscaled 1D curvatures against FD
+        DVGeo, DVCon = self.generate_dvgeo_dvcon("c172", addToDVGeo=True)
+        startP = [0.1, 0, 1.0]
+        endP = [1.5, 0, 1.0]
+        axis = [0, 1, 0]
+        for scaled in [True, False]:
+            prefix = "scaled" if scaled else "unscaled"
+            DVCon.addCurvatureConstraint1D(
+                startP, endP, 10, axis, "mean", scaled=scaled, name=f"{prefix}_mean_curvature_con"
+            )
+            DVCon.addCurvatureConstraint1D(
+                startP, endP, 10, axis, "aggregated", KSCoeff=10.0, scaled=scaled, name=f"{prefix}_KS_curvature_con"
+            )
+
+        funcsSens = {}
+        DVCon.evalFunctions({})
+        DVCon.evalFunctionsSens(funcsSens)
+        funcsSensFD = evalFunctionsSensFD(DVGeo, DVCon, fdstep=1e-5)
+        for conName in funcsSens:
+            for dvName in funcsSens[conName]:
+                np.testing.assert_allclose(
+                    funcsSens[conName][dvName], funcsSensFD[conName][dvName], rtol=1e-3, atol=1e-3
+                )
+
     def test_LERadius(self, train=False, refDeriv=False):
         refFile = os.path.join(self.base_path, "ref/test_DVConstraints_LERadius.ref")
         with BaseRegTest(refFile, train=train) as handler:
@@ -965,6 +1144,48 @@ class RegTestPyGeo(unittest.TestCase):
             funcs, funcsSens = self.wing_test_twist(DVGeo, DVCon, handler)
             funcs, funcsSens = self.wing_test_deformed(DVGeo, DVCon, handler)
 
+    def test_radius_circularity_derivs(self):
+        # the derivatives of the radius and circularity constraints w.r.t. their points should match complex step
+        DVGeo, DVCon = self.generate_dvgeo_dvcon("c172")
+        leList = [[1e-4, 0, 1e-3], [1e-3, 0, 2.5], [0.15, 0, 5.0]]
+        DVCon.addLERadiusConstraints(leList, 5, [0, 1, 0], [-1, 0, 0])
+        DVCon.addCircularityConstraint(
+            origin=[0.8, 0.0, 2.5],
+            rotAxis=[0.0, 0.0, 1.0],
+            radius=0.1,
+            zeroAxis=[0.0, 1.0, 0.0],
+            angleCW=180.0,
+            angleCCW=180.0,
+            nPts=10,
+        )
+        DVCon.evalFunctions({})
+        h = 1e-40
+
+        radiusCon = list(DVCon.constraints["radiusCon"].values())[0]
+        coords = radiusCon.coords
+        drdPt = radiusCon.computeCircleSens(coords)
+        for i in range(3):
+            for j in range(3):
+                coordsCS = coords.astype("D")
+                coordsCS[i * radiusCon.nCon : (i + 1) * radiusCon.nCon, j] += h * 1j
+                r, _ = radiusCon.computeCircle(coordsCS)
+                np.testing.assert_allclose(drdPt[:, i, j], r.imag / h, rtol=1e-10, atol=1e-10)
+
+        circCon = list(DVCon.constraints["circCon"].values())[0]
+        center, coords = circCon.center, circCon.coords
+        dLndPt, dLndCn = circCon._computeLengthsSens(center, coords)
+        dLndPt = dLndPt.toarray().reshape(circCon.nCon, -1, 3)
+        for j in range(3):
+            for i in range(len(coords)):
+                coordsCS = coords.astype("D")
+                coordsCS[i, j] += h * 1j
+                X = circCon._computeLengths(center, coordsCS)
+                np.testing.assert_allclose(dLndPt[:, i, j], X.imag / h, rtol=1e-10, atol=1e-10)
+            centerCS = center.astype("D")
+            centerCS[0, j] += h * 1j
+            X = circCon._computeLengths(centerCS, coords)
+            np.testing.assert_allclose(dLndCn[:, 0, j], X.imag / h, rtol=1e-10, atol=1e-10)
+
 
 @unittest.skipUnless(geogradInstalled, "requires geograd")
 class RegTestGeograd(unittest.TestCase):
@@ -1064,5 +1285,65 @@ class RegTestGeograd(unittest.TestCase):
             self.assertTrue(at_least_one_var)
 
 
+class TestDistributedDVConstraints(unittest.TestCase):
+    N_PROCS = 3
+
+    def setUp(self):
+        self.base_path = os.path.dirname(os.path.abspath(__file__))
+
+    def generate_dvgeo_dvcon(self, comm):
+        meshFile = os.path.join(self.base_path, "../../input_files/c172.stl")
+        ffdFile = os.path.join(self.base_path, "../../input_files/c172.xyz")
+        DVGeo = DVGeometry(ffdFile)
+        DVGeo.addLocalDV("local", lower=-0.5, upper=0.5, axis="y", scale=1)
+
+        DVCon = DVConstraints(comm=comm)
+        DVCon.setDVGeo(DVGeo)
+        testMesh = mesh.Mesh.from_file(meshFile)
+        p0 = testMesh.vectors[:, 0, :] * 1e-3
+        v1 = testMesh.vectors[:, 1, :] * 1e-3 - p0
+        v2 = testMesh.vectors[:, 2, :] * 1e-3 - p0
+        DVCon.setSurface([p0, v1, v2])
+
+        leList = [[0.7, 0.0, 0.1], [0.7, 0.0, 5.0]]
+        teList = [[0.9, 0.0, 0.1], [0.9, 0.0, 5.0]]
+        DVCon.addThicknessConstraints2D(leList, teList, 5, 5)
+        DVCon.addThicknessConstraints1D(leList, nCon=10, axis=[0, 1, 0])
+        DVCon.addVolumeConstraint(leList, teList, 4, 4, name="vol0")
+        DVCon.addVolumeConstraint(leList, teList, 6, 6, name="vol1")
+        DVCon.addCompositeVolumeConstraint(["vol0", "vol1"])
+        DVCon.addSurfaceAreaConstraint()
+
+        return DVGeo, DVCon
+
+    def test_distributedEvaluation(self):
+        # every rank should get the same constraints and derivatives as the serial evaluation
+        results = []
+        for comm in [None, MPI.COMM_WORLD]:
+            DVGeo, DVCon = self.generate_dvgeo_dvcon(comm)
+            np.random.seed(37)
+            xDV = DVGeo.getValues()
+            # the first evaluation assigns the constraints to the ranks
+            for _ in range(3):
+                xDV["local"] = np.random.normal(0.0, 0.05, len(xDV["local"]))
+                DVGeo.setDesignVars(xDV)
+                funcs = {}
+                funcsSens = {}
+                DVCon.evalFunctions(funcs)
+                DVCon.evalFunctionsSens(funcsSens)
+            results.append((funcs, funcsSens))
+
+        funcs, funcsSens = results[0]
+        self.assertEqual(list(funcs), list(results[1][0]))
+        for conName in funcs:
+            np.testing.assert_array_equal(funcs[conName], results[1][0][conName])
+            for dvName in funcsSens[conName]:
+                np.testing.assert_array_equal(funcsSens[conName][dvName], results[1][1][conName][dvName])
+
+        # the constraints are spread over all the ranks
+        owners = DVCon.conOwners[1]
+        self.assertEqual(set(owners), set(range(MPI.COMM_WORLD.size)))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -4,11 +4,15 @@ import copy
 import os
 import shutil
 import unittest
+from unittest.mock import MagicMock, patch
 
 # External modules
 from baseclasses import BaseRegTest
+from baseclasses.utils import Error
 import commonUtils
+from mpi4py import MPI
 import numpy as np
+from scipy import sparse
 from stl import mesh
 
 # First party modules
@@ -1177,6 +1181,57 @@ class RegTestPyGeo(unittest.TestCase):
 
         np.testing.assert_allclose(dIdx["span"], dIdx_FD["span"], atol=1e-15)
 
+    def test_parallel_FD(self):
+        """
+        Test that the FD Jacobian is the same when the columns are
+        computed by a pool of worker processes
+        """
+        jacobians = []
+        for nProc in [1, 3]:
+            DVGeo, DVGeoChild = commonUtils.setupDVGeo(self.base_path)
+            DVGeo.addGlobalDV(dvName="mainX", value=-1.0, func=commonUtils.mainAxisPoints)
+            DVGeo.addLocalDV("xdir", lower=-1.0, upper=1.0, axis="x", scale=1.0)
+            DVGeoChild.addLocalDV("ydir", lower=-1.0, upper=1.0, axis="y", scale=1.0)
+            DVGeo.addChild(DVGeoChild)
+
+            points = np.array([[0.25, 0.1, 0.1], [-0.25, 0.0, 0.2], [0.0, -0.1, -0.1]])
+            DVGeo.addPointSet(points, "testPoints")
+            DVGeo.computeTotalJacobianFD("testPoints", nProc=nProc)
+            jacobians.append(DVGeo.JT["testPoints"])
+
+        np.testing.assert_allclose(jacobians[0], jacobians[1], rtol=1e-12, atol=1e-12)
+
+        # worker processes must not be forked from a multi-rank MPI job
+        DVGeo, _ = commonUtils.setupDVGeo(self.base_path)
+        DVGeo.addGlobalDV(dvName="mainX", value=-1.0, func=commonUtils.mainAxisPoints)
+        DVGeo.addPointSet(points, "testPoints")
+        with patch.object(MPI, "COMM_WORLD", MagicMock(size=2)):
+            with self.assertRaises(Error):
+                DVGeo.computeTotalJacobianFD("testPoints", nProc=2)
+
+    def test_sparse_totalSensitivity(self):
+        """
+        Test that a sparse dIdpt gives the same derivatives as the dense one
+        """
+        DVGeo, DVGeoChild = commonUtils.setupDVGeo(self.base_path)
+        DVGeo.addGlobalDV(dvName="mainX", value=-1.0, func=commonUtils.mainAxisPoints)
+        DVGeo.addLocalDV("xdir", lower=-1.0, upper=1.0, axis="x", scale=1.0)
+        DVGeoChild.addLocalDV("ydir", lower=-1.0, upper=1.0, axis="y", scale=1.0)
+        DVGeo.addChild(DVGeoChild)
+
+        points = np.array([[0.25, 0.1, 0.1], [-0.25, 0.0, 0.2], [0.0, -0.1, -0.1]])
+        DVGeo.addPointSet(points, "testPoints")
+
+        # each function only depends on one of the points
+        dIdPt = np.zeros([3, 3, 3])
+        for i in range(3):
+            dIdPt[i, i, :] = [1.0, -2.0, 0.5]
+        dIdx = DVGeo.totalSensitivity(dIdPt, "testPoints")
+        dIdxSparse = DVGeo.totalSensitivity(sparse.coo_matrix(dIdPt.reshape(3, -1)), "testPoints")
+
+        for dvName in dIdx:
+            np.testing.assert_allclose(dIdxSparse[dvName], dIdx[dvName], rtol=1e-12, atol=1e-12)
+
     def test_embedding_solver(self):
         DVGeo = DVGeometry(os.path.join(self.base_path, "../../input_files/fuselage_ffd_severe.xyz"))
 
@@ -4,6 +4,7 @@ import copy
 import os
 import time
 import unittest
+from unittest.mock import patch
 
 # External modules
 from baseclasses import BaseRegTest
@@ -26,7 +27,7 @@ if mpiInstalled:
         import pyOCSM  # noqa
 
         # First party modules
-        from pygeo import DVGeometryESP
+        from pygeo import DVConstraints, DVGeometryESP
 
         ocsmInstalled = True
     except ImportError:
@@ -263,6 +264,116 @@ class TestPyGeoESP_BasicCube(unittest.TestCase):
         for ipt in range(npts):
             self.assertAlmostEqual(np.sum(np.abs(testjac[ipt, :, :] - analyticjac[ipt, :, :])), 0)
 
+    def test_linear_jacobian_cache(self):
+        # the translations are declared linear, the box dimensions are detected as linear
+        DVGeo, initpts = self.setup_cubemodel()
+        DVGeo.linearDVCheck = 1
+        for designvarname in ["cubex0", "cubey0", "cubez0"]:
+            DVGeo.addVariable(designvarname, linear=True)
+        for designvarname in ["cubedx", "cubedy", "cubedz"]:
+            DVGeo.addVariable(designvarname)
+
+        DVGeo._computeSurfJacobian(fd=True)
+        self.assertEqual(sorted(DVGeo.jacColumnCache), [0, 1, 2])
+
+        # the same columns at the same design do not show that the dimensions are linear
+        DVGeo._computeSurfJacobian(fd=True)
+        self.assertEqual(sorted(DVGeo.jacColumnCache), [0, 1, 2])
+
+        # they are cached once the columns stay the same at a different design
+        DVGeo.setDesignVars(
+            {"cubex0": np.array([-1.5]), "cubedx": np.array([4.0]), "cubedz": np.array([3.0])}, updateJacobian=False
+        )
+        DVGeo._computeSurfJacobian(fd=True)
+        self.assertEqual(sorted(DVGeo.jacColumnCache), [0, 1, 2, 3, 4, 5])
+
+        # the cached columns still give the right jacobian
+        DVGeo._computeSurfJacobian(fd=True)
+        self.assertTrue(np.all(DVGeo.fdRanks == -1))
+        npts = initpts.shape[0]
+        testjac = DVGeo.pointSets["mypts"].jac.reshape(npts, 3, DVGeo.getNDV())
+        analyticjac = self.setup_cubemodel_analytic_jac()
+        for ipt in range(npts):
+            self.assertAlmostEqual(np.sum(np.abs(testjac[ipt, :, :] - analyticjac[ipt, :, :])), 0)
+
+        # different points with the same size and name reset the cache
+        DVGeo.setDesignVars(
+            {"cubex0": np.array([-2.0]), "cubedx": np.array([3.5]), "cubedz": np.array([3.5])}, updateJacobian=False
+        )
+        DVGeo.addPointSet(initpts[::-1], "mypts", cache_projections=False)
+        DVGeo._computeSurfJacobian(fd=True)
+        self.assertEqual(sorted(DVGeo.jacColumnCache), [0, 1, 2])
+
+    def test_analytic_sensitivities(self):
+        # translating the box does not change the parametric ranges of its faces,
+        # so the OpenCSM velocities match the finite difference jacobian
+        DVGeo, initpts = self.setup_cubemodel()
+        for designvarname in ["cubex0", "cubey0", "cubez0"]:
+            DVGeo.addVariable(designvarname)
+        DVGeo._computeSurfJacobian(fd=False)
+        self.assertEqual(DVGeo.fdFallbackDVs, [])
+        npts = initpts.shape[0]
+        testjac = DVGeo.pointSets["mypts"].jac.reshape(npts, 3, DVGeo.getNDV())
+        analyticjac = self.setup_cubemodel_analytic_jac()
+        np.testing.assert_allclose(testjac, analyticjac[:, :, :3], atol=1e-8)
+
+    def test_analytic_sensitivities_range_change(self):
+        # the box dimensions change the parametric ranges of the faces, so the velocities at
+        # fixed parametric coordinates are incomplete and finite differences are used instead
+        DVGeo, initpts = self.setup_cubemodel()
+        for designvarname in ["cubex0", "cubey0", "cubez0", "cubedx", "cubedy", "cubedz"]:
+            DVGeo.addVariable(designvarname)
+        npts = initpts.shape[0]
+        analyticjac = self.setup_cubemodel_analytic_jac()
+
+        # the first evaluation finds the variables that change the ranges, the second one
+        # uses the velocities for the others
+        for _ in range(2):
+            DVGeo._computeSurfJacobian(fd=False)
+            self.assertEqual(DVGeo.paramRangeDVs, {0: False, 1: False, 2: False, 3: True, 4: True, 5: True})
+            self.assertEqual(DVGeo.fdFallbackDVs, [3, 4, 5])
+            testjac = DVGeo.pointSets["mypts"].jac.reshape(npts, 3, DVGeo.getNDV())
+            np.testing.assert_allclose(testjac, analyticjac, atol=1e-6)
+
+    def test_analytic_sensitivities_fd_first(self):
+        # the box dimensions are finite differenced before the velocities of the other variables
+        # are computed on the same proc, which must be done with the model at the current design
+        DVGeo, initpts = self.setup_cubemodel()
+        for designvarname in ["cubedx", "cubedy", "cubedz", "cubex0", "cubey0", "cubez0"]:
+            DVGeo.addVariable(designvarname)
+        npts = initpts.shape[0]
+        analyticjac = self.setup_cubemodel_analytic_jac()[:, :, [3, 4, 5, 0, 1, 2]]
+
+        def getDesign():
+            return np.concatenate([DVGeo.DVs[dvName].value for dvName in DVGeo.DVs])
+
+        # the design of the last model build, at each velocity computation
+        builtDesigns = []
+        velocityDesigns = []
+        updateModel = DVGeo._updateModel
+        computeVelocities = DVGeo._computeVelocities
+
+        def recordUpdate():
+            builtDesigns.append(getDesign())
+            return updateModel()
+
+        def recordVelocities(*args):
+            velocityDesigns.append(builtDesigns[-1])
+            return computeVelocities(*args)
+
+        with patch.object(DVGeo, "_updateModel", side_effect=recordUpdate), patch.object(
+            DVGeo, "_computeVelocities", side_effect=recordVelocities
+        ):
+            for _ in range(2):
+                DVGeo._computeSurfJacobian(fd=False)
+
+        self.assertEqual(DVGeo.fdFallbackDVs, [0, 1, 2])
+        self.assertEqual(len(velocityDesigns), 3)
+        for design in velocityDesigns:
+            np.testing.assert_array_equal(design, getDesign())
+        testjac = DVGeo.pointSets["mypts"].jac.reshape(npts, 3, DVGeo.getNDV())
+        np.testing.assert_allclose(testjac, analyticjac, atol=1e-6)
+
     def train_composite(self, train=True):
         self.test_composite(train=train)
 
@@ -582,6 +693,56 @@ class TestPyGeoESP_BasicCube_Distributed(unittest.TestCase):
         for ipt in range(npts):
             self.assertAlmostEqual(np.sum(np.abs(testjac[ipt, :, :] - analyticjac[ipt, :, :])), 0)
 
+    def test_distributed_DVCon(self):
+        # the updates and sensitivities of ESP are collective, so a DVCon distributed over
+        # the ranks has to keep every constraint on every rank instead of assigning them
+        csmFile = os.path.join(self.input_path, "../input_files/esp/box.csm")
+
+        # triangulate the faces of the box from -2 to 1.5
+        lo, hi = -2.0, 1.5
+        corners = np.array([[x, y, z] for z in [lo, hi] for y in [lo, hi] for x in [lo, hi]])
+        quads = [[0, 1, 3, 2], [4, 5, 7, 6], [0, 1, 5, 4], [2, 3, 7, 6], [0, 2, 6, 4], [1, 3, 7, 5]]
+        tris = np.array([[q[0], q[1], q[2]] for q in quads] + [[q[0], q[2], q[3]] for q in quads])
+        p0 = corners[tris[:, 0]]
+        v1 = corners[tris[:, 1]] - p0
+        v2 = corners[tris[:, 2]] - p0
+
+        leList = [[-1.5, -0.25, -1.5], [-1.5, -0.25, 1.0]]
+        teList = [[1.0, -0.25, -1.5], [1.0, -0.25, 1.0]]
+
+        results = []
+        for comm in [None, self.comm]:
+            DVGeo = DVGeometryESP(csmFile)
+            for designvarname in ["cubex0", "cubedx", "cubedy", "cubedz"]:
+                DVGeo.addVariable(designvarname)
+
+            DVCon = DVConstraints(comm=comm)
+            DVCon.setDVGeo(DVGeo)
+            DVCon.setSurface([p0, v1, v2])
+            DVCon.addThicknessConstraints1D(leList, nCon=5, axis=[0, 1, 0])
+            DVCon.addThicknessConstraints2D(leList, teList, 3, 3)
+            DVCon.addVolumeConstraint(leList, teList, 4, 4)
+            DVCon.addSurfaceAreaConstraint()
+
+            # the first evaluation assigns the constraints to the ranks
+            for dx in [3.5, 3.7, 3.9]:
+                DVGeo.setDesignVars({"cubedx": np.array([dx]), "cubedy": np.array([dx - 0.2])})
+                funcs = {}
+                funcsSens = {}
+                DVCon.evalFunctions(funcs)
+                DVCon.evalFunctionsSens(funcsSens)
+            results.append((funcs, funcsSens))
+
+        # all of the constraints are evaluated on every rank
+        self.assertTrue(np.all(DVCon.conOwners[1] == -1))
+
+        funcs, funcsSens = results[0]
+        self.assertEqual(list(funcs), list(results[1][0]))
+        for conName in funcs:
+            np.testing.assert_allclose(funcs[conName], results[1][0][conName], rtol=1e-12)
+            for dvName in funcsSens[conName]:
+                np.testing.assert_allclose(funcsSens[conName][dvName], results[1][1][conName][dvName], rtol=1e-12)
+
 
 @unittest.skipUnless(mpiInstalled and ocsmInstalled, "MPI and pyOCSM are required.")
 class TestPyGeoESP_BasicCube_Distributed_OneProcBlank(unittest.TestCase):
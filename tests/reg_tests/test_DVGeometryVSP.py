@@ -3,6 +3,7 @@ from collections import OrderedDict
 import copy
 import os
 import unittest
+from unittest.mock import patch
 
 # External modules
 from baseclasses import BaseRegTest
@@ -154,6 +155,41 @@ class RegTestPyGeoVSPParallel(unittest.TestCase):
                         maxError = max(error, maxError)
             handler.assert_allclose(maxError, 0.0, "sphere_derivs", rtol=1e0, atol=1e-10)
 
+    def test_projection_cache(self):
+        vspFile = os.path.join(self.base_path, "../../input_files/simpleEll_med.vsp3")
+        cacheFile = os.path.join(self.base_path, "vsp_projections_%d.npz" % self.N_PROCS)
+        comm = MPI.COMM_WORLD
+
+        # a different number of points on each proc
+        points = np.array([[0.0, 0.0, 0.0], [2.0, 0.0, 0.0], [1.0, 1.0, 0.0], [1.0, -1.0, 0.0], [1.0, 0.0, 1.0]])
+        points = points[: 2 + comm.rank % 4]
+
+        DVGeo = DVGeometryVSP(vspFile)
+        with patch.object(openvsp, "FindRSTGuess", wraps=openvsp.FindRSTGuess) as findRSTGuess:
+            dMax = DVGeo.addPointSet(points, "points", cache_projections=cacheFile)
+        self.assertEqual(findRSTGuess.call_count, len(points))
+        ref = DVGeo.pointSets["points"]
+
+        # the second projection is loaded from the cache, so the points are not projected again
+        DVGeo = DVGeometryVSP(vspFile)
+        with patch.object(openvsp, "FindRSTGuess", wraps=openvsp.FindRSTGuess) as findRSTGuess, patch.object(
+            openvsp, "FindRST", wraps=openvsp.FindRST
+        ) as findRST:
+            dMaxCached = DVGeo.addPointSet(points, "points", cache_projections=cacheFile)
+        findRSTGuess.assert_not_called()
+        findRST.assert_not_called()
+        cached = DVGeo.pointSets["points"]
+        np.testing.assert_allclose(dMaxCached, dMax, atol=1e-10)
+        np.testing.assert_array_equal(cached.geom, ref.geom)
+        np.testing.assert_allclose(cached.r, ref.r, atol=1e-14)
+        np.testing.assert_allclose(cached.s, ref.s, atol=1e-14)
+        np.testing.assert_allclose(cached.t, ref.t, atol=1e-14)
+        np.testing.assert_allclose(cached.pts, ref.pts, atol=1e-14)
+
+        comm.Barrier()
+        if comm.rank == 0:
+            os.remove(cacheFile)
+
 
 @unittest.skipUnless(openvspInstalled, "requires openvsp Python API")
 class RegTestPyGeoVSPSerial(unittest.TestCase):
@@ -0,0 +1,216 @@
+# Standard Python modules
+import os
+import unittest
+from unittest.mock import patch
+
+# External modules
+import commonUtils
+import numpy as np
+from pyspline import Curve
+
+try:
+    # External modules
+    import openmdao.api as om
+
+    omInstalled = True
+except ImportError:
+    omInstalled = False
+
+if omInstalled:
+    # First party modules
+    from pygeo.mphys import OM_DVGEOCOMP
+
+baseDir = os.path.dirname(os.path.abspath(__file__))
+outerFFD = os.path.join(baseDir, "../../input_files/outerBoxFFD.xyz")
+innerFFD = os.path.join(baseDir, "../../input_files/simpleInnerFFD.xyz")
+
+# the inner points are embedded in both FFDs, the outer points only in the parent
+innerPts = np.array([[-0.25, 0.0, 0.0], [0.25, 0.0, 0.0]])
+outerPts = np.array([[-0.75, 0.0, 0.0], [1.0, 0.0, 0.0]])
+
+
+def getSurface(height=0.1):
+    # two planes at y = +/- height in the point-vector format, for the thickness constraints
+    p0, v1, v2 = [], [], []
+    for y in [-height, height]:
+        corners = np.array([[-0.5, y, -0.5], [0.5, y, -0.5], [0.5, y, 0.5], [-0.5, y, 0.5]])
+        p0 += [corners[0], corners[0]]
+        v1 += [corners[1] - corners[0], corners[2] - corners[0]]
+        v2 += [corners[2] - corners[0], corners[3] - corners[0]]
+    return [np.array(p0), np.array(v1), np.array(v2)]
+
+
+def coordXfer(coords, mode="fwd", applyDisplacement=True, **kwargs):
+    # the application frame is rotated about the x-axis and moved below the DVGeo frame
+    rotMat = np.array([[1, 0, 0], [0, 0, -1], [0, 1, 0]])
+    if mode == "fwd":
+        newCoords = np.dot(coords, rotMat)
+        if applyDisplacement:
+            newCoords[:, 2] -= 5
+    elif mode == "bwd":
+        newCoords = coords.copy()
+        if applyDisplacement:
+            newCoords[:, 2] += 5
+        newCoords = np.dot(newCoords, rotMat.T)
+    return newCoords
+
+
+if omInstalled:
+
+    class GeoGroup(om.Group):
+        def initialize(self):
+            self.options.declare("use_partials", default=False)
+            self.options.declare("composite", default=False)
+            self.options.declare("coordXfer", default=None)
+
+        def setup(self):
+            self.add_subsystem("dvs", om.IndepVarComp(), promotes=["*"])
+            self.add_subsystem(
+                "geometry",
+                OM_DVGEOCOMP(file=outerFFD, type="ffd", use_partials=self.options["use_partials"]),
+                promotes=["*"],
+            )
+
+        def configure(self):
+            composite = self.options["composite"]
+            geo = self.geometry
+
+            geo.nom_addChild(innerFFD)
+            geo.nom_addPointSet(innerPts.flatten(), "inner")
+            if self.options["coordXfer"] is None:
+                geo.nom_addPointSet(outerPts.flatten(), "outer")
+            else:
+                # the outer points are given in the transferred frame
+                geo.nom_addPointSet(
+                    self.options["coordXfer"](outerPts.copy()).flatten(), "outer", coordXfer=self.options["coordXfer"]
+                )
+
+            geo.nom_addRefAxis(name="mainAxis", curve=Curve(X=[[-1.0, 0.0, 0.0], [1.5, 0.0, 0.0]], k=2), axis="y")
+            geo.nom_addGlobalDV("mainX", np.array([-1.0]), commonUtils.mainAxisPoints, isComposite=composite)
+            nShape = geo.nom_addLocalDV("shape", axis="y", isComposite=composite)
+            nChildShape = geo.nom_addLocalDV("childShape", axis="y", childIdx=0, isComposite=composite)
+
+            geo.nom_setConstraintSurface(getSurface())
+            geo.nom_addThicknessConstraints1D("thick", [[-0.25, 0.0, 0.0], [0.25, 0.0, 0.0]], 3, [0.0, 1.0, 0.0])
+            geo.nom_add_LETEConstraint("lete", 0, "iLow")
+
+            if composite:
+                geo.nom_addGeoCompositeDV("cdv", ptSetName="outer")
+            else:
+                self.dvs.add_output("mainX", np.array([-1.0]))
+                self.dvs.add_output("shape", np.zeros(nShape))
+                self.dvs.add_output("childShape", np.zeros(nChildShape))
+
+
+@unittest.skipUnless(omInstalled, "requires OpenMDAO")
+class TestMPhysDVGeo(unittest.TestCase):
+    N_PROCS = 1
+
+    def setupProblem(self, usePartials=False, composite=False, mode="rev", xfer=None):
+        prob = om.Problem(reports=False)
+        prob.model = GeoGroup(use_partials=usePartials, composite=composite, coordXfer=xfer)
+        prob.setup(mode=mode)
+        return prob
+
+    def setDesign(self, prob, mainX=-0.9, seed=0):
+        rng = np.random.default_rng(seed)
+        prob.set_val("mainX", [mainX])
+        prob.set_val("shape", 0.01 * rng.random(prob.get_val("shape").size))
+        prob.set_val("childShape", 0.01 * rng.random(prob.get_val("childShape").size))
+
+    def test_partials(self):
+        """
+        Check the partials assembled with use_partials against the
+        matrix-free jacobian vector products, with and without a coordinate transformation
+        """
+        of = ["inner", "outer", "thick", "lete"]
+        wrt = ["mainX", "shape", "childShape"]
+
+        for xfer in [None, coordXfer]:
+            totals = []
+            for usePartials in [True, False]:
+                prob = self.setupProblem(usePartials=usePartials, xfer=xfer)
+                self.setDesign(prob)
+                prob.run_model()
+                totals.append(prob.compute_totals(of=of, wrt=wrt))
+
+            for key in totals[1]:
+                np.testing.assert_allclose(totals[0][key], totals[1][key], rtol=1e-10, atol=1e-12, err_msg=str(key))
+
+    def test_fwd_rev(self):
+        """
+        Dot product test of the forward and reverse jacobian vector products,
+        for the point sets and the DVCon constraints, with and without composite DVs
+        and a coordinate transformation
+        """
+        of = ["inner", "outer", "thick", "lete"]
+        rng = np.random.default_rng(1)
+
+        for composite, xfer in [(False, None), (True, None), (False, coordXfer)]:
+            wrt = ["cdv"] if composite else ["mainX", "shape", "childShape"]
+
+            jac = {}
+            for mode in ["fwd", "rev"]:
+                prob = self.setupProblem(composite=composite, mode=mode, xfer=xfer)
+                if composite:
+                    prob.set_val("cdv", 0.01 * np.arange(prob.get_val("cdv").size))
+                else:
+                    self.setDesign(prob)
+                prob.run_model()
+                jac[mode] = prob.compute_totals(of=of, wrt=wrt, return_format="array")
+
+            # the seeds cover all outputs and DVs at once
+            xDot = rng.random(jac["fwd"].shape[1])
+            yBar = rng.random(jac["fwd"].shape[0])
+            np.testing.assert_allclose(yBar.dot(jac["fwd"].dot(xDot)), xDot.dot(jac["rev"].T.dot(yBar)), rtol=1e-10)
+            np.testing.assert_allclose(jac["fwd"], jac["rev"], rtol=1e-10, atol=1e-12)
+
+    def test_memoization(self):
+        """
+        Change one DV group at a time and check that only the point sets it can move are
+        updated, while the outputs and totals match a run that starts from the same design
+        """
+        of = ["inner", "outer", "thick", "lete"]
+        wrt = ["mainX", "shape", "childShape"]
+
+        prob = self.setupProblem()
+        self.setDesign(prob)
+        prob.run_model()
+        DVGeo = prob.model.geometry.DVGeo
+
+        # the child DVs do not move the outer points
+        childShape = prob.get_val("childShape") + 0.01
+        prob.set_val("childShape", childShape)
+        with patch.object(DVGeo, "update", wraps=DVGeo.update) as update:
+            prob.run_model()
+        ptSetNames = {call.args[0] for call in update.call_args_list}
+        self.assertIn("inner", ptSetNames)
+        self.assertNotIn("outer", ptSetNames)
+        self.assertTrue(DVGeo.pointSetUpToDate("outer"))
+        for child in DVGeo.children:
+            self.assertTrue(child.pointSetUpToDate("outer"))
+        totals = prob.compute_totals(of=of, wrt=wrt)
+
+        probRef = self.setupProblem()
+        self.setDesign(probRef)
+        probRef.set_val("childShape", childShape)
+        probRef.run_model()
+        totalsRef = probRef.compute_totals(of=of, wrt=wrt)
+        for name in of:
+            np.testing.assert_allclose(prob.get_val(name), probRef.get_val(name), rtol=1e-12, atol=1e-14)
+        for key in totalsRef:
+            np.testing.assert_allclose(totals[key], totalsRef[key], rtol=1e-10, atol=1e-12, err_msg=str(key))
+
+        # the parent DVs move both point sets, and an unchanged design does not update either
+        prob.set_val("mainX", [-0.8])
+        with patch.object(DVGeo, "update", wraps=DVGeo.update) as update:
+            prob.run_model()
+            ptSetNames = {call.args[0] for call in update.call_args_list}
+            self.assertTrue({"inner", "outer"}.issubset(ptSetNames))
+            update.reset_mock()
+            prob.run_model()
+            self.assertEqual(update.call_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
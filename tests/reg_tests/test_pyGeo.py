@@ -25,7 +25,7 @@ class TestPyGeo(unittest.TestCase):
         with BaseRegTest(self.refFile, train=False) as handler:
             self.regTest(handler)
 
-    def regTest(self, handler):
+    def createWing(self):
         dirName = os.path.join(baseDir, "../../input_files")
 
         # Airfoil file
@@ -65,7 +65,58 @@ class TestPyGeo(unittest.TestCase):
             teHeight=0.25 * 0.0254,
         )
 
+        return wing
+
+    def regTest(self, handler):
+        wing = self.createWing()
+
         for isurf in range(wing.nSurf):
             wing.surfs[isurf].computeData()
         surf = wing.surfs[isurf].data
         handler.root_add_val("sum of surface data", sum(surf.flatten()), tol=1e-10)
+
+    def test_iges_round_trip(self):
+        wing = self.createWing()
+        fileName = os.path.join(baseDir, "test_pyGeo_round_trip.igs")
+        wing.writeIGES(fileName)
+        wing2 = pyGeo("iges", fileName=fileName)
+        os.remove(fileName)
+
+        self.assertEqual(wing2.nSurf, wing.nSurf)
+        for surf, surf2 in zip(wing.surfs, wing2.surfs):
+            self.assertEqual(surf2.ku, surf.ku)
+            self.assertEqual(surf2.kv, surf.kv)
+            np.testing.assert_allclose(surf2.tu, surf.tu / surf.tu[-1], atol=1e-11)
+            np.testing.assert_allclose(surf2.tv, surf.tv / surf.tv[-1], atol=1e-11)
+            np.testing.assert_allclose(surf2.coef, surf.coef, rtol=1e-11, atol=1e-11)
+
+    def test_fitGlobal_solvers(self):
+        # Two patches of a wavy surface that share an edge
+        fileName = os.path.join(baseDir, "test_pyGeo_fit.xyz")
+        u, v = np.meshgrid(np.linspace(0, 1, 15), np.linspace(0, 1, 12), indexing="ij")
+        patches = [np.stack([u + iPatch, v, 0.1 * np.sin(3 * (u + iPatch)) * np.cos(2 * v)]) for iPatch in range(2)]
+        with open(fileName, "w") as f:
+            f.write(f"{len(patches)}\n")
+            for X in patches:
+                f.write(f"{X.shape[1]} {X.shape[2]} 1\n")
+            for X in patches:
+                for idim in range(3):
+                    np.savetxt(f, X[idim].flatten(order="F"))
+        geo = pyGeo("plot3d", fileName=fileName, ku=4, kv=4, nCtlu=8, nCtlv=6)
+        os.remove(fileName)
+        geo.doConnectivity()
+
+        geo.fitGlobal()
+        coefDirect = geo.coef.copy()
+
+        # The iterative solvers give the same fit
+        for solver in ["cg", "lsqr"]:
+            geo.fitGlobal(solver=solver, tol=1e-12)
+            np.testing.assert_allclose(geo.coef, coefDirect, rtol=0, atol=1e-8)
+
+        # Starting from the converged fit, a single iteration is enough
+        geo.fitGlobal(solver="cg", tol=1e-8, maxIter=1)
+        self.assertGreater(np.max(np.abs(geo.coef - coefDirect)), 1e-6)
+        geo.coef = coefDirect.copy()
+        geo.fitGlobal(solver="cg", warmStart=True, tol=1e-8, maxIter=1)
+        np.testing.assert_allclose(geo.coef, coefDirect, rtol=0, atol=1e-8)
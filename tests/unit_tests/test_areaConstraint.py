@@ -0,0 +1,119 @@
+# Standard Python modules
+import sys
+import unittest
+from unittest.mock import patch
+
+# External modules
+from mpi4py import MPI
+import numpy as np
+from scipy.spatial.distance import cdist
+
+
+def sphere(n, R, center):
+    # a triangulated UV sphere in the (p0, p1, p2) format of the constraint
+    theta = np.linspace(0, np.pi, n)
+    phi = np.linspace(0, 2 * np.pi, 2 * n)
+    T, P = np.meshgrid(theta, phi, indexing="ij")
+    X = np.stack([R * np.sin(T) * np.cos(P), R * np.sin(T) * np.sin(P), R * np.cos(T)], axis=-1) + center
+    return quads(X)
+
+
+def plate(n, L, height, amplitude):
+    # a wavy triangulated plate at z = height
+    s = np.linspace(0, L, n)
+    S1, S2 = np.meshgrid(s, s, indexing="ij")
+    X = np.stack([S1, S2, height + amplitude * np.sin(S1) * np.cos(S2)], axis=-1)
+    return quads(X)
+
+
+def quads(X):
+    # split each quad of a structured grid into two triangles
+    p0 = X[:-1, :-1].reshape(-1, 3)
+    p1 = X[1:, :-1].reshape(-1, 3)
+    p2 = X[1:, 1:].reshape(-1, 3)
+    p3 = X[:-1, 1:].reshape(-1, 3)
+    return [np.vstack([p0, p0]), np.vstack([p1, p2]), np.vstack([p2, p3])]
+
+
+def samplePoints(surf, n=4):
+    # points on a barycentric grid of each triangle, including the vertices
+    bary = np.array([[i, j, n - i - j] for i in range(n + 1) for j in range(n + 1 - i)]) / n
+    return np.einsum("sk,kti->tsi", bary, np.array(surf))
+
+
+def pairDistances(surf1, surf2):
+    # upper bounds of the distances between all pairs of triangles
+    x1 = samplePoints(surf1)
+    x2 = samplePoints(surf2)
+    d = cdist(x1.reshape(-1, 3), x2.reshape(-1, 3)).reshape(x1.shape[0], x1.shape[1], x2.shape[0], x2.shape[1])
+    return d.min(axis=(1, 3))
+
+
+class TestActiveTriangles(unittest.TestCase):
+    N_PROCS = 1
+
+    def getConstraint(self, surf1, surf2, rho):
+        # pygeo is removed from sys.modules afterwards, as the import guard tests need a fresh import
+        with patch.dict(sys.modules):
+            # First party modules
+            from pygeo.constraints import areaConstraint
+
+            # geograd is only called when the constraint is evaluated
+            with patch.object(areaConstraint, "geograd_parallel", object()):
+                return areaConstraint.TriangulatedSurfaceConstraint(
+                    MPI.COMM_WORLD,
+                    "con",
+                    surf1,
+                    "surf1",
+                    object(),
+                    surf2,
+                    "surf2",
+                    None,
+                    1.0,
+                    False,
+                    rho,
+                    0.1,
+                    3.0,
+                    None,
+                )
+
+    def checkActiveTriangles(self, surf1, surf2, rho, shift):
+        con = self.getConstraint(surf1, surf2, rho)
+        active1, active2 = con.getActiveTriangles()
+
+        # the pairs that are certainly within the cutoff of the KS sum must all be kept
+        d = pairDistances(surf1, surf2)
+        cutoff = d.min() + (np.log(con.surf1_size * con.surf2_size) + 37.0) / rho
+        within1, within2 = np.nonzero(d <= cutoff)
+        self.assertTrue(np.all(np.isin(within1, active1)))
+        self.assertTrue(np.all(np.isin(within2, active2)))
+
+        # the test is only meaningful if triangles are left out
+        self.assertLess(len(active1) + len(active2), con.surf1_size + con.surf2_size)
+
+        # after a small motion, the warm start from the active triangles gives the same result
+        con.active1, con.active2 = active1, active2
+        surf2 = [p + shift for p in surf2]
+        con.surf2_p0, con.surf2_p1, con.surf2_p2 = [p.T for p in surf2]
+        warm1, warm2 = con.getActiveTriangles()
+        cold1, cold2 = self.getConstraint(surf1, surf2, rho).getActiveTriangles()
+        np.testing.assert_array_equal(warm1, cold1)
+        np.testing.assert_array_equal(warm2, cold2)
+
+    def test_sphere_in_sphere(self):
+        # a small sphere close to the wall of a large one
+        surf1 = sphere(16, 3.0, np.zeros(3))
+        surf2 = sphere(8, 0.5, np.array([2.2, 0.0, 0.0]))
+        for rho in [50.0, 200.0]:
+            self.checkActiveTriangles(surf1, surf2, rho, np.array([0.05, 0.02, 0.0]))
+
+    def test_plates(self):
+        # a flat plate below a wavy one
+        surf1 = plate(20, 6.0, 0.0, 0.0)
+        surf2 = plate(12, 3.0, 0.3, 0.2)
+        for rho in [50.0, 200.0]:
+            self.checkActiveTriangles(surf1, surf2, rho, np.array([0.1, 0.1, -0.02]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# Standard Python modules
+import sys
+import unittest
+from unittest.mock import patch
+
+# External modules
+import numpy as np
+from scipy import sparse
+
+
+def uniformKnots(nCtl, k):
+    # a clamped knot vector with uniformly spaced interior knots
+    return np.concatenate([np.zeros(k - 1), np.linspace(0, 1, nCtl - k + 2), np.ones(k - 1)])
+
+
+class TestSolveNormalEquations(unittest.TestCase):
+    N_PROCS = 1
+
+    def setUp(self):
+        # pygeo is removed from sys.modules afterwards, as the import guard tests need a fresh import
+        with patch.dict(sys.modules):
+            # First party modules
+            from pygeo.geo_utils.knotvector import getBasisPts, solveNormalEquations
+
+        self.solve = solveNormalEquations
+
+        # the basis of a cubic surface fit to a wavy (30, 25) grid of points
+        nCtlu, nCtlv, k = 10, 8, 4
+        u, v = np.meshgrid(np.linspace(0, 1, 30), np.linspace(0, 1, 25), indexing="ij")
+        lIndex = np.arange(nCtlu * nCtlv).reshape((nCtlu, nCtlv))
+        cols, vals = getBasisPts(
+            [uniformKnots(nCtlu, k), uniformKnots(nCtlv, k)], [k, k], [u.flatten(), v.flatten()], lIndex
+        )
+        rows = np.repeat(np.arange(u.size), cols.shape[1])
+        self.N = sparse.csr_matrix((vals.flatten(), (rows, cols.flatten())), shape=(u.size, nCtlu * nCtlv))
+        self.pts = np.stack([3 * u, 2 * v, 0.2 * np.sin(4 * u) * np.cos(5 * v)], axis=-1).reshape(-1, 3)
+
+    def iterations(self, solver, pts, x0, xRef):
+        # the smallest number of iterations that reproduces the reference fit
+        for maxIter in range(1, 1000):
+            x = self.solve(self.N, pts, solver=solver, x0=x0, tol=1e-14, maxIter=maxIter)
+            if np.max(np.abs(x - xRef)) <= 1e-8 * np.max(np.abs(xRef)):
+                return maxIter
+
+        self.fail(f"The '{solver}' solver did not converge")
+
+    def test_iterative_solvers(self):
+        xDirect = self.solve(self.N, self.pts)
+
+        # the residual of the least squares fit is orthogonal to the basis
+        np.testing.assert_allclose(self.N.T @ (self.N @ xDirect - self.pts), 0.0, atol=1e-12)
+
+        for solver in ["cg", "lsqr"]:
+            x = self.solve(self.N, self.pts, solver=solver, tol=1e-12)
+            np.testing.assert_allclose(x, xDirect, rtol=0, atol=1e-8)
+
+    def test_warm_start(self):
+        # refit after a small change of the points, starting from the previous fit
+        x0 = self.solve(self.N, self.pts)
+        pts = self.pts.copy()
+        pts[:, 2] += 1e-3 * np.cos(3 * self.pts[:, 0]) * self.pts[:, 1]
+        xRef = self.solve(self.N, pts)
+
+        for solver in ["cg", "lsqr"]:
+            nCold = self.iterations(solver, pts, None, xRef)
+            nWarm = self.iterations(solver, pts, x0, xRef)
+            self.assertLess(nWarm, nCold)
+
+    def test_unknown_solver(self):
+        with self.assertRaises(ValueError):
+            self.solve(self.N, self.pts, solver="qr")
+
+
+if __name__ == "__main__":
+    unittest.main()
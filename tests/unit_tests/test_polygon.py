@@ -0,0 +1,57 @@
+# Standard Python modules
+import unittest
+
+# External modules
+import numpy as np
+
+
+class TestVolumeHex(unittest.TestCase):
+    N_PROCS = 1
+
+    def setUp(self):
+        # A perturbed (3, 4, 2) grid of points, giving 2 x 3 hexahedra
+        rng = np.random.default_rng(7)
+        x = np.stack(np.meshgrid(np.arange(3.0), np.arange(4.0), np.arange(2.0), indexing="ij"), axis=-1)
+        self.x = x + 0.1 * rng.random(x.shape)
+
+    def corners(self, x):
+        return (
+            x[:-1, :-1, 0],
+            x[1:, :-1, 0],
+            x[:-1, 1:, 0],
+            x[1:, 1:, 0],
+            x[:-1, :-1, 1],
+            x[1:, :-1, 1],
+            x[:-1, 1:, 1],
+            x[1:, 1:, 1],
+        )
+
+    def test_stacked_volume(self):
+        # First party modules
+        from pygeo.geo_utils.polygon import volumeHex
+
+        V = volumeHex(*self.corners(self.x))
+        self.assertEqual(V.shape, (2, 3))
+        for i in range(2):
+            for j in range(3):
+                cell = [c[i, j] for c in self.corners(self.x)]
+                self.assertAlmostEqual(V[i, j], volumeHex(*cell), places=14)
+
+    def test_stacked_volume_b(self):
+        # First party modules
+        from pygeo.geo_utils.polygon import volumeHex_b
+
+        xb = np.zeros_like(self.x)
+        volumeHex_b(*self.corners(self.x), *self.corners(xb))
+
+        xbRef = np.zeros_like(self.x)
+        for i in range(2):
+            for j in range(3):
+                cell = [c[i, j] for c in self.corners(self.x)]
+                cellb = [c[i, j] for c in self.corners(xbRef)]
+                volumeHex_b(*cell, *cellb)
+        np.testing.assert_allclose(xb, xbRef, rtol=1e-14, atol=1e-14)
+
+
+if __name__ == "__main__":
+    unittest.main()
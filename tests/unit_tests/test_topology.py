@@ -0,0 +1,120 @@
+# Standard Python modules
+import itertools
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# External modules
+import numpy as np
+
+baseDir = os.path.dirname(os.path.abspath(__file__))
+
+
+def getCubes(nx, ny, nz, seed=0):
+    # unit cubes on a structured grid, each with a random orientation, in the (8, 3) corner order of BlockTopology
+    rng = np.random.default_rng(seed)
+    perms = list(itertools.permutations(range(3)))
+    coords = []
+    for a in range(nx):
+        for b in range(ny):
+            for c in range(nz):
+                perm = list(perms[rng.integers(len(perms))])
+                flip = rng.integers(2, size=3)
+                corners = []
+                for k in range(2):
+                    for j in range(2):
+                        for i in range(2):
+                            loc = np.array([i, j, k])[perm]
+                            loc = np.where(flip, 1 - loc, loc)
+                            corners.append(np.array([a, b, c]) + loc)
+                coords.append(corners)
+    return np.array(coords, dtype=float)
+
+
+def getWing():
+    # two wing FFD volumes along k, the second one is collapsed in i at the tip, so some edges are degenerate
+    slices = np.array(
+        [
+            [[[0, 0, 0], [1, 0, 0]], [[0, 0.2, 0], [1, 0.2, 0]]],
+            [[[0, 0, 2], [1, 0, 2]], [[0, 0.2, 2], [1, 0.2, 2]]],
+            [[[0.9, 0, 6], [0.9, 0, 6]], [[0.9, 0.2, 6], [0.9, 0.2, 6]]],
+        ]
+    )
+    coords = []
+    for ivol in range(2):
+        coords.append([slices[ivol + k, j, i] for k in range(2) for j in range(2) for i in range(2)])
+    return np.array(coords)
+
+
+def getCases():
+    # the corner coordinates and the (i, j, k) sizes of each volume
+    cubes = getCubes(3, 2, 2)
+    wing = getWing()
+    return [
+        ("cubes", cubes, np.full((len(cubes), 3), 3)),
+        ("wing", wing, np.array([[4, 3, 5], [4, 3, 7]])),
+    ]
+
+
+class TestBlockTopology(unittest.TestCase):
+    """
+    Regression test of the BlockTopology connectivity and global
+    numbering on multi-block FFDs. The reference was generated with the
+    implementation that predates the vectorized one, which has to
+    reproduce it exactly.
+    """
+
+    N_PROCS = 1
+
+    def setUp(self):
+        self.refFile = os.path.join(baseDir, "ref/test_topology.ref")
+
+    # pygeo is removed from sys.modules afterwards, as the import guard tests need a fresh import.
+    # baseclasses imports it as well
+    def train(self):
+        with patch.dict(sys.modules):
+            # External modules
+            from baseclasses import BaseRegTest
+
+            with BaseRegTest(self.refFile, train=True) as handler:
+                self.regTest(handler)
+                handler.writeRef()
+
+    def test(self):
+        with patch.dict(sys.modules):
+            # External modules
+            from baseclasses import BaseRegTest
+
+            with BaseRegTest(self.refFile, train=False) as handler:
+                self.regTest(handler)
+
+    def regTest(self, handler):
+        # First party modules
+        from pygeo.topology import BlockTopology
+
+        for name, coords, sizes in getCases():
+            topo = BlockTopology(coords=coords)
+            handler.root_add_val(f"{name} nNode", topo.nNode)
+            handler.root_add_val(f"{name} nEdge", topo.nEdge)
+            handler.root_add_val(f"{name} nFace", topo.nFace)
+            handler.root_add_val(f"{name} nodeLink", np.array(topo.nodeLink))
+            handler.root_add_val(f"{name} edgeLink", np.array(topo.edgeLink))
+            handler.root_add_val(f"{name} edgeDir", np.array(topo.edgeDir))
+            handler.root_add_val(f"{name} faceLink", np.array(topo.faceLink))
+            handler.root_add_val(f"{name} faceDir", np.array(topo.faceDir))
+
+            for greedyReorder in [False, True]:
+                key = f"{name} greedy" if greedyReorder else name
+                topo.calcGlobalNumbering(sizes, greedyReorder=greedyReorder)
+                handler.root_add_val(f"{key} nGlobal", topo.nGlobal)
+                handler.root_add_val(f"{key} lIndex", np.concatenate([lIndex.flatten() for lIndex in topo.lIndex]))
+
+                # the entries of each global point, in order
+                gIndex = [[list(entry) for entry in topo.gIndex[i]] for i in range(len(topo.gIndex))]
+                handler.root_add_val(f"{key} gIndex offsets", np.cumsum([0] + [len(entries) for entries in gIndex]))
+                handler.root_add_val(f"{key} gIndex entries", np.array(sum(gIndex, [])))
+
+
+if __name__ == "__main__":
+    unittest.main()